@@ -0,0 +1,117 @@
+"""Check an embedding backend against the reference model before switching to it.
+
+    python benchmarks/embedding_parity.py --reference huggingface --candidate onnx
+
+Both backends embed every course and a set of sample queries. The check passes
+when their vectors agree on average and each query's top-k courses mostly match;
+load time, model memory and per-query latency are reported alongside.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from startup_benchmark import memory_stats
+from vector_utils import course_text, load_course_metadata, load_embeddings
+
+MIN_MEAN_COSINE = 0.98  # Average agreement between the two backends' vectors
+MIN_TOPK_OVERLAP = 0.9  # Share of each query's top-k courses both backends agree on
+REPORT_PATH = "embedding_parity.json"
+SAMPLE_QUERIES = [
+    "python courses for kids",
+    "learn java programming",
+    "cloud computing with aws",
+    "what AI courses do you have",
+    "build games in roblox or minecraft",
+    "web development with javascript and css",
+    "robotics for beginners",
+    "mobile app development",
+]
+
+def embed_all(backend, documents, queries):
+    """Load one backend, embed everything, and time single-query embedding."""
+    rss_before = memory_stats().get("VmRSS", 0)
+    start = time.perf_counter()
+    model = load_embeddings(backend)
+    load_seconds = time.perf_counter() - start
+    rss_after = memory_stats().get("VmRSS", 0)
+
+    doc_vectors = np.array(model.embed_documents(documents), dtype=np.float32)
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(model.embed_query(query))
+        latencies.append(time.perf_counter() - start)
+
+    stats = {
+        "load_seconds": load_seconds,
+        "model_rss_mb": rss_after - rss_before,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+    return normalize(doc_vectors), normalize(np.array(query_vectors, dtype=np.float32)), stats
+
+def normalize(vectors):
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+def top_k(doc_vectors, query_vectors, k):
+    return np.argsort(-(query_vectors @ doc_vectors.T), axis=1)[:, :k]
+
+def compare(reference, candidate, documents, queries, k):
+    ref_docs, ref_queries, ref_stats = embed_all(reference, documents, queries)
+    cand_docs, cand_queries, cand_stats = embed_all(candidate, documents, queries)
+
+    cosines = np.concatenate([(ref_docs * cand_docs).sum(axis=1), (ref_queries * cand_queries).sum(axis=1)])
+    k = min(k, len(documents))
+    overlaps = [
+        len(set(ref_rows) & set(cand_rows)) / k
+        for ref_rows, cand_rows in zip(top_k(ref_docs, ref_queries, k), top_k(cand_docs, cand_queries, k))
+    ]
+    return {
+        "reference": reference,
+        "candidate": candidate,
+        "k": k,
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        f"top{k}_overlap": float(np.mean(overlaps)),
+        reference: ref_stats,
+        candidate: cand_stats,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check an embedding backend against the reference model.")
+    parser.add_argument("--reference", default="huggingface")
+    parser.add_argument("--candidate", default="onnx")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--output", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    courses = load_course_metadata()
+    if not courses:
+        sys.exit("No courses found! Run data_preprocessing.py first.")
+    documents = [course_text(course) for course in courses]
+    queries = SAMPLE_QUERIES + [course["title"] for course in courses]
+
+    report = compare(args.reference, args.candidate, documents, queries, args.k)
+    overlap = report[f"top{report['k']}_overlap"]
+    print(f"Cosine agreement: mean {report['mean_cosine']:.4f}, min {report['min_cosine']:.4f}")
+    print(f"Top-{report['k']} overlap: {overlap:.3f}")
+    for backend in [args.reference, args.candidate]:
+        stats = report[backend]
+        print(f"{backend}: query p50 {stats['query_p50_ms']:.2f} ms, p95 {stats['query_p95_ms']:.2f} ms, "
+              f"load {stats['load_seconds']:.2f}s, model RSS {stats['model_rss_mb']:.0f} MB")
+
+    report["passed"] = report["mean_cosine"] >= MIN_MEAN_COSINE and overlap >= MIN_TOPK_OVERLAP
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    print(f"Report saved to {args.output}")
+
+    if not report["passed"]:
+        sys.exit(f"Parity check failed: need mean cosine >= {MIN_MEAN_COSINE} and overlap >= {MIN_TOPK_OVERLAP}")
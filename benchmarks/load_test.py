@@ -0,0 +1,259 @@
+"""Load-test the Flask service with a mix of chatbot questions.
+
+    python benchmarks/load_test.py --workdir /path/with/faiss_index --concurrency 1 4 16
+    python benchmarks/load_test.py --url http://localhost:5001 --mode open --rate 20 50 100
+
+By default the app is started locally from --workdir (where faiss_index and
+the course file live), on the Flask development server or on gunicorn with
+--server gunicorn. The harness waits for /ready, then replays the query mix.
+
+Two modes are supported:
+- closed: N clients, each sending its next question as soon as the last one
+  is answered. Throughput then shows the service's capacity at that
+  concurrency.
+- open: questions arrive at a fixed rate whether or not earlier ones have
+  finished. Latency is measured from each question's scheduled send time, so
+  a backed-up server shows up in the tail instead of slowing the load down.
+
+Results go to a JSON report: throughput, p50/p95/p99 latency and error rate,
+overall and per kind of question.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from data_preprocessing import COURSES_STREAM_PATH, read_courses_ndjson
+
+# Share of each kind of question in the replayed traffic
+DEFAULT_MIX = {"category_listing": 0.1, "title_lookup": 0.3, "price_question": 0.2, "free_text": 0.4}
+FREE_TEXT_QUERIES = [
+    "python courses for kids",
+    "learn java programming",
+    "cloud computing with aws",
+    "build games in roblox or minecraft",
+    "web development with javascript",
+    "robotics for beginners",
+    "mobile app development",
+    "what AI courses do you have",
+]
+PRICE_QUESTIONS = [
+    "cheapest course",
+    "cheapest AI course",
+    "python courses under $30",
+    "courses with at most 8 lessons",
+    "most expensive course by total",
+    "3 cheapest java courses",
+]
+LISTING_QUESTIONS = ["What different courses do you have?", "list all courses", "what types of courses are there"]
+READY_TIMEOUT = 300  # Seconds to wait for the app to load the model and index
+REQUEST_TIMEOUT = 30
+
+def load_titles(courses_path, limit=1000):
+    titles = []
+    for course in read_courses_ndjson(courses_path):
+        titles.append(course["title"])
+        if len(titles) >= limit:
+            break
+    return titles
+
+def build_questions(mix, titles, count, seed=0):
+    """Draw (kind, question) pairs according to the mix, reproducibly."""
+    rng = random.Random(seed)
+    makers = {
+        "category_listing": lambda: rng.choice(LISTING_QUESTIONS),
+        "title_lookup": lambda: rng.choice(["", "how much does ", "tell me about "]) + rng.choice(titles),
+        "price_question": lambda: rng.choice(PRICE_QUESTIONS),
+        "free_text": lambda: rng.choice(FREE_TEXT_QUERIES),
+    }
+    if not titles:
+        mix = {kind: share for kind, share in mix.items() if kind != "title_lookup"}
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return [(kind, makers[kind]()) for kind in kinds]
+
+def start_app(workdir, server, port):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])))
+    if server == "gunicorn":
+        command = [
+            sys.executable, "-m", "gunicorn", "-c", os.path.join(SRC_DIR, "gunicorn.conf.py"),
+            "--bind", f"127.0.0.1:{port}", "app:app",
+        ]
+    else:
+        command = [
+            sys.executable, "-c",
+            f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)",
+        ]
+    return subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_until_ready(url, process=None, timeout=READY_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"The app exited with status {process.returncode} before it was ready")
+        try:
+            if requests.get(f"{url}/ready", timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"The app at {url} was not ready after {timeout}s")
+
+def send(session, url, question):
+    """POST one question; returns an error description, or None on success."""
+    try:
+        response = session.post(f"{url}/api/chat", json={"query": question}, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        return type(e).__name__
+    return None if response.status_code == 200 else f"HTTP {response.status_code}"
+
+def run_closed(url, questions, concurrency, duration):
+    """`concurrency` clients in a loop for `duration` seconds; returns samples and elapsed time."""
+    samples = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(offset):
+        session = requests.Session()
+        position = offset
+        while time.perf_counter() < stop_at:
+            kind, question = questions[position % len(questions)]
+            position += concurrency
+            start = time.perf_counter()
+            error = send(session, url, question)
+            with lock:
+                samples.append((kind, time.perf_counter() - start, error))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+def run_open(url, questions, rate, duration, max_in_flight):
+    """Send `rate` questions per second for `duration` seconds; returns samples and elapsed time."""
+    samples = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def request(kind, question, scheduled):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        error = send(local.session, url, question)
+        with lock:
+            samples.append((kind, time.perf_counter() - scheduled, error))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for number in range(int(rate * duration)):
+            scheduled = start + number / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind, question = questions[number % len(questions)]
+            executor.submit(request, kind, question, scheduled)
+    return samples, time.perf_counter() - start
+
+def summarize(samples, elapsed):
+    latencies = np.array([latency for _, latency, _ in samples]) * 1000
+    errors = [error for _, _, error in samples if error]
+    summary = {
+        "requests": len(samples),
+        "errors": len(errors),
+        "error_rate": len(errors) / len(samples) if samples else 0.0,
+        "throughput_rps": (len(samples) - len(errors)) / elapsed if elapsed else 0.0,
+    }
+    if len(latencies):
+        summary.update({
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "max_ms": float(latencies.max()),
+        })
+    if errors:
+        summary["error_kinds"] = {error: errors.count(error) for error in sorted(set(errors))}
+    return summary
+
+def report_level(samples, elapsed):
+    level = summarize(samples, elapsed)
+    level["by_kind"] = {
+        kind: summarize([sample for sample in samples if sample[0] == kind], elapsed)
+        for kind in sorted({sample[0] for sample in samples})
+    }
+    return level
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test app.py with a mix of chatbot questions.")
+    parser.add_argument("--url", help="Test an app that is already running instead of starting one")
+    parser.add_argument("--workdir", default=".", help="Directory with faiss_index and the course file")
+    parser.add_argument("--server", choices=["flask", "gunicorn"], default="flask")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Clients per closed-loop level")
+    parser.add_argument("--rate", type=float, nargs="+", default=[10, 50], help="Questions per second per open-loop level")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open loop: cap on outstanding requests")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unrecorded traffic before the first level")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help="JSON shares per kind of question")
+    parser.add_argument("--courses", help="Course file to draw titles from (default: the one in --workdir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_report.json")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir)
+    courses_path = args.courses or os.path.join(workdir, COURSES_STREAM_PATH)
+    titles = load_titles(courses_path) if os.path.exists(courses_path) else []
+    questions = build_questions(args.mix, titles, 10000, args.seed)
+
+    process = None
+    url = args.url
+    if not url:
+        url = f"http://127.0.0.1:{args.port}"
+        process = start_app(workdir, args.server, args.port)
+    try:
+        wait_until_ready(url, process)
+        if args.warmup:
+            run_closed(url, questions, 1, args.warmup)
+
+        levels = []
+        for level in (args.concurrency if args.mode == "closed" else args.rate):
+            if args.mode == "closed":
+                samples, elapsed = run_closed(url, questions, level, args.duration)
+            else:
+                samples, elapsed = run_open(url, questions, level, args.duration, args.max_in_flight)
+            result = dict({"concurrency" if args.mode == "closed" else "rate": level}, **report_level(samples, elapsed))
+            levels.append(result)
+            print(f"{args.mode} {level}: {result['throughput_rps']:.1f} req/s, "
+                  f"p50 {result.get('p50_ms', 0):.1f} ms, p95 {result.get('p95_ms', 0):.1f} ms, "
+                  f"p99 {result.get('p99_ms', 0):.1f} ms, errors {result['error_rate']:.1%}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "url": url,
+        "server": None if args.url else args.server,
+        "mode": args.mode,
+        "duration_seconds": args.duration,
+        "mix": args.mix,
+        "levels": levels,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    print(f"Report saved to {args.output}")
@@ -0,0 +1,195 @@
+"""Time every retrieval stage and every retrieve_courses branch on a synthetic catalog.
+
+    python benchmarks/run_benchmarks.py --size 10000 --output baseline.json
+    python benchmarks/run_benchmarks.py --size 10000 --compare baseline.json
+
+Everything runs in a scratch directory, so the real index is left alone.
+Results are written as JSON, tagged with the git commit, and can be compared
+against an earlier run to spot regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import data_preprocessing
+import metadata
+import vector_utils
+from synthetic_catalog import SCRAPED_HTML, load_seed_courses, synthetic_courses
+
+QUERY_REPEATS = 50
+LOAD_REPEATS = 5
+REGRESSION_TOLERANCE = 0.2  # Flag stages whose median got this much slower...
+REGRESSION_MIN_MS = 0.05  # ...by more than this, so timer noise on tiny stages isn't flagged
+SAMPLE_QUERIES = ["python courses for kids", "learn java", "aws cloud", "build a game in roblox", "robotics camp"]
+
+def summarize(seconds):
+    milliseconds = np.array(seconds) * 1000
+    return {
+        "runs": len(milliseconds),
+        "mean_ms": float(milliseconds.mean()),
+        "p50_ms": float(np.percentile(milliseconds, 50)),
+        "p95_ms": float(np.percentile(milliseconds, 95)),
+        "min_ms": float(milliseconds.min()),
+    }
+
+def time_calls(function, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return summarize(seconds)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark_stages(courses, html_copies):
+    stages = {}
+
+    with open(SCRAPED_HTML, "r", encoding="utf-8") as file:
+        html = file.read() * html_copies
+    stages["preprocess_data"] = time_calls(lambda: data_preprocessing.preprocess_data(html), 3)
+
+    stages["categorize_course"] = time_calls(
+        lambda: [data_preprocessing.categorize_course(course["title"], course["description"]) for course in courses], 3
+    )
+
+    stages["create_vector_store_full"] = time_calls(
+        lambda: vector_utils.create_vector_store(courses, incremental=False), 1
+    )
+    stages["create_vector_store_unchanged"] = time_calls(lambda: vector_utils.create_vector_store(courses), 1)
+
+    stages["load_vector_store_mmap"] = time_calls(lambda: vector_utils.load_vector_store(mmap=True), LOAD_REPEATS)
+    stages["load_vector_store_in_memory"] = time_calls(vector_utils.load_vector_store, LOAD_REPEATS)
+    stages["load_catalog"] = time_calls(
+        lambda: vector_utils._load_catalog(vector_utils.catalog_version()), LOAD_REPEATS
+    )
+
+    # Cold embeddings miss the cache every time; warm ones always hit it
+    queries = iter([f"{query} {number}" for number in range(QUERY_REPEATS) for query in SAMPLE_QUERIES])
+    stages["query_embedding_cold"] = time_calls(lambda: vector_utils.query_embedding(next(queries)), QUERY_REPEATS)
+    stages["query_embedding_warm"] = time_calls(lambda: vector_utils.query_embedding(SAMPLE_QUERIES[0]), QUERY_REPEATS)
+
+    catalog = vector_utils.get_catalog()
+    query_vecs = [vector_utils.query_embedding(SAMPLE_QUERIES[0])]
+    stages["faiss_search"] = time_calls(
+        lambda: vector_utils.search_vectors(catalog, query_vecs, k=10), QUERY_REPEATS
+    )
+    stages["faiss_search_category"] = time_calls(
+        lambda: vector_utils.search_vectors(catalog, query_vecs, category="Python", k=10), QUERY_REPEATS
+    )
+    stages["lexical_search"] = time_calls(
+        lambda: catalog.lexical_index.search(SAMPLE_QUERIES[0], vector_utils.HYBRID_CANDIDATES), QUERY_REPEATS
+    )
+    stages["hybrid_search"] = time_calls(
+        lambda: vector_utils.hybrid_search(SAMPLE_QUERIES[0], k=10, threshold=0.0), QUERY_REPEATS
+    )
+    return stages
+
+def branch_queries(courses):
+    """One query per retrieve_courses branch, keyed by the branch that should answer it."""
+    title = courses[len(courses) // 2]["title"]
+    typo = title[:3] + title[4:]  # One character dropped
+    return {
+        "category_listing": "What different courses do you have?",
+        "full_listing": "list all courses",
+        "exact_title": title,
+        "partial_title": f"how much does {title} cost",
+        "fuzzy_title": f"tell me about {typo}",
+        "structured_filter": "cheapest AI course",
+        "category_search": "python courses for kids",
+    }
+
+def benchmark_branches(courses):
+    queries = branch_queries(courses)
+    metadata.retrieve_courses(queries["category_search"])  # Load the catalog and the model first
+    timings = {"cached_answer": time_calls(lambda: metadata.retrieve_courses(queries["category_search"]), QUERY_REPEATS)}
+
+    # Time the branches themselves, not the answer cache
+    cache_size = vector_utils.answer_cache.max_size
+    vector_utils.answer_cache.max_size = 0
+    vector_utils.answer_cache.clear()
+    repeats = {"full_listing": 5}  # Lists every course, so a handful of runs is plenty
+    try:
+        for branch, query in queries.items():
+            timings[branch] = time_calls(lambda: metadata.retrieve_courses(query), repeats.get(branch, QUERY_REPEATS))
+    finally:
+        vector_utils.answer_cache.max_size = cache_size
+    return timings
+
+def compare(results, baseline_path, tolerance=REGRESSION_TOLERANCE):
+    """Print each timing against a baseline run; returns the names that regressed."""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    regressions = []
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for section in ["stages", "branches"]:
+        for name, timing in results[section].items():
+            before = baseline.get(section, {}).get(name)
+            if not before:
+                continue
+            ratio = timing["p50_ms"] / max(before["p50_ms"], 1e-9)
+            slower = ratio > 1 + tolerance and timing["p50_ms"] - before["p50_ms"] > REGRESSION_MIN_MS
+            flag = "  REGRESSION" if slower else ""
+            print(f"  {name:<32}{before['p50_ms']:>11.3f} ms -> {timing['p50_ms']:>11.3f} ms  x{ratio:.2f}{flag}")
+            if flag:
+                regressions.append(name)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark retrieval stages and chatbot branches.")
+    parser.add_argument("--size", type=int, default=10000, help="Courses in the synthetic catalog")
+    parser.add_argument("--html-copies", type=int, default=10, help="Copies of the scraped page to preprocess")
+    parser.add_argument("--workdir", help="Scratch directory (default: a new temporary one)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix="course-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # Index and catalog paths are relative
+
+    courses = list(synthetic_courses(load_seed_courses(), args.size))
+    data_preprocessing.write_courses_ndjson(courses)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "size": args.size,
+        "index_spec": vector_utils.INDEX_SPEC,
+        "embedding_backend": vector_utils.EMBEDDING_BACKEND,
+        "stages": benchmark_stages(courses, args.html_copies),
+        "branches": benchmark_branches(courses),
+    }
+
+    for section in ["stages", "branches"]:
+        print(f"\n{section}:")
+        for name, timing in results[section].items():
+            print(f"  {name:<32}p50 {timing['p50_ms']:>11.3f} ms   p95 {timing['p95_ms']:>11.3f} ms")
+
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=4)
+    print(f"\nResults saved to {output}")
+
+    if baseline and compare(results, baseline):
+        sys.exit(1)
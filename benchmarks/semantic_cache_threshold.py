@@ -0,0 +1,96 @@
+"""Pick the semantic cache distance from labelled pairs of course questions.
+
+    python benchmarks/semantic_cache_threshold.py --distances 0.05 0.1 0.15 0.2 0.25
+
+Each pair is embedded with the configured model (EMBEDDING_BACKEND). Reworded
+pairs should reuse each other's results; pairs that differ in subject, age
+group or price must not. For each candidate distance the run reports how many
+reworded pairs would hit (recall) and how many different pairs would wrongly
+hit, then suggests the widest distance with no wrong hits. Add pairs from
+real traffic to PAIRS for a better estimate.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from vector_utils import embedding_model_id, load_embeddings
+
+# (question, other question, same intent)
+PAIRS = [
+    ("cheap python classes", "low cost python course", True),
+    ("python courses for kids", "python classes for children", True),
+    ("learn java programming", "java programming course", True),
+    ("robotics for beginners", "beginner robotics class", True),
+    ("cloud computing with aws", "amazon web services cloud course", True),
+    ("build games in roblox", "roblox game development course", True),
+    ("what AI courses do you have", "which artificial intelligence classes are offered", True),
+    ("web development with javascript", "javascript web programming course", True),
+    ("mobile app development", "course on building mobile apps", True),
+    ("How much is the python course?", "what does the python course cost", True),
+    ("python courses for kids", "java courses for kids", False),
+    ("cheap python classes", "expensive python classes", False),
+    ("robotics for beginners", "advanced robotics", False),
+    ("build games in roblox", "build games in minecraft", False),
+    ("cloud computing with aws", "cloud computing with azure", False),
+    ("python courses for kids", "python courses for adults", False),
+    ("what AI courses do you have", "what robotics courses do you have", False),
+    ("web development with javascript", "mobile development with swift", False),
+    ("courses under $30", "courses under $50", False),
+    ("learn java programming", "learn javascript programming", False),
+]
+DEFAULT_DISTANCES = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3]
+
+def pair_distances(embed, pairs):
+    """Cosine distance between the two questions of each pair."""
+    vectors = np.array(embed([text for pair in pairs for text in pair[:2]]), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return 1.0 - np.sum(vectors[0::2] * vectors[1::2], axis=1)
+
+def evaluate(distances, same_intent, max_distance):
+    hits = distances <= max_distance
+    return {
+        "max_distance": max_distance,
+        "recall": float(hits[same_intent].mean()),
+        "wrong_hits": int(hits[~same_intent].sum()),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune SEMANTIC_CACHE_DISTANCE on labelled question pairs.")
+    parser.add_argument("--distances", type=float, nargs="+", default=DEFAULT_DISTANCES)
+    parser.add_argument("--output", default="semantic_cache_threshold.json")
+    args = parser.parse_args()
+
+    distances = pair_distances(load_embeddings().embed_documents, PAIRS)
+    same_intent = np.array([pair[2] for pair in PAIRS])
+
+    results = [evaluate(distances, same_intent, max_distance) for max_distance in sorted(args.distances)]
+    for result in results:
+        print(f"distance {result['max_distance']:.2f}: recall {result['recall']:.0%}, "
+              f"wrong hits {result['wrong_hits']}")
+    safe = [result["max_distance"] for result in results if result["wrong_hits"] == 0]
+    suggested = max(safe) if safe else None
+    print(f"Closest different pair: {distances[~same_intent].min():.3f}; "
+          f"farthest reworded pair: {distances[same_intent].max():.3f}")
+    print(f"Suggested SEMANTIC_CACHE_DISTANCE: {suggested}")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "model": embedding_model_id(),
+        "pairs": [
+            {"query": query, "other": other, "same_intent": same, "distance": float(distance)}
+            for (query, other, same), distance in zip(PAIRS, distances)
+        ],
+        "thresholds": results,
+        "suggested": suggested,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    print(f"Results saved to {args.output}")
@@ -0,0 +1,112 @@
+"""Measure how sharded scatter-gather search scales with shard (process) count.
+
+    python benchmarks/shard_scaling.py --size 200000 --shards 1 2 4 8
+
+Synthetic normalised vectors are split into N flat shards. Each count is
+timed on single-query latency and batched throughput, against one in-process
+flat index searched on a single thread. The merged results are checked
+against that index, so the run also confirms sharding is exact.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sharding import ShardCoordinator, write_shards
+
+DIM = 384  # all-MiniLM-L6-v2
+K = 10
+SINGLE_QUERIES = 200
+BATCH_SIZE = 64
+BATCHES = 20
+
+def default_shard_counts():
+    counts, count = [], 1
+    while count <= (os.cpu_count() or 1):
+        counts.append(count)
+        count *= 2
+    return counts
+
+def random_vectors(count, seed):
+    vectors = np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def percentile_ms(seconds, q):
+    return float(np.percentile(seconds, q) * 1000)
+
+def measure(search, queries):
+    """Single-query latency and batched throughput of `search(queries, k)`."""
+    latencies = []
+    for query in queries[:SINGLE_QUERIES]:
+        start = time.perf_counter()
+        search(query[None, :], K)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for batch in range(BATCHES):
+        search(queries[batch * BATCH_SIZE:(batch + 1) * BATCH_SIZE], K)
+    elapsed = time.perf_counter() - start
+    return {
+        "single_p50_ms": percentile_ms(latencies, 50),
+        "single_p95_ms": percentile_ms(latencies, 95),
+        "batch_queries_per_second": BATCHES * BATCH_SIZE / elapsed,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sharded search against one index.")
+    parser.add_argument("--size", type=int, default=200000, help="Vectors in the synthetic catalog")
+    parser.add_argument("--shards", type=int, nargs="+", default=default_shard_counts())
+    parser.add_argument("--output", default="shard_scaling.json")
+    args = parser.parse_args()
+
+    vectors = random_vectors(args.size, seed=0)
+    queries = random_vectors(max(SINGLE_QUERIES, BATCHES * BATCH_SIZE), seed=1)
+    ids = [f"course-{row}" for row in range(args.size)]
+    categories = ["Synthetic"] * args.size
+
+    faiss.omp_set_num_threads(1)  # The baseline gets one core, like each shard worker
+    index = faiss.IndexFlatIP(DIM)
+    index.add(vectors)
+    _, expected_rows = index.search(queries, K)
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "size": args.size,
+        "single_index": measure(index.search, queries),
+        "sharded": {},
+    }
+    base = results["single_index"]
+    print(f"single index: p50 {base['single_p50_ms']:.2f} ms, {base['batch_queries_per_second']:.0f} queries/s batched")
+
+    with tempfile.TemporaryDirectory(prefix="course-shards-") as workdir:
+        for count in args.shards:
+            path = os.path.join(workdir, f"shards-{count}")
+            write_shards(path, vectors, ids, categories, count)
+            coordinator = ShardCoordinator(path)
+            try:
+                _, rows = coordinator.search(queries, K)  # Also starts the workers
+                timing = measure(coordinator.search, queries)
+            finally:
+                coordinator.close()
+
+            timing["exact"] = bool(np.array_equal(rows, expected_rows))
+            timing["batch_speedup"] = timing["batch_queries_per_second"] / base["batch_queries_per_second"]
+            results["sharded"][count] = timing
+            print(f"{count} shard(s): p50 {timing['single_p50_ms']:.2f} ms, "
+                  f"{timing['batch_queries_per_second']:.0f} queries/s batched "
+                  f"(x{timing['batch_speedup']:.2f}), exact: {timing['exact']}")
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=4)
+    print(f"Results saved to {args.output}")
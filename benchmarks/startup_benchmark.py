@@ -0,0 +1,125 @@
+"""Measure worker cold start with and without a memory-mapped index.
+
+    python benchmarks/startup_benchmark.py --workers 4
+
+Run it from the directory holding faiss_index. Each worker is a separate process
+that imports vector_utils, loads the catalog and answers one query; once all of
+them are up, each reports its timings and resident memory, split into private and
+shared pages. The report is saved as JSON.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+WORKERS = 4
+REPORT_PATH = "startup_report.json"
+FIRST_QUERY = "python courses for kids"
+
+def memory_stats():
+    """Resident memory of this process in MB, split into private and shared pages (Linux only)."""
+    stats = {}
+    for path in ["/proc/self/status", "/proc/self/smaps_rollup"]:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    name, _, value = line.partition(":")
+                    if name in ("VmRSS", "RssAnon", "RssFile", "Pss") and value.strip().endswith("kB"):
+                        stats[name] = int(value.split()[0]) / 1024
+        except OSError:
+            pass
+    return stats
+
+def run_worker():
+    """Load the catalog like a server worker, then report timings and memory when asked."""
+    start = time.perf_counter()
+    import vector_utils
+    imported = time.perf_counter()
+    catalog = vector_utils.get_catalog()
+    loaded = time.perf_counter()
+    results = vector_utils.search_courses(FIRST_QUERY, k=3, threshold=0.0)
+    answered = time.perf_counter()
+
+    print("ready", flush=True)
+    sys.stdin.readline()  # Measure only once every worker is up, so shared pages are shared
+    print(json.dumps({
+        "import_seconds": imported - start,
+        "catalog_seconds": loaded - imported,
+        "first_query_seconds": answered - loaded,
+        "time_to_first_query_seconds": answered - start,
+        "vectors": catalog.vector_store.index.ntotal if catalog.vector_store else 0,
+        "answered": isinstance(results, list),
+        "memory_mb": memory_stats(),
+    }), flush=True)
+    sys.stdin.readline()
+
+def run_workers(count, mmap):
+    env = dict(os.environ, FAISS_MMAP="1" if mmap else "0")
+    workers = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker"], env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(count)
+    ]
+    try:
+        for worker in workers:
+            if worker.stdout.readline().strip() != "ready":
+                raise RuntimeError("worker failed to start")
+        reports = []
+        for worker in workers:
+            worker.stdin.write("measure\n")
+            worker.stdin.flush()
+            reports.append(json.loads(worker.stdout.readline()))
+        return reports
+    finally:
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait()
+
+def summarize(reports):
+    def mean(values):
+        return sum(values) / len(values) if values else None
+
+    summary = {
+        name: mean([report[name] for report in reports])
+        for name in ["import_seconds", "catalog_seconds", "first_query_seconds", "time_to_first_query_seconds"]
+    }
+    for name in ["VmRSS", "RssAnon", "RssFile", "Pss"]:
+        summary[f"{name}_mb"] = mean([report["memory_mb"][name] for report in reports if name in report["memory_mb"]])
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure worker cold start with and without a memory-mapped index.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Workers started side by side")
+    parser.add_argument("--output", default=REPORT_PATH)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker()
+        exit()
+
+    report = {"workers": args.workers}
+    for mode, mmap in [("mmap", True), ("in_memory", False)]:
+        reports = run_workers(args.workers, mmap)
+        report[mode] = {"summary": summarize(reports), "workers": reports}
+
+        summary = report[mode]["summary"]
+        print(f"\n{mode}: {args.workers} workers, {reports[0]['vectors']} vectors")
+        print(f"  time to first query: {summary['time_to_first_query_seconds']:.3f}s "
+              f"(import {summary['import_seconds']:.3f}s, catalog {summary['catalog_seconds']:.3f}s, "
+              f"query {summary['first_query_seconds']:.3f}s)")
+        if summary["VmRSS_mb"] is not None:
+            print(f"  per-worker RSS: {summary['VmRSS_mb']:.1f} MB "
+                  f"(private {summary['RssAnon_mb']:.1f} MB, file-backed {summary['RssFile_mb']:.1f} MB, "
+                  f"PSS {summary['Pss_mb'] or 0:.1f} MB)")
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    print(f"\nReport saved to {args.output}")
@@ -0,0 +1,51 @@
+"""Scale the scraped course catalog up to any size for benchmarking.
+
+    python benchmarks/synthetic_catalog.py --size 100000 --output processed_courses.jsonl
+
+Synthetic courses are variations of the real ones: the title gets a suffix and a
+running number, so titles stay unique, and price and lesson count are redrawn.
+Descriptions and categories come from the real course they were based on.
+"""
+import argparse
+import os
+import random
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from data_preprocessing import COURSES_STREAM_PATH, preprocess_data, write_courses_ndjson
+
+SCRAPED_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scraped_content.html")
+TITLE_SUFFIXES = ["Bootcamp", "Workshop", "for Teens", "for Beginners", "Masterclass", "Summer Camp", "Advanced", "Lab"]
+PRICES = [25, 30, 35, 40]
+
+def load_seed_courses(html_path=SCRAPED_HTML):
+    with open(html_path, "r", encoding="utf-8") as file:
+        return preprocess_data(file.read())
+
+def synthetic_courses(seed_courses, size, seed=0):
+    """Yield `size` courses derived from the seed courses, reproducibly for a given seed."""
+    rng = random.Random(seed)
+    for number in range(size):
+        base = seed_courses[number % len(seed_courses)]
+        price = rng.choice(PRICES)
+        lessons = rng.randint(4, 30)
+        yield {
+            "title": f"{base['title']} {rng.choice(TITLE_SUFFIXES)} {number}",
+            "description": base["description"],
+            "price_per_session": f"${price} per session",
+            "number_of_lessons": lessons,
+            "total_price": price * lessons,
+            "course_category": base["course_category"],
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic course catalog.")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=COURSES_STREAM_PATH)
+    args = parser.parse_args()
+
+    count = write_courses_ndjson(synthetic_courses(load_seed_courses(), args.size, args.seed), args.output)
+    print(f"Wrote {count} courses to {args.output}")
@@ -1,34 +1,199 @@
-from langchain.document_loaders import WebBaseLoader
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from data_preprocessing import iter_courses, read_courses_ndjson, write_courses_ndjson
+from instrumentation import get_logger
+
+CRAWL_STATE_PATH = "crawl_state.json"  # ETag / Last-Modified seen for each URL
+PAGE_CACHE_DIR = "crawl_cache"  # Courses parsed from each page, reused while it is unchanged
+CRAWL_CONCURRENCY = 8
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5  # Doubled after each failed attempt
+REQUEST_TIMEOUT = 15
+
+log = get_logger("Scrapper")
 
 def scrape_data(url):
-    print("Loading webpage content...")
+    from langchain.document_loaders import WebBaseLoader
+
+    log.info("Loading webpage content", extra={"fields": {"url": url}})
     loader = WebBaseLoader(url)
     documents = loader.load()
-    print(f"Loaded {len(documents)} documents.")
-    
+    log.info("Loaded %d documents", len(documents))
+
     if documents:
         html_content = documents[0].page_content
-        print("Webpage content loaded successfully.")
+        log.info("Webpage content loaded successfully")
         return html_content
     else:
-        print("No documents found.")
+        log.warning("No documents found", extra={"fields": {"url": url}})
         return None
 
+def paginate(url_pattern, max_pages, first_page=1):
+    """Expand a pattern like '...?page={page}' into one URL per page."""
+    return [url_pattern.format(page=page) for page in range(first_page, first_page + max_pages)]
+
+def load_crawl_state(path=CRAWL_STATE_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_crawl_state(state, path=CRAWL_STATE_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=4)
+    os.replace(tmp_path, path)
+
+def create_session(concurrency=CRAWL_CONCURRENCY):
+    """HTTP session whose connection pool is sized for the crawl's concurrency."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_page(session, url, validators=None, retries=MAX_RETRIES, backoff=BACKOFF_SECONDS):
+    """Fetch one page, conditionally if validators from an earlier crawl are known.
+
+    Returns (html, validators); html is None when the server says it is unchanged.
+    Connection errors, 429 and 5xx responses are retried with exponential backoff.
+    """
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 304:
+                return None, validators
+            if response.status_code != 429 and response.status_code < 500:
+                response.raise_for_status()
+                if "charset" not in response.headers.get("Content-Type", ""):
+                    response.encoding = response.apparent_encoding  # requests would assume Latin-1
+                new_validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                return response.text, new_validators
+            error = requests.HTTPError(f"{response.status_code} for {url}", response=response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt)
+
+    raise error
+
+def crawl(urls, concurrency=CRAWL_CONCURRENCY, state_path=CRAWL_STATE_PATH, refetch=()):
+    """Fetch pages concurrently over pooled connections, yielding (url, html) for changed pages.
+
+    Pages the server reports as unchanged since the last crawl are skipped, except
+    those in `refetch`, which are fetched unconditionally. Pages that keep failing
+    are reported and skipped. A page's validators are only saved once the caller
+    has consumed it.
+    """
+    state = load_crawl_state(state_path)
+    refetch = set(refetch)
+    queued = iter(urls)
+    session = create_session(concurrency)
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = {}
+
+            def submit(batch):
+                for url in batch:
+                    pending[executor.submit(fetch_page, session, url, None if url in refetch else state.get(url))] = url
+
+            # Only a couple of pages per worker are in flight or waiting to be consumed,
+            # so a page's HTML is released as soon as the caller has handled it
+            submit(itertools.islice(queued, 2 * concurrency))
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    submit(itertools.islice(queued, 1))
+                    try:
+                        html, validators = future.result()
+                    except requests.RequestException as e:
+                        log.warning("Failed to fetch page", extra={"fields": {"url": url, "error": str(e)}})
+                        continue
+
+                    if html is None:
+                        log.info("Unchanged, skipping", extra={"fields": {"url": url}})
+                        continue
+
+                    yield url, html
+                    state[url] = validators
+    finally:
+        session.close()
+        save_crawl_state(state, state_path)
+
+def page_cache_path(url, cache_dir=PAGE_CACHE_DIR):
+    return os.path.join(cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".jsonl")
+
+def crawl_courses(urls, concurrency=CRAWL_CONCURRENCY, state_path=CRAWL_STATE_PATH, cache_dir=PAGE_CACHE_DIR):
+    """Crawl pages and stream each one straight into course preprocessing.
+
+    Courses from changed pages are parsed as they arrive and cached per page;
+    unchanged (or failed) pages contribute their cached courses instead.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    uncached = [url for url in urls if not os.path.exists(page_cache_path(url, cache_dir))]
+
+    fetched = set()
+    for url, html in crawl(urls, concurrency, state_path, refetch=uncached):
+        path = page_cache_path(url, cache_dir)
+        write_courses_ndjson(iter_courses([html]), path)
+        fetched.add(url)
+        yield from read_courses_ndjson(path)
+
+    for url in urls:
+        path = page_cache_path(url, cache_dir)
+        if url not in fetched and os.path.exists(path):
+            yield from read_courses_ndjson(path)
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scrape course pages.")
+    parser.add_argument("--pages", help="Crawl a paginated URL pattern, e.g. '...?page={page}'")
+    parser.add_argument("--max-pages", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=CRAWL_CONCURRENCY)
+    parser.add_argument("urls", nargs="*", help="Seed URLs to crawl")
+    args = parser.parse_args()
+
+    if args.pages or args.urls:
+        urls = list(args.urls) + (paginate(args.pages, args.max_pages) if args.pages else [])
+        log.info("Crawling %d pages", len(urls))
+        count = write_courses_ndjson(crawl_courses(urls, args.concurrency))
+        log.info("Saved %d courses", count)
+        exit()
+
     url = "https://brainlox.com/courses/category/technical"
-    print("Scraping data from:", url)
-    
+    log.info("Scraping data", extra={"fields": {"url": url}})
+
     try:
         html_content = scrape_data(url)
         if html_content:
-            print("Scraped content (first 1000 characters):")
-            print(html_content[:1000])  # Print the first 1000 characters for debugging
+            log.debug("Scraped content (first 1000 characters): %s", html_content[:1000])
 
             # Save the scraped content to a file for later use
             with open("scraped_content.html", "w", encoding="utf-8") as file:
                 file.write(html_content)
-            print("Scraped content saved to 'scraped_content.html'")
+            log.info("Scraped content saved to 'scraped_content.html'")
         else:
-            print("No content to save.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+            log.warning("No content to save")
+    except Exception:
+        log.exception("Scraping failed")
@@ -0,0 +1,150 @@
+import faiss
+import numpy as np
+
+from instrumentation import get_logger
+
+# Tunable parameters of each index type, with their defaults:
+#   flat:  exact search over full float32 vectors
+#   hnsw:  m links per node, ef_construction / ef_search candidate list sizes
+#   ivf:   nlist clusters, nprobe of them scanned per query
+#   ivfpq: ivf plus vectors compressed to m codes of nbits each
+INDEX_TYPES = {
+    "flat": {},
+    "hnsw": {"m": 32, "ef_construction": 40, "ef_search": 64},
+    "ivf": {"nlist": 100, "nprobe": 8},
+    "ivfpq": {"nlist": 100, "nprobe": 8, "m": 16, "nbits": 8},
+}
+DEFAULT_INDEX_SPEC = "flat"
+MIN_POINTS_PER_CENTROID = 39  # FAISS clustering wants at least this many training vectors per centroid
+EXACT_CATEGORY_ROWS = 5000  # PQ indexes: categories up to this size are scanned exactly over decoded vectors
+
+log = get_logger("ann_index")
+
+def parse_index_spec(spec):
+    """Parse a spec like "ivfpq:nlist=256,m=16,nprobe=16" into a dict with defaults filled in."""
+    if isinstance(spec, dict):
+        return dict(spec)
+
+    kind, _, params = spec.strip().lower().partition(":")
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{kind}', expected one of: {', '.join(INDEX_TYPES)}")
+
+    parsed = {"type": kind, **INDEX_TYPES[kind]}
+    for param in filter(None, params.split(",")):
+        name, _, value = param.partition("=")
+        name = name.strip()
+        if name not in INDEX_TYPES[kind]:
+            raise ValueError(f"Unknown parameter '{name}' for {kind} index")
+        parsed[name] = int(value)
+    return parsed
+
+def format_index_spec(spec):
+    """Inverse of parse_index_spec; used to record the spec in the manifest."""
+    spec = parse_index_spec(spec)
+    params = ",".join(f"{name}={spec[name]}" for name in INDEX_TYPES[spec["type"]])
+    return spec["type"] + (":" + params if params else "")
+
+def new_index(spec, vectors):
+    """Create an empty inner-product index for `spec`, trained on `vectors` if it needs training.
+
+    Cluster and code counts are lowered when the catalog is too small to train them.
+    """
+    spec = parse_index_spec(spec)
+    dim = vectors.shape[1]
+    kind = spec["type"]
+
+    if kind == "flat":
+        return faiss.IndexFlatIP(dim)
+
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, spec["m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = spec["ef_construction"]
+        set_search_params(index, spec)
+        return index
+
+    nlist = max(1, min(spec["nlist"], len(vectors) // MIN_POINTS_PER_CENTROID))
+    if nlist != spec["nlist"]:
+        log.info(f"{len(vectors)} vectors can only train {nlist} IVF clusters (asked for {spec['nlist']}).")
+    if kind == "ivf":
+        description = f"IVF{nlist},Flat"
+    else:
+        if dim % spec["m"]:
+            raise ValueError(f"PQ m={spec['m']} must divide the embedding dimension {dim}")
+        nbits = spec["nbits"]
+        while nbits > 1 and 2 ** nbits * MIN_POINTS_PER_CENTROID > len(vectors):
+            nbits -= 1
+        if nbits != spec["nbits"]:
+            log.info(f"{len(vectors)} vectors can only train {nbits}-bit PQ codes (asked for {spec['nbits']}).")
+        description = f"IVF{nlist},PQ{spec['m']}x{nbits}"
+
+    index = faiss.index_factory(dim, description, faiss.METRIC_INNER_PRODUCT)
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+    faiss.extract_index_ivf(index).make_direct_map()  # Lets vectors be reconstructed by row
+    set_search_params(index, spec)
+    return index
+
+def set_search_params(index, spec):
+    """Apply query-time parameters (ef_search, nprobe), which are not all saved with the index."""
+    spec = parse_index_spec(spec)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(spec["nprobe"], ivf.nlist)
+        if ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+    elif spec["type"] == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = spec["ef_search"]
+
+def is_exact(index):
+    """True for flat indexes, which search exactly and compact their rows on removal."""
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlat)
+
+def stores_full_vectors(index):
+    """True if the index keeps float32 vectors, so reconstruct() returns them unchanged (not PQ)."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return ivf.code_size == ivf.d * 4
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return isinstance(faiss.downcast_index(index.storage), faiss.IndexFlat)
+    return isinstance(index, faiss.IndexFlat)
+
+def category_sub_index(index, rows, vectors=None):
+    """Exact inner-product index over `rows` of `index`, or None to search `index` restricted to them.
+
+    Searching an approximate index with a row selector still only visits
+    nprobe lists or ef_search graph nodes, so a small category comes back
+    short. Full-vector indexes are therefore copied exactly, and PQ indexes
+    are copied from their decoded vectors up to EXACT_CATEGORY_ROWS rows.
+    Pass `vectors` (all rows, normalised) to skip reconstruction.
+    """
+    if not stores_full_vectors(index) and len(rows) > EXACT_CATEGORY_ROWS:
+        return None
+    rows = np.asarray(rows, dtype=np.int64)
+    if vectors is None:
+        vectors = index.reconstruct_batch(rows) if len(rows) else np.zeros((0, index.d), dtype=np.float32)
+        faiss.normalize_L2(vectors)
+    else:
+        vectors = vectors[rows]
+    sub_index = faiss.IndexFlatIP(index.d)
+    sub_index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    return sub_index
+
+def restricted_search_params(index, rows):
+    """Search parameters limiting an index to `rows`, keeping its ef_search / nprobe.
+
+    The returned object holds the selector, so keep it alive for the search call.
+    """
+    selector = faiss.IDSelectorBatch(np.asarray(rows, dtype=np.int64))
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    elif isinstance(faiss.downcast_index(index), faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=faiss.downcast_index(index).hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    params.selector_ref = selector  # SWIG won't keep it alive for us
+    return params
+
+def index_memory(index):
+    """Bytes the index occupies once serialised; close to its in-memory size."""
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+class AnswerCache:
+    """Bounded LRU of finished answers, tied to one catalog version.
+
+    Every lookup passes the version of the catalog it would answer from; when
+    that differs from the version the cached answers were built on (a new index
+    was published), the whole cache is dropped. Entries also expire after
+    `ttl` seconds. Answers are shared between callers, so treat them as read-only.
+    """
+
+    def __init__(self, max_size=5000, ttl=600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()  # key -> (expires_at, answer)
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """Return the cached answer for `key` under `version`, or None on a miss."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]  # Expired
+            self.misses += 1
+            return None
+
+    def put(self, key, version, answer):
+        """Store an answer built from the catalog at `version`."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)  # Evict least recently used
+
+    def stats(self):
+        """Return hit/miss counters and the current size for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+            }
+
+    def clear(self):
+        """Drop all cached answers."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+    def _check_version(self, version):
+        if version == self.version:
+            return
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self.version = version
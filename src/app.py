@@ -1,20 +1,84 @@
-from flask import Flask, request, jsonify, render_template
-from vector_utils import load_embeddings, load_vector_store
+import os
+import threading
+import time
+
+from flask import Flask, Response, g, request, jsonify, render_template
+from instrumentation import (
+    CONTENT_TYPE,
+    METRICS_ENABLED,
+    REQUEST_SECONDS,
+    REQUESTS_TOTAL,
+    STAGE_SECONDS,
+    flush_metrics,
+    get_logger,
+    render_metrics,
+)
+from metadata import retrieve_courses
+from vector_utils import course_text, initialize, readiness, search_courses_batch
 
 # Initialize Flask app and specify the templates folder
 app = Flask(__name__, template_folder='templates')
 
-print("Loading embeddings...")
-embeddings = load_embeddings()
-print("Embeddings loaded.")
+PRELOAD_MODELS = os.environ.get("PRELOAD_MODELS") == "1"  # Set by gunicorn.conf.py
+
+log = get_logger("app")
+
+if PRELOAD_MODELS:
+    # Pre-forking server: load once in the master; workers share it copy-on-write
+    # and warm up after the fork (see gunicorn.conf.py)
+    log.info("Loading model and vector store")
+    initialize(warm=False)
+    log.info("Model and vector store loaded")
+else:
+    # Load in the background so /ready can answer while the model loads
+    threading.Thread(target=initialize, daemon=True).start()
+
+MAX_BATCH_QUERIES = 1000  # Upper bound on queries per /api/search/batch request
+RETRY_AFTER_SECONDS = 5  # Suggested wait for requests that arrive while the model loads
 
-print("Loading vector store...")
-vector_store = load_vector_store(embeddings)
-print("Vector store loaded.")
+if METRICS_ENABLED:
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
 
+    @app.after_request
+    def record_request(response):
+        # Label by route pattern, not raw path, so the number of series stays bounded
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        start = g.get("request_start")
+        if start is not None:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, method=request.method)
+        REQUESTS_TOTAL.inc(route=route, method=request.method, status=response.status_code)
+        flush_metrics()  # No-op unless METRICS_DIR is shared between workers
+        return response
 
-# Create a retriever for similarity search
-retriever = vector_store.as_retriever(search_kwargs={"k": 3})  # Retrieve top 3 documents
+@app.before_request
+def require_ready():
+    """Answer 503 to searches that arrive before the model and index are ready, instead of loading in the request."""
+    searching = request.path in ("/api/chat", "/api/search/batch") or (request.path == "/" and request.method == "POST")
+    if not searching:
+        return None
+    status = readiness()
+    if status["ready"]:
+        return None
+    error = "The course search is starting up; please retry shortly."
+    headers = {"Retry-After": str(RETRY_AFTER_SECONDS)}
+    if request.path == "/":
+        return render_template('index.html', error=error), 503, headers
+    return jsonify(dict(status, error=error)), 503, headers
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint; 404 when METRICS_ENABLED=0."""
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once the model and index are loaded and warmed up, else 503."""
+    status = readiness()
+    return jsonify(status), 200 if status["ready"] else 503
 
 # Root endpoint with a simple HTML form
 @app.route('/', methods=['GET', 'POST'])
@@ -26,22 +90,73 @@ def home():
         if not query:
             return render_template('index.html', error="No query provided")
 
-        # Perform a similarity search using the retriever
-        relevant_docs = retriever.get_relevant_documents(query)
+        # Top 3 courses, answered from the shared cache when the query repeats
+        courses = search_courses_batch([query], k=3, threshold=0.0)
+        if isinstance(courses, str):
+            return render_template('index.html', query=query, error=courses), 503
 
         # Format the results
         results = []
-        for doc in relevant_docs:
+        for course in courses[0]:
             result = {
-                "content": doc.page_content,  # The text content of the relevant document
+                "content": course_text(course),  # The text the course was embedded from
             }
             results.append(result)
 
         # Render the results in the same HTML template
-        return render_template('index.html', query=query, results=results)
+        with STAGE_SECONDS.time(stage="template_render"):
+            return render_template('index.html', query=query, results=results)
 
     # Render the initial form for GET requests
-    return render_template('index.html')
+    with STAGE_SECONDS.time(stage="template_render"):
+        return render_template('index.html')
+
+# JSON endpoint for the chatbot: category listings, course details, price questions, free text
+@app.route('/api/chat', methods=['POST'])
+def chat():
+    """Answer one question: {"query": ...} -> {"query": ..., "answer": ...}."""
+    payload = request.get_json(silent=True) or {}
+    query = payload.get("query") if isinstance(payload, dict) else None
+    if not isinstance(query, str) or not query.strip():
+        return jsonify({"error": "'query' must be a non-empty string"}), 400
+
+    answer = retrieve_courses(query)
+    with STAGE_SECONDS.time(stage="response_format"):
+        return jsonify({"query": query, "answer": answer})
+
+# JSON endpoint for offline jobs that search many queries at once
+@app.route('/api/search/batch', methods=['POST'])
+def search_batch():
+    """Search a batch of queries: {"queries": [...], "category": ..., "k": 5, "threshold": 0.4}."""
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "The request body must be a JSON object"}), 400
+    queries = payload.get("queries")
+
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+        return jsonify({"error": "'queries' must be a non-empty list of query strings"}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
+    category = payload.get("category")
+    if category is not None and not isinstance(category, str):
+        return jsonify({"error": "'category' must be a string"}), 400
+
+    try:
+        k = int(payload.get("k", 5))
+        threshold = float(payload.get("threshold", 0.4))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'k' must be an integer and 'threshold' a number"}), 400
+    if k < 1:
+        return jsonify({"error": "'k' must be at least 1"}), 400
+
+    results = search_courses_batch(queries, category=category, k=k, threshold=threshold)
+    if isinstance(results, str):
+        return jsonify({"error": results}), 503
+
+    with STAGE_SECONDS.time(stage="response_format"):
+        return jsonify({
+            "results": [{"query": query, "courses": courses} for query, courses in zip(queries, results)]
+        })
 
 # Run the Flask app
 if __name__ == '__main__':
@@ -0,0 +1,175 @@
+"""Async serving mode: an ASGI front end with micro-batched embedding and search.
+
+Run with a single event loop per worker, e.g.:
+
+    uvicorn asgi:app --port 5001
+
+Concurrent requests are queued and coalesced by MicroBatcher, so many users share
+one model forward pass and one FAISS search instead of paying for one each.
+"""
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from batching import MicroBatcher
+from vector_utils import course_text, initialize, readiness, search_courses_batch
+
+MAX_BATCH_SIZE = 32  # Queries coalesced into one embedding call
+MAX_WAIT_MS = 5.0  # How long the first query in a batch waits for company
+MAX_BATCH_QUERIES = 1000  # Upper bound on queries per /api/search/batch request
+MAX_BODY_BYTES = 1024 * 1024
+
+templates = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")),
+    autoescape=select_autoescape(["html"]),
+)
+
+batcher = MicroBatcher(search_courses_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS)
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        if not message.get("more_body"):
+            return body
+
+async def send_response(send, status, body, content_type):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def send_json(send, payload, status=200):
+    await send_response(send, status, json.dumps(payload).encode("utf-8"), "application/json")
+
+async def send_html(send, html, status=200):
+    await send_response(send, status, html.encode("utf-8"), "text/html; charset=utf-8")
+
+def parse_payload(body):
+    """Parse a JSON request body, which must be an object."""
+    payload = json.loads(body or b"{}")
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    return payload
+
+def parse_search_params(payload):
+    """Validate category, k and threshold from a JSON payload; returns (category, k, threshold, error)."""
+    category = payload.get("category")
+    if category is not None and not isinstance(category, str):
+        return None, None, None, "'category' must be a string"
+    try:
+        k = int(payload.get("k", 5))
+        threshold = float(payload.get("threshold", 0.4))
+    except (TypeError, ValueError):
+        return None, None, None, "'k' must be an integer and 'threshold' a number"
+    if k < 1:
+        return None, None, None, "'k' must be at least 1"
+    return category, k, threshold, None
+
+async def home(method, body, send):
+    """Same form as the Flask home page, answered through the micro-batcher."""
+    template = templates.get_template("index.html")
+    if method != "POST":
+        return await send_html(send, template.render())
+
+    query = parse_qs(body.decode("utf-8")).get("query", [""])[0]
+    if not query:
+        return await send_html(send, template.render(error="No query provided"))
+
+    courses = await batcher.submit(query, k=3, threshold=0.0)
+    results = [{"content": course_text(course)} for course in courses]
+    await send_html(send, template.render(query=query, results=results))
+
+async def search(body, send):
+    """Search one query: {"query": ..., "category": ..., "k": 5, "threshold": 0.4}."""
+    payload = parse_payload(body)
+    query = payload.get("query")
+    if not isinstance(query, str) or not query.strip():
+        return await send_json(send, {"error": "'query' must be a non-empty string"}, 400)
+
+    category, k, threshold, error = parse_search_params(payload)
+    if error:
+        return await send_json(send, {"error": error}, 400)
+
+    courses = await batcher.submit(query, category, k, threshold)
+    await send_json(send, {"query": query, "courses": courses})
+
+async def search_batch(body, send):
+    """Search a client-side batch directly; it is already one embedding call."""
+    payload = parse_payload(body)
+    queries = payload.get("queries")
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+        return await send_json(send, {"error": "'queries' must be a non-empty list of query strings"}, 400)
+    if len(queries) > MAX_BATCH_QUERIES:
+        return await send_json(send, {"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}, 400)
+
+    category, k, threshold, error = parse_search_params(payload)
+    if error:
+        return await send_json(send, {"error": error}, 400)
+
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(None, search_courses_batch, queries, category, k, threshold)
+    if isinstance(results, str):
+        return await send_json(send, {"error": results}, 503)
+
+    await send_json(send, {
+        "results": [{"query": query, "courses": courses} for query, courses in zip(queries, results)]
+    })
+
+async def ready(body, send):
+    """Readiness probe: 200 once the model and index are loaded and warmed up, else 503."""
+    status = readiness()
+    await send_json(send, status, 200 if status["ready"] else 503)
+
+ROUTES = {
+    ("/ready", "GET"): ready,
+    ("/", "GET"): lambda body, send: home("GET", body, send),
+    ("/", "POST"): lambda body, send: home("POST", body, send),
+    ("/api/search", "POST"): search,
+    ("/api/search/batch", "POST"): search_batch,
+}
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Load the model and index and warm up before accepting traffic
+            await asyncio.get_running_loop().run_in_executor(None, initialize)
+            batcher.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await batcher.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    handler = ROUTES.get((scope["path"], scope["method"]))
+    if handler is None:
+        return await send_json(send, {"error": "Not found"}, 404)
+
+    try:
+        body = await read_body(receive)
+        await handler(body, send)
+    except ValueError as e:  # Includes malformed JSON
+        await send_json(send, {"error": str(e)}, 400)
+    except RuntimeError as e:  # Search failed, e.g. vector store not found
+        await send_json(send, {"error": str(e)}, 503)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, port=5001)
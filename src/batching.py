@@ -0,0 +1,87 @@
+import asyncio
+
+class MicroBatcher:
+    """Coalesce concurrent search requests into micro-batches.
+
+    Requests wait on a queue for at most `max_wait_ms`; everything collected by then
+    (up to `max_batch_size`) goes through one `search_batch` call, which embeds the
+    queries together and runs a single FAISS search. Each caller then gets its own
+    slice of the results back.
+    """
+
+    def __init__(self, search_batch, max_batch_size=32, max_wait_ms=5.0):
+        self.search_batch = search_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._worker = None
+
+    def start(self):
+        """Start the batching loop on the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop; queued requests are cancelled."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            while not self._queue.empty():
+                self._queue.get_nowait()[-1].cancel()
+
+    async def submit(self, query, category=None, k=5, threshold=0.4):
+        """Queue one query and wait for its scored course list."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, category, k, threshold, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch):
+        # Requests with different search parameters can't share a FAISS call
+        groups = {}
+        for query, category, k, threshold, future in batch:
+            try:
+                groups.setdefault((category, k, threshold), []).append((query, future))
+            except TypeError as e:  # Unhashable parameters: fail this request, not the loop
+                if not future.done():
+                    future.set_exception(e)
+
+        loop = asyncio.get_running_loop()
+        for (category, k, threshold), requests in groups.items():
+            queries = [query for query, _ in requests]
+            try:
+                # Run the model and FAISS off the event loop so new requests keep queueing
+                results = await loop.run_in_executor(None, self.search_batch, queries, category, k, threshold)
+            except Exception as e:
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for index, (_, future) in enumerate(requests):
+                if future.done():
+                    continue  # Caller went away
+                if isinstance(results, str):
+                    future.set_exception(RuntimeError(results))
+                else:
+                    future.set_result(results[index])
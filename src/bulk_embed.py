@@ -0,0 +1,191 @@
+"""Chunked, parallel and resumable embedding for full index builds.
+
+Texts are read from any iterable, one chunk at a time, and embedded either in
+this process or across a pool of worker processes that each load the model
+once. Chunks are appended in order to a float32 file in a staging directory.
+Every few chunks the file is synced and a checkpoint records how many rows are
+safely on disk and a hash of each chunk's texts. If a build is interrupted,
+the next build with the same model resumes after the last checkpointed chunk
+that still holds the same texts, instead of starting over.
+"""
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from functools import partial
+
+import numpy as np
+
+from instrumentation import get_logger
+
+CHECKPOINT_FILE = "checkpoint.json"
+VECTORS_FILE = "vectors.f32"
+DEFAULT_CHUNK_SIZE = 2048  # Texts handed to a worker at a time
+DEFAULT_BATCH_SIZE = 64  # Texts per model call
+DEFAULT_CHECKPOINT_EVERY = 5  # Chunks between checkpoints
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "EMBEDDING_THREADS"]  # PyTorch/OpenMP and onnxruntime thread counts
+
+log = get_logger("bulk_embed")
+
+_worker_embed = None
+
+def _init_worker(load_model, backend, threads):
+    """Pool initializer: load the model once per worker, on its share of the cores."""
+    global _worker_embed
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_embed = load_model(backend).embed_documents
+
+def embed_chunk(texts, batch_size, embed=None):
+    """Embed one chunk in batches of `batch_size`; uses the worker's model unless `embed` is given."""
+    embed = embed or _worker_embed
+    batches = [
+        np.asarray(embed(texts[start:start + batch_size]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size)
+    ]
+    return np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+def _chunks(texts, chunk_size):
+    iterator = iter(texts)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _chunk_hash(chunk):
+    return hashlib.sha1(json.dumps(chunk).encode("utf-8")).hexdigest()
+
+def _load_checkpoint(staging_dir):
+    try:
+        with open(os.path.join(staging_dir, CHECKPOINT_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def _save_checkpoint(staging_dir, checkpoint):
+    path = os.path.join(staging_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file)
+    os.replace(path + ".tmp", path)
+
+def embed_texts(
+    texts, fingerprint, model_id, staging_dir, embed=None, load_model=None, backend=None, workers=0,
+    batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE, checkpoint_every=DEFAULT_CHECKPOINT_EVERY,
+):
+    """Embed `texts` (any iterable, read once) into an (n, dim) float32 array, resuming an interrupted run.
+
+    Only one chunk of texts is held at a time; the vectors are returned in
+    memory. `fingerprint` identifies anything besides the texts that makes a
+    checkpoint unusable (None if nothing) and `model_id` the model. Checkpointed
+    chunks are reused while their texts match, in order. With `workers`,
+    chunks are embedded by that many processes, each loading
+    `load_model(backend)`. Otherwise `embed(texts)` runs here. The staging
+    directory is left in place; remove it once the vectors are saved.
+    """
+    total = len(texts) if hasattr(texts, "__len__") else None  # Only for progress logs
+    checkpoint = _load_checkpoint(staging_dir)
+    vectors_path = os.path.join(staging_dir, VECTORS_FILE)
+    chunks = _chunks(texts, chunk_size)
+    chunk_hashes = []
+    done, dim = 0, None
+    if (
+        checkpoint and checkpoint.get("fingerprint") == fingerprint and checkpoint["model"] == model_id
+        and checkpoint.get("chunk_size") == chunk_size and os.path.exists(vectors_path)
+    ):
+        # Skip the leading chunks that were embedded from the same texts
+        saved_hashes = checkpoint["chunks"]
+        pending = None
+        for chunk in chunks:
+            if len(chunk_hashes) < len(saved_hashes) and _chunk_hash(chunk) == saved_hashes[len(chunk_hashes)]:
+                chunk_hashes.append(saved_hashes[len(chunk_hashes)])
+                done += len(chunk)
+            else:
+                pending = chunk
+                break
+        chunks = itertools.chain([pending] if pending else [], chunks)
+        if chunk_hashes:
+            dim = checkpoint["dim"]
+        with open(vectors_path, "r+b") as file:
+            file.truncate(done * (dim or 0) * 4)  # Drop rows written after the last checkpoint, or for other texts
+        if done:
+            log.info(f"Resuming embedding after {done} texts.", extra={"fields": {"rows": done}})
+    else:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        open(vectors_path, "wb").close()
+
+    def hashed(chunks):
+        for chunk in chunks:
+            chunk_hashes.append(_chunk_hash(chunk))
+            yield chunk
+
+    pool = None
+    if workers:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        # Workers read these when they import the model code, before the initializer runs
+        saved_env = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+        os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+        try:
+            pool = multiprocessing.get_context("spawn").Pool(
+                workers, initializer=_init_worker, initargs=(load_model, backend, threads)
+            )
+        finally:
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        results = pool.imap(partial(embed_chunk, batch_size=batch_size), hashed(chunks))  # In order
+    else:
+        results = (embed_chunk(chunk, batch_size, embed) for chunk in hashed(chunks))
+
+    start_time, start_rows, since_checkpoint = time.perf_counter(), done, 0
+    written = len(chunk_hashes)  # Chunks on disk; chunk_hashes can run ahead while workers are busy
+    try:
+        with open(vectors_path, "ab") as file:
+            for vectors in results:
+                dim = vectors.shape[1]
+                file.write(vectors.tobytes())
+                done += len(vectors)
+                written += 1
+                since_checkpoint += 1
+                if since_checkpoint >= checkpoint_every:
+                    _sync(file, staging_dir, {
+                        "fingerprint": fingerprint, "model": model_id, "chunk_size": chunk_size, "rows": done,
+                        "dim": dim, "chunks": chunk_hashes[:written],
+                    })
+                    since_checkpoint = 0
+
+                    rate = (done - start_rows) / max(time.perf_counter() - start_time, 1e-9)
+                    progress = f"{done}/{total}" if total is not None else str(done)
+                    eta = f", about {(total - done) / rate:.0f}s left" if total is not None and rate else ""
+                    log.info(
+                        f"Embedded {progress} texts ({rate:.0f}/s{eta}).",
+                        extra={"fields": {"rows": done, "total": total, "texts_per_second": rate}},
+                    )
+            if since_checkpoint:
+                _sync(file, staging_dir, {
+                    "fingerprint": fingerprint, "model": model_id, "chunk_size": chunk_size, "rows": done,
+                    "dim": dim, "chunks": chunk_hashes[:written],
+                })
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    if not done:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.fromfile(vectors_path, dtype=np.float32).reshape(done, dim)
+
+def _sync(file, staging_dir, checkpoint):
+    file.flush()
+    os.fsync(file.fileno())
+    _save_checkpoint(staging_dir, checkpoint)
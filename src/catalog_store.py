@@ -0,0 +1,139 @@
+import json
+import os
+import shutil
+from collections.abc import Sequence
+
+import numpy as np
+
+from instrumentation import get_logger
+
+COLUMNS_FILE = "columns.json"
+NUMERIC_COLUMNS = {
+    "price_per_session": np.int32,
+    "number_of_lessons": np.int32,
+    "total_price": np.int64,
+}
+STRING_COLUMNS = ["title", "description"]
+
+log = get_logger("catalog_store")
+
+def parse_price(price_per_session):
+    """Turn "$30 per session" (or a plain number) into the integer price."""
+    if isinstance(price_per_session, (int, float)):
+        return int(price_per_session)
+    return int(price_per_session.strip().lstrip("$").split()[0])
+
+def format_price(price):
+    return f"${price} per session"
+
+def write_catalog(courses, path):
+    """Write courses as fixed-width numeric columns plus offset-indexed string blobs.
+
+    Row i of every column belongs to the course at FAISS vector position i.
+    The catalog is built next to `path` and swapped in with two renames, so a
+    reader finds the old catalog, the new one or, between the renames, none at
+    all, but never a partial one. The index build writes it into a fresh version
+    directory, which only becomes visible when the CURRENT pointer is replaced.
+    """
+    courses = list(courses)
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = {name: np.zeros(len(courses), dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    categories = []
+    category_codes = {}
+    codes = np.zeros(len(courses), dtype=np.int16)
+    for row, course in enumerate(courses):
+        columns["price_per_session"][row] = parse_price(course["price_per_session"])
+        columns["number_of_lessons"][row] = course["number_of_lessons"]
+        columns["total_price"][row] = course["total_price"]
+        category = course["course_category"]
+        if category not in category_codes:
+            category_codes[category] = len(categories)
+            categories.append(category)
+        codes[row] = category_codes[category]
+
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), values)
+    np.save(os.path.join(tmp_path, "course_category.npy"), codes)
+
+    for name in STRING_COLUMNS:
+        offsets = np.zeros(len(courses) + 1, dtype=np.int64)
+        with open(os.path.join(tmp_path, f"{name}.bin"), "wb") as blob:
+            for row, course in enumerate(courses):
+                encoded = course[name].encode("utf-8")
+                blob.write(encoded)
+                offsets[row + 1] = offsets[row] + len(encoded)
+        np.save(os.path.join(tmp_path, f"{name}.offsets.npy"), offsets)
+
+    with open(os.path.join(tmp_path, COLUMNS_FILE), "w", encoding="utf-8") as file:
+        json.dump({"count": len(courses), "categories": categories}, file)
+
+    # Swap directories; open memory maps of the old catalog stay valid
+    old_path = path + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+class ColumnarCatalog(Sequence):
+    """Read-only, memory-mapped course catalog; rows are course dicts built on access."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, COLUMNS_FILE), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        self.count = meta["count"]
+        self.categories = meta["categories"]
+
+        self.columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in NUMERIC_COLUMNS
+        }
+        self.category_codes = np.load(os.path.join(path, "course_category.npy"), mmap_mode="r")
+
+        self.offsets = {}
+        self.blobs = {}
+        for name in STRING_COLUMNS:
+            self.offsets[name] = np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode="r")
+            blob_path = os.path.join(path, f"{name}.bin")
+            # numpy can't map an empty file, e.g. when every description is empty
+            self.blobs[name] = np.memmap(blob_path, dtype=np.uint8, mode="r") if os.path.getsize(blob_path) else b""
+
+    def __len__(self):
+        return self.count
+
+    def text(self, name, row):
+        """Decode one string field without materialising the rest of the row."""
+        start, end = self.offsets[name][row], self.offsets[name][row + 1]
+        return bytes(self.blobs[name][start:end]).decode("utf-8")
+
+    def category(self, row):
+        return self.categories[self.category_codes[row]]
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self.count))]
+        if row < 0:
+            row += self.count
+        if not 0 <= row < self.count:
+            raise IndexError("catalog row out of range")
+
+        return {
+            "title": self.text("title", row),
+            "description": self.text("description", row),
+            "price_per_session": format_price(int(self.columns["price_per_session"][row])),
+            "number_of_lessons": int(self.columns["number_of_lessons"][row]),
+            "total_price": int(self.columns["total_price"][row]),
+            "course_category": self.category(row),
+        }
+
+def load_catalog(path):
+    """Open the columnar catalog at `path`, or return None if there isn't one."""
+    if not os.path.exists(os.path.join(path, COLUMNS_FILE)):
+        return None
+    try:
+        return ColumnarCatalog(path)
+    except (OSError, ValueError, KeyError) as e:
+        log.error(f"Error loading columnar catalog: {e}")
+        return None
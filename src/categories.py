@@ -0,0 +1,89 @@
+import re
+
+# Category keyword table, checked in order: the first category with a matching
+# keyword wins. Keywords match whole words only, so "java" skips "javascript"
+# and "ai" skips "maintain".
+CATEGORY_KEYWORDS = [
+    ("Python", ["python"]),
+    ("Java", ["java"]),
+    ("Cloud Computing", ["aws", "cloud"]),
+    ("AI", ["ai", "artificial intelligence", "chatgpt", "machine learning"]),
+    ("Game Development", ["game development", "unity", "scratch", "minecraft", "roblox"]),
+    ("Web Development", ["javascript", "node", "html", "css", "web development"]),
+    ("Mobile Development", ["mobile development"]),
+    ("Robotics", ["robotics"]),
+]
+
+DEFAULT_CATEGORY = "Other Programming"  # For courses no keyword matches
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+class KeywordMatcher:
+    """Whole-word keyword classifier, compiled once from a keyword table.
+
+    The text is split into words in one regex pass and intersected with the set
+    of keyword words; only multi-word keywords whose first word appears are then
+    checked in place.
+    """
+
+    def __init__(self, table):
+        self.categories = [category for category, _ in table]
+        self.single = {}    # word -> category priority
+        self.phrases = {}   # first word -> [(word tuple, priority)]
+        for priority, (_, keywords) in enumerate(table):
+            for keyword in keywords:
+                words = tuple(WORD_PATTERN.findall(keyword.lower()))
+                if len(words) == 1:
+                    self.single.setdefault(words[0], priority)
+                else:
+                    self.phrases.setdefault(words[0], []).append((words, priority))
+        self.triggers = frozenset(self.single) | frozenset(self.phrases)
+
+    def match(self, text, allowed=None):
+        """Return the highest-priority category mentioned in the text, or None.
+
+        `allowed` optionally restricts the result to a set of lowercase category names.
+        """
+        words = WORD_PATTERN.findall(text.lower())
+        found = self.triggers.intersection(words)
+        if not found:
+            return None
+
+        best = None
+        for word in found:
+            priority = self.single.get(word)
+            if priority is not None and self._allowed(priority, allowed) and (best is None or priority < best):
+                best = priority
+            for phrase, priority in self.phrases.get(word, ()):
+                if (best is None or priority < best) and self._allowed(priority, allowed) and self._contains(words, phrase):
+                    best = priority
+        return None if best is None else self.categories[best]
+
+    def _allowed(self, priority, allowed):
+        return allowed is None or self.categories[priority].lower() in allowed
+
+    @staticmethod
+    def _contains(words, phrase):
+        start = 0
+        while True:
+            try:
+                start = words.index(phrase[0], start)
+            except ValueError:
+                return False
+            if tuple(words[start:start + len(phrase)]) == phrase:
+                return True
+            start += 1
+
+    def categorize(self, title, description):
+        """Categorise a course, letting keywords in the title outrank the description."""
+        return self.match(title) or self.match(description) or DEFAULT_CATEGORY
+
+def _with_category_names(table):
+    # Queries may name a category directly ("cloud computing courses")
+    return [(category, [category] + keywords) for category, keywords in table] + [
+        (DEFAULT_CATEGORY, [DEFAULT_CATEGORY])
+    ]
+
+# Shared matchers: course text at ingest time, user queries at query time
+course_matcher = KeywordMatcher(CATEGORY_KEYWORDS)
+query_matcher = KeywordMatcher(_with_category_names(CATEGORY_KEYWORDS))
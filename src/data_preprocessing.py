@@ -1,100 +1,138 @@
 import json
+import os
 import re
+from categories import course_matcher
 
 def categorize_course(title, description):
-    """Categorize course based on simple keyword matching."""
-    categories = {
-        "Python": ["python"],
-        "Java": ["java"],
-        "Cloud Computing": ["aws", "cloud"],
-        "AI": ["ai", "artificial intelligence", "chatgpt", "machine learning"],
-        "Game Development": ["game development", "unity", "scratch", "minecraft", "roblox"],
-        "Web Development": ["javascript", "node", "html", "css", "web development"],
-        "Mobile Development": ["mobile development"],
-        "Robotics": ["robotics"],
-        "Other Programming": []  # Placeholder for uncategorized courses
+    """Categorize course based on whole-word keyword matching."""
+    return course_matcher.categorize(title, description)
+
+COURSE_PATTERN = re.compile(
+    r'\$(\d+)\s*per session\s*(.*?)\s*(\d+)\s*Lessons\s*View Details',
+    re.DOTALL
+)
+CARD_START_PATTERN = re.compile(r'\$\d+\s*per session')
+
+COURSES_STREAM_PATH = "processed_courses.jsonl"  # Newline-delimited JSON, one course per line
+MAX_CARD_CHARS = 100000  # An unfinished course card longer than this is dropped
+CHUNK_SIZE = 1 << 16
+
+def parse_course(match):
+    """Structure one matched course card (price, content, lessons) into a course dict."""
+    price_per_session = int(match[0])  # Convert price to integer
+    content = match[1].strip()
+    number_of_lessons = int(match[2])  # Convert lessons to int for calculation
+
+    # Extract title and description
+    if ":" in content:
+        title, description = content.split(":", 1)
+    elif "\n" in content:
+        title, description = content.split("\n", 1)
+    else:
+        words = content.split()
+        if len(words) > 5:
+            title = " ".join(words[:5])
+            description = " ".join(words[5:])
+        else:
+            title = content
+            description = ""
+
+    title = title.strip()
+    description = description.strip()
+
+    # Calculate total price as integer
+    total_price = price_per_session * number_of_lessons
+
+    # Categorize course
+    course_category = categorize_course(title, description)
+
+    # Store course details
+    course = {
+        "title": title,
+        "description": description,
+        "price_per_session": f"${price_per_session} per session",
+        "number_of_lessons": number_of_lessons,
+        "total_price": total_price,  # Store as integer
+        "course_category": course_category
     }
-
-    lower_title = title.lower()
-    lower_desc = description.lower()
-
-    for category, keywords in categories.items():
-        if any(keyword in lower_title or keyword in lower_desc for keyword in keywords):
-            return category
-    
-    return "Other Programming"  # Ensure uncategorized courses are assigned here
+    return course
+
+def iter_courses(html_chunks):
+    """Yield courses one at a time from one HTML document delivered as text chunks.
+
+    Only the text after the last complete course card is carried between chunks,
+    so memory stays flat however large the document is.
+    """
+    buffer = ""
+    for chunk in html_chunks:
+        buffer += chunk
+        end = 0
+        for match in COURSE_PATTERN.finditer(buffer):
+            yield parse_course(match.groups())
+            end = match.end()
+        buffer = buffer[end:]
+
+        # Keep only the text from where the next course card starts
+        start = CARD_START_PATTERN.search(buffer)
+        if start is None:
+            buffer = buffer[-64:]  # Enough for a card start split across chunks
+        elif len(buffer) - start.start() > MAX_CARD_CHARS:
+            next_start = CARD_START_PATTERN.search(buffer, start.end())
+            buffer = buffer[next_start.start():] if next_start else buffer[-64:]
+        else:
+            buffer = buffer[start.start():]
+
+def iter_courses_from_pages(pages):
+    """Yield courses from many HTML documents, each a string or an iterable of chunks."""
+    for page in pages:
+        yield from iter_courses([page] if isinstance(page, str) else page)
+
+def read_html_chunks(path, chunk_size=CHUNK_SIZE):
+    """Stream a saved HTML page from disk in fixed-size chunks."""
+    with open(path, "r", encoding="utf-8") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+def write_courses_ndjson(courses, path=COURSES_STREAM_PATH):
+    """Write courses as newline-delimited JSON while they are produced; returns the count."""
+    tmp_path = path + ".tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        for course in courses:
+            file.write(json.dumps(course) + "\n")
+            count += 1
+    os.replace(tmp_path, path)  # Readers never see a half-written file
+    return count
+
+def read_courses_ndjson(path=COURSES_STREAM_PATH):
+    """Stream courses back from a newline-delimited JSON file."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
 
 def preprocess_data(html_content):
     """Extract course details from HTML and structure them into JSON format."""
-    pattern = re.compile(
-        r'\$(\d+)\s*per session\s*(.*?)\s*(\d+)\s*Lessons\s*View Details',
-        re.DOTALL
-    )
-
-    matches = pattern.findall(html_content)
-    courses = []
-
-    for match in matches:
-        price_per_session = int(match[0])  # Convert price to integer
-        content = match[1].strip()
-        number_of_lessons = int(match[2])  # Convert lessons to int for calculation
-
-        # Extract title and description
-        if ":" in content:
-            title, description = content.split(":", 1)
-        elif "\n" in content:
-            title, description = content.split("\n", 1)
-        else:
-            words = content.split()
-            if len(words) > 5:
-                title = " ".join(words[:5])
-                description = " ".join(words[5:])
-            else:
-                title = content
-                description = ""
-
-        title = title.strip()
-        description = description.strip()
-
-        # Calculate total price as integer
-        total_price = price_per_session * number_of_lessons
-
-        # Categorize course
-        course_category = categorize_course(title, description)
-
-        # Store course details
-        course = {
-            "title": title,
-            "description": description,
-            "price_per_session": f"${price_per_session} per session",
-            "number_of_lessons": number_of_lessons,
-            "total_price": total_price,  # Store as integer
-            "course_category": course_category
-        }
-        courses.append(course)
-
-    return courses
+    return list(iter_courses([html_content]))
 
 if __name__ == '__main__':
     try:
-        with open("scraped_content.html", "r", encoding="utf-8") as file:
-            html_content = file.read()
-
-        if not html_content.strip():
+        if os.path.getsize("scraped_content.html") == 0:
             print(" Error: scraped_content.html is empty!")
             exit()
 
-        processed_courses = preprocess_data(html_content)
+        # Stream courses from the page straight into the NDJSON file
+        courses = iter_courses(read_html_chunks("scraped_content.html"))
+        count = write_courses_ndjson(courses)
 
-        if not processed_courses:
+        if not count:
             print(" Error: No courses extracted!")
             exit()
 
-        # Save processed courses to JSON
-        with open("processed_courses.json", "w", encoding="utf-8") as json_file:
-            json.dump(processed_courses, json_file, indent=4)
-
-        print(f" Processed {len(processed_courses)} courses and saved to 'processed_courses.json'.")
+        print(f" Processed {count} courses and saved to '{COURSES_STREAM_PATH}'.")
 
     except FileNotFoundError:
         print(" Error: scraped_content.html not found! Run scraper.py first.")
@@ -0,0 +1,281 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+from instrumentation import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, so give each process its own cache directory
+    fcntl = None
+
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.f32"
+TAGS_FILE = "tags.u64"  # Hash of the key stored in each row, checked on read
+NEXT_SLOT_FILE = "next_slot.u64"  # Ring buffer position, shared by every process using the directory
+LOCK_FILE = "lock"
+
+log = get_logger("embedding_cache")
+
+def _key_tag(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+def normalize_key(query, category=None):
+    """Build a cache key from the lowercased, whitespace-collapsed category and query."""
+    category_text = " ".join((category or "").lower().split())
+    query_text = " ".join(query.lower().split())
+    return f"{category_text}\n{query_text}"
+
+class EmbeddingCache:
+    """Bounded LRU of query embeddings with an optional memory-mapped on-disk store.
+
+    The disk store is a fixed-size float32 array plus a JSON key index, reused as a
+    ring buffer once full. The index is tagged with the model name, so switching
+    models starts a fresh cache instead of serving stale vectors, and each row keeps
+    a hash of its key so a row overwritten after the last flush is never misread.
+
+    Several processes (e.g. gunicorn workers) can share one directory: rows are
+    allocated from a shared ring position and written under a file lock, and
+    each flush merges the other processes' keys into the index.
+    """
+
+    def __init__(self, model_name, max_size=10000, path=None, disk_capacity=100000, flush_every=100):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.path = path
+        self.disk_capacity = disk_capacity
+        self.flush_every = flush_every
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # On-disk state, opened lazily once the embedding size is known
+        self._slots = {}       # key -> row in the vectors file
+        self._slot_keys = {}   # row -> key, to evict a key when its row is reused
+        self._dim = None
+        self._vectors = None
+        self._tags = None
+        self._next_slot = None  # One-element memory map
+        self._unflushed = 0
+        self._lock_file = None
+        self._lock_pid = None
+
+        if path:
+            self._load_index()
+            atexit.register(self.flush)
+
+    def get(self, key):
+        """Return the cached embedding for `key`, or None on a miss."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector.copy()  # Callers may modify it
+
+            slot = self._slots.get(key)
+            if slot is not None:
+                with self._disk_lock():  # No other process is rewriting the row meanwhile
+                    vector = None
+                    if self._open_vectors() and self._tags[slot] == _key_tag(key):
+                        vector = np.array(self._vectors[slot])  # Copy out of the memory map
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vector.copy()
+
+            self.misses += 1
+            return None
+
+    def put(self, key, vector):
+        """Store an embedding in memory and, if enabled, on disk."""
+        vector = np.array(vector, dtype=np.float32)  # A copy the caller can't modify
+        with self._lock:
+            self._remember(key, vector)
+            if self.path:
+                self._write_disk(key, vector)
+
+    def stats(self):
+        """Return hit/miss counters and current sizes for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._memory),
+                "max_size": self.max_size,
+                "disk_size": len(self._slots),
+            }
+
+    def clear(self):
+        """Drop all cached embeddings, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            if self.path:
+                with self._disk_lock():
+                    self._reset_disk()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def flush(self):
+        """Write the on-disk key index so cached vectors survive a restart."""
+        with self._lock:
+            if self.path:
+                with self._disk_lock():
+                    self._flush_index()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)  # Evict least recently used
+
+    @contextmanager
+    def _disk_lock(self):
+        """Hold the directory's file lock, which other processes using the cache also take."""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_pid != os.getpid():
+            # A forked child shares the parent's open file, and with it the lock: open its own
+            os.makedirs(self.path, exist_ok=True)
+            self._lock_file = open(os.path.join(self.path, LOCK_FILE), "a+")
+            self._lock_pid = os.getpid()
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.path, META_FILE), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _load_index(self):
+        with self._disk_lock():
+            meta = self._read_meta()
+            if meta is None:
+                return
+            if meta.get("model") != self.model_name or meta.get("capacity") != self.disk_capacity:
+                log.warning(f"Embedding cache at '{self.path}' was built for another model or size; starting fresh.")
+                self._reset_disk()
+                return
+
+            self._dim = meta["dim"]
+            self._slots = meta["slots"]
+            self._slot_keys = {slot: key for key, slot in self._slots.items()}
+
+    def _open_vectors(self):
+        """Map the store if it exists; the caller holds the directory lock."""
+        if self._vectors is not None:
+            return True
+        meta = self._read_meta()  # Written as soon as a process creates the files
+        if meta is None or meta.get("model") != self.model_name or meta.get("capacity") != self.disk_capacity:
+            return False
+        vectors_path, tags_path, next_slot_path = (
+            os.path.join(self.path, name) for name in (VECTORS_FILE, TAGS_FILE, NEXT_SLOT_FILE)
+        )
+        if not os.path.exists(vectors_path) or not os.path.exists(tags_path):
+            return False
+        if not os.path.exists(next_slot_path):
+            # Saved before the ring position was shared: it was kept in the index
+            np.array([meta.get("next_slot", 0)], dtype=np.uint64).tofile(next_slot_path)
+
+        self._dim = meta["dim"]
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(self.disk_capacity, self._dim))
+        self._tags = np.memmap(tags_path, dtype=np.uint64, mode="r+", shape=(self.disk_capacity,))
+        self._next_slot = np.memmap(next_slot_path, dtype=np.uint64, mode="r+", shape=(1,))
+        return True
+
+    def _create_files(self, dim):
+        """Create the store and publish its size; the caller holds the directory lock."""
+        os.makedirs(self.path, exist_ok=True)
+        self._dim = dim
+        self._vectors = np.memmap(
+            os.path.join(self.path, VECTORS_FILE), dtype=np.float32, mode="w+", shape=(self.disk_capacity, dim)
+        )
+        self._tags = np.memmap(
+            os.path.join(self.path, TAGS_FILE), dtype=np.uint64, mode="w+", shape=(self.disk_capacity,)
+        )
+        self._next_slot = np.memmap(os.path.join(self.path, NEXT_SLOT_FILE), dtype=np.uint64, mode="w+", shape=(1,))
+        self._write_meta({})
+
+    def _write_disk(self, key, vector):
+        with self._disk_lock():
+            if not self._open_vectors():
+                self._create_files(vector.shape[0])
+
+            tag = _key_tag(key)
+            slot = self._slots.get(key)
+            if slot is None or self._tags[slot] != tag:
+                if slot is not None:
+                    del self._slots[key], self._slot_keys[slot]  # Another process reused the row
+                # Allocate from the shared ring position, so no two processes write the same row
+                slot = int(self._next_slot[0])
+                self._next_slot[0] = (slot + 1) % self.disk_capacity
+                old_key = self._slot_keys.pop(slot, None)
+                if old_key is not None:
+                    del self._slots[old_key]  # Oldest entry's row is reused
+                self._slots[key] = slot
+                self._slot_keys[slot] = key
+
+            self._vectors[slot] = vector
+            self._tags[slot] = tag
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self._flush_index()
+
+    def _flush_index(self):
+        """Flush rows and write the key index; the caller holds the directory lock."""
+        if self._dim is None or not self._unflushed or not self._open_vectors():
+            return
+        self._vectors.flush()
+        self._tags.flush()
+        self._next_slot.flush()
+
+        # Merge in keys other processes flushed, keeping only rows that still hold their key
+        slots = dict((self._read_meta() or {}).get("slots", {}))
+        slots.update(self._slots)
+        self._slots = {key: slot for key, slot in slots.items() if self._tags[slot] == _key_tag(key)}
+        self._slot_keys = {slot: key for key, slot in self._slots.items()}
+        self._write_meta(self._slots)
+        self._unflushed = 0
+
+    def _write_meta(self, slots):
+        meta = {"model": self.model_name, "dim": self._dim, "capacity": self.disk_capacity, "slots": slots}
+        meta_path = os.path.join(self.path, META_FILE)
+        tmp_path = meta_path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, meta_path)
+
+    def _reset_disk(self):
+        """Delete the store; the caller holds the directory lock."""
+        self._slots = {}
+        self._slot_keys = {}
+        self._dim = None
+        self._vectors = None
+        self._tags = None
+        self._next_slot = None
+        self._unflushed = 0
+        for name in (META_FILE, VECTORS_FILE, TAGS_FILE, NEXT_SLOT_FILE):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
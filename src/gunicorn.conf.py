@@ -0,0 +1,43 @@
+"""gunicorn settings for preload-and-fork serving of the Flask app:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The master imports app.py once, loading the embedding model and the index, then
+forks the workers, which share those pages copy-on-write instead of loading N
+copies. Each worker warms up after the fork.
+
+Every worker writes its metrics to METRICS_DIR, so /metrics answers with the
+totals of all workers whichever one serves the scrape.
+"""
+import gc
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault("PRELOAD_MODELS", "1")  # Read by app.py when the master imports it
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"course-metrics-{os.getpid()}"))
+
+bind = os.environ.get("BIND", "0.0.0.0:5001")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+preload_app = True
+timeout = 120
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach: a collection in a
+    # worker would otherwise write to every object header and copy the shared pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    from instrumentation import reset_metrics
+    from vector_utils import warm_up
+
+    reset_metrics()  # Whatever the master recorded while loading would be counted once per worker
+    warm_up()
+
+def worker_exit(server, worker):
+    from instrumentation import flush_metrics
+
+    flush_metrics(force=True)  # Keep the counts of a worker that is restarted
+
+def on_exit(server):
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
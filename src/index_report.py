@@ -0,0 +1,104 @@
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from ann_index import format_index_spec, index_memory, new_index, parse_index_spec
+
+DEFAULT_SPECS = ["flat", "hnsw:m=32,ef_search=64", "ivf:nlist=256,nprobe=16", "ivfpq:nlist=256,nprobe=16,m=16,nbits=8"]
+SYNTHETIC_SIZE = 100000
+QUERY_COUNT = 200
+NOISE = 0.35  # Spread of synthetic vectors around the real course vectors
+REPORT_PATH = "index_report.json"
+
+def catalog_vectors():
+    """Embed the real catalog, plus its titles as stand-in user queries."""
+    from vector_utils import course_text, embeddings, load_course_metadata
+
+    courses = load_course_metadata()
+    if not courses:
+        raise SystemExit("No courses found! Run data_preprocessing.py first.")
+    vectors = np.array(embeddings.embed_documents([course_text(course) for course in courses]), dtype=np.float32)
+    queries = np.array(embeddings.embed_documents([course["title"] for course in courses]), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    faiss.normalize_L2(queries)
+    return vectors, queries
+
+def synthetic_vectors(base, size, query_count, seed=0):
+    """Scale the catalog up by sampling noisy copies of real course vectors."""
+    rng = np.random.default_rng(seed)
+
+    def sample(count):
+        picks = base[rng.integers(len(base), size=count)]
+        vectors = (picks + NOISE * rng.standard_normal(picks.shape) / np.sqrt(base.shape[1])).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    return sample(size), sample(query_count)
+
+def measure(spec, vectors, queries, exact_rows, k):
+    """Build one index and compare it against exact search."""
+    start = time.perf_counter()
+    index = new_index(spec, vectors)
+    index.add(vectors)
+    build_seconds = time.perf_counter() - start
+
+    # One query per call, as the chatbot issues them
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, rows = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        found.append(rows[0])
+
+    hits = sum(len(set(rows) & set(truth)) for rows, truth in zip(found, exact_rows))
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "spec": format_index_spec(spec),
+        f"recall@{k}": hits / (len(queries) * k),
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "build_seconds": build_seconds,
+        "memory_mb": index_memory(index) / 2 ** 20,
+    }
+
+def compare(name, vectors, queries, specs, k):
+    k = min(k, len(vectors))
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, exact_rows = exact.search(queries, k)
+
+    print(f"\n{name}: {len(vectors)} vectors, {len(queries)} queries, k={k}")
+    print(f"{'index':<44}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}{'build s':>9}{'MB':>9}")
+    results = []
+    for spec in specs:
+        result = measure(spec, vectors, queries, exact_rows, k)
+        results.append(result)
+        print(
+            f"{result['spec']:<44}{result[f'recall@{k}']:>8.3f}{result['latency_p50_ms']:>9.3f}"
+            f"{result['latency_p95_ms']:>9.3f}{result['build_seconds']:>9.2f}{result['memory_mb']:>9.1f}"
+        )
+    return {"vectors": len(vectors), "queries": len(queries), "k": k, "results": results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare FAISS index types on the course catalog.")
+    parser.add_argument("specs", nargs="*", default=DEFAULT_SPECS, help="Index specs, e.g. 'hnsw:m=16'")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--synthetic-size", type=int, default=SYNTHETIC_SIZE)
+    parser.add_argument("--queries", type=int, default=QUERY_COUNT)
+    parser.add_argument("--output", default=REPORT_PATH)
+    args = parser.parse_args()
+    specs = [parse_index_spec(spec) for spec in args.specs]  # Fail on a bad spec before embedding
+
+    vectors, queries = catalog_vectors()
+    report = {"catalog": compare("Course catalog", vectors, queries, specs, args.k)}
+    if args.synthetic_size:
+        synthetic, synthetic_queries = synthetic_vectors(vectors, args.synthetic_size, args.queries)
+        report["synthetic"] = compare("Synthetic catalog", synthetic, synthetic_queries, specs, args.k)
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    print(f"\nReport saved to {args.output}")
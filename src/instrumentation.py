@@ -0,0 +1,267 @@
+"""Latency histograms, counters and structured logs for the chatbot's hot path.
+
+Metrics live in this process and are rendered in the Prometheus text format by
+the /metrics endpoint. With METRICS_ENABLED=0 every recording call returns
+immediately, so the instrumentation costs one attribute check.
+
+Under a multi-worker server each worker only sees its own requests. Setting
+METRICS_DIR (gunicorn.conf.py does) makes every process write a snapshot of its
+series there, at most once per METRICS_FLUSH_INTERVAL, and /metrics in any
+worker renders the sum over all of them.
+"""
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_DIR = os.environ.get("METRICS_DIR")  # Shared by the worker processes; unset for a single process
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "1.0"))
+
+REGISTRY = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP_TIMER = _NoopTimer()
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=(), registry=None):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.series = {}  # Label values tuple -> state
+        self.lock = threading.Lock()
+        (REGISTRY if registry is None else registry).append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self, series=None):
+        """Exposition lines for this process's series, or for `series` merged from several processes."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        if series is None:
+            with self.lock:
+                series = dict(self.series)
+        for key, state in sorted(series.items()):
+            lines.extend(self._render_series(key, state))
+        return lines
+
+    def snapshot(self):
+        """[[label values, state], ...] as plain JSON-serialisable lists."""
+        with self.lock:
+            return [[list(key), self._copy(state)] for key, state in self.series.items()]
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def _copy(self, value):
+        return value
+
+    def _combine(self, value, other):
+        return value + other
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        super().__init__(name, help_text, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)  # First bucket whose bound is >= value
+        with self.lock:
+            state = self.series.get(key)
+            if state is None:
+                state = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bucket] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager recording the duration of its block."""
+        return _Timer(self, labels) if METRICS_ENABLED else _NOOP_TIMER
+
+    def _copy(self, state):
+        return [list(state[0]), state[1], state[2]]
+
+    def _combine(self, state, other):
+        return [[a + b for a, b in zip(state[0], other[0])], state[1] + other[1], state[2] + other[2]]
+
+    def _render_series(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+# Hot-path metrics shared by every module
+STAGE_SECONDS = Histogram(
+    "course_stage_seconds",
+    "Time spent in each retrieval stage (embedding, faiss_search, metadata_filter, response_format, ...)",
+    ["stage"],
+)
+BRANCH_SECONDS = Histogram("course_branch_seconds", "retrieve_courses latency by answer branch", ["branch"])
+REQUEST_SECONDS = Histogram("course_request_seconds", "HTTP request latency by route", ["route", "method"])
+REQUESTS_TOTAL = Counter("course_requests_total", "HTTP requests by route and status", ["route", "method", "status"])
+EMBEDDING_CACHE_TOTAL = Counter("course_embedding_cache_total", "Query embedding cache lookups", ["result"])
+ANSWER_CACHE_TOTAL = Counter("course_answer_cache_total", "Answer cache lookups", ["result"])
+SEMANTIC_CACHE_TOTAL = Counter("course_semantic_cache_total", "Near-duplicate query cache lookups", ["result"])
+RETRIEVAL_PATH_TOTAL = Counter("course_retrieval_path_total", "Hybrid searches by path (lexical or hybrid)", ["path"])
+
+_flush_lock = threading.Lock()
+_last_flush = 0.0
+_flush_timer = None
+
+def _snapshot_path():
+    # The pid names the file, so a worker forked from a process that already flushed gets its own
+    return os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+
+def flush_metrics(force=False, registry=None):
+    """Write this process's series to METRICS_DIR.
+
+    Without `force` this writes at most once per METRICS_FLUSH_INTERVAL; a call inside
+    the interval schedules one write at its end, so the last requests of a burst still
+    reach the file.
+    """
+    global _last_flush, _flush_timer
+    if not METRICS_ENABLED or not METRICS_DIR:
+        return
+    with _flush_lock:
+        wait = _last_flush + METRICS_FLUSH_INTERVAL - time.monotonic()
+        if not force and wait > 0:
+            if _flush_timer is None or not _flush_timer.is_alive():  # A forked child never inherits the thread
+                _flush_timer = threading.Timer(wait, flush_metrics, kwargs={"force": True, "registry": registry})
+                _flush_timer.daemon = True
+                _flush_timer.start()
+            return
+        _last_flush = time.monotonic()
+        snapshot = {metric.name: metric.snapshot() for metric in (REGISTRY if registry is None else registry)}
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = _snapshot_path()
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(snapshot, file)
+        os.replace(path + ".tmp", path)
+
+def reset_metrics(registry=None):
+    """Forget every series, e.g. in a freshly forked worker that inherited the master's."""
+    for metric in REGISTRY if registry is None else registry:
+        metric.clear()
+
+def _merged_series(metrics):
+    """Series of `metrics` summed over every process's snapshot in METRICS_DIR."""
+    merged = {metric.name: {} for metric in metrics}
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            continue  # Removed or replaced while listing
+        for metric in metrics:
+            series = merged[metric.name]
+            for key, state in snapshot.get(metric.name, []):
+                key = tuple(key)
+                series[key] = state if key not in series else metric._combine(series[key], state)
+    return merged
+
+def render_metrics(registry=None):
+    """All metrics in `registry` (default: the shared one) in the Prometheus text exposition format.
+
+    With METRICS_DIR set this covers every process that has written a snapshot there,
+    after flushing this one's own series.
+    """
+    metrics = REGISTRY if registry is None else registry
+    merged = {}
+    if METRICS_DIR:
+        flush_metrics(force=True, registry=metrics)
+        merged = _merged_series(metrics)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render(merged.get(metric.name)))
+    return "\n".join(lines) + "\n"
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed as extra={"fields": {...}} become keys."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_log_root = logging.getLogger("courses")
+if not _log_root.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(JsonFormatter())
+    _log_root.addHandler(_handler)
+    _log_root.setLevel(LOG_LEVEL)
+    _log_root.propagate = False
+
+def get_logger(name):
+    """Structured logger for a module, e.g. get_logger("vector_utils")."""
+    return logging.getLogger(f"courses.{name}")
@@ -0,0 +1,172 @@
+"""BM25 keyword retrieval over the same course texts the embedding model sees.
+
+Postings are stored as flat numpy arrays (one slice of row IDs and precomputed
+BM25 weights per term), so scoring a query is a few vectorised additions and
+the saved index can be memory-mapped like the columnar catalog.
+"""
+import json
+import math
+import os
+import re
+import shutil
+from collections import Counter
+
+import numpy as np
+
+from instrumentation import get_logger
+
+META_FILE = "bm25.json"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+[+#]*")  # Keeps "c++" and "c#" whole
+STOPWORDS = frozenset(
+    "a about an and any are as at be by can do for from have how i in is it me my of on or our show "
+    "that the their there this to want what which with you your".split()
+)
+K1 = 1.2
+B = 0.75
+MIN_IDF = 3.0  # Fast path needs a term in under ~5% of courses, e.g. "roblox", not "courses"
+MIN_COVERAGE = 0.9  # Share of the query's IDF weight the top course must match
+
+log = get_logger("lexical_index")
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def idf(doc_freq, count):
+    """BM25 inverse document frequency, kept positive for very common terms."""
+    return math.log(1 + (count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+class LexicalIndex:
+    """BM25 over course texts, one document per catalog row."""
+
+    def __init__(self, terms, idfs, offsets, doc_ids, weights, count):
+        self.terms = terms  # term -> term ID
+        self.idfs = idfs
+        self.offsets = offsets  # Postings of term t are doc_ids/weights[offsets[t]:offsets[t + 1]]
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def postings(self, term_id):
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+    def search(self, query, k=10, rows=None):
+        """Return ([(row, score), ...] best-first, confident) for a query.
+
+        `rows` restricts the search to those catalog rows (e.g. one category).
+        `confident` is True when the top course matches nearly all of the query's
+        known-term weight, including at least one rare term, so the keyword result can
+        be served without a dense search.
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        term_ids = [self.terms.get(term) for term in query_terms]
+        if not any(term_id is not None for term_id in term_ids):
+            return [], False
+
+        scores = np.zeros(self.count, dtype=np.float32)
+        for term_id in term_ids:
+            if term_id is not None:
+                docs, weights = self.postings(term_id)
+                scores[docs] += weights  # Row IDs within one posting list are unique
+
+        if rows is not None:
+            candidates = np.asarray(rows, dtype=np.int64)
+            candidate_scores = scores[candidates]
+        else:
+            candidates, candidate_scores = None, scores
+        matched = np.flatnonzero(candidate_scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-candidate_scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-candidate_scores[matched], kind="stable")]
+        hits = [
+            (int(row if candidates is None else candidates[row]), float(candidate_scores[row])) for row in matched
+        ]
+        return hits, bool(hits) and self._confident(term_ids, hits[0][0])
+
+    def _confident(self, term_ids, row):
+        # Terms no course contains ("courses" in a catalog that never says it) can't
+        # be matched by either retriever, so they don't count against coverage
+        total = matched = rarest = 0.0
+        for term_id in term_ids:
+            if term_id is None:
+                continue
+            term_idf = float(self.idfs[term_id])
+            total += term_idf
+            docs, _ = self.postings(term_id)
+            position = np.searchsorted(docs, row)
+            if position < len(docs) and docs[position] == row:
+                matched += term_idf
+                rarest = max(rarest, term_idf)
+        return rarest >= MIN_IDF and matched >= MIN_COVERAGE * total
+
+def build_lexical_index(texts):
+    """Tokenise texts (one per catalog row) into a BM25 index."""
+    postings = {}
+    doc_lengths = []
+    for row, text in enumerate(texts):
+        counts = Counter(tokenize(text))
+        doc_lengths.append(sum(counts.values()))
+        for term, term_freq in counts.items():
+            postings.setdefault(term, []).append((row, term_freq))
+
+    count = len(doc_lengths)
+    doc_lengths = np.array(doc_lengths, dtype=np.float32)
+    length_norm = 1 - B + B * doc_lengths / max(float(doc_lengths.mean()) if count else 0.0, 1.0)
+
+    terms = {term: term_id for term_id, term in enumerate(sorted(postings))}
+    idfs = np.zeros(len(terms), dtype=np.float32)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    doc_ids = np.zeros(sum(len(entries) for entries in postings.values()), dtype=np.int32)
+    weights = np.zeros(len(doc_ids), dtype=np.float32)
+    for term, term_id in terms.items():
+        entries = np.array(postings[term], dtype=np.int64)  # Rows are already ascending
+        start = offsets[term_id]
+        end = offsets[term_id + 1] = start + len(entries)
+        rows, term_freqs = entries[:, 0], entries[:, 1].astype(np.float32)
+        idfs[term_id] = idf(len(entries), count)
+        doc_ids[start:end] = rows
+        weights[start:end] = idfs[term_id] * term_freqs * (K1 + 1) / (term_freqs + K1 * length_norm[rows])
+    return LexicalIndex(terms, idfs, offsets, doc_ids, weights, count)
+
+def write_lexical_index(index, path):
+    """Save the index as .npy arrays plus a JSON vocabulary, swapped in at `path` like the columnar catalog."""
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    for name in ["idfs", "offsets", "doc_ids", "weights"]:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(index, name))
+    with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as file:
+        json.dump({"count": index.count, "k1": K1, "b": B, "terms": sorted(index.terms, key=index.terms.get)}, file)
+
+    # Swap directories; open memory maps of the old index stay valid
+    old_path = path + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def load_lexical_index(path):
+    """Open the BM25 index at `path` memory-mapped, or return None if there isn't a usable one."""
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        if meta.get("k1") != K1 or meta.get("b") != B:
+            return None  # Weights were computed with other parameters
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ["idfs", "offsets", "doc_ids", "weights"]
+        }
+    except (OSError, ValueError, KeyError) as e:
+        log.error(f"Error loading BM25 index: {e}")
+        return None
+    terms = {term: term_id for term_id, term in enumerate(meta["terms"])}
+    return LexicalIndex(terms, count=meta["count"], **arrays)
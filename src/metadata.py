@@ -1,111 +1,165 @@
-import json
-from vector_utils import search_courses, load_vector_store
+from vector_utils import (
+    HYBRID_CANDIDATES, cached_answer, hybrid_search, hybrid_search_rows, get_catalog, normalize_key, semantic_answer,
+)
+from categories import query_matcher
+from query_engine import parse_structured_query
+from instrumentation import BRANCH_SECONDS, STAGE_SECONDS
+import time
+
+# Minimum cosine similarity for category search results
+CATEGORY_SIMILARITY_THRESHOLD = 0.4
 
 def get_all_categories():
     """Retrieve all unique course categories from FAISS metadata."""
-    vector_store = load_vector_store()
-    if not vector_store:
-        return []  # If FAISS is not loaded, return an empty list
-    
-    categories = set()
-    for doc in vector_store.docstore._dict.values():
-        category = doc.metadata.get("course_category", "").title()
-        if category:
-            categories.add(category)
-    
-    return list(categories)
+    return list(get_catalog().categories)  # Empty if FAISS is not loaded
 
 def detect_category(query):
-    """Match user query to the correct category from FAISS metadata."""
-    all_categories = get_all_categories()
-
-    for category in all_categories:
-        if category.lower() in query.lower():
-            return category  
-
-    return None  
+    """Match user query to a category in FAISS metadata by its name or keywords."""
+    all_categories = {category.lower() for category in get_all_categories()}
+    return query_matcher.match(query, allowed=all_categories)
 
 def load_course_metadata():
-    """Load structured course metadata from processed_courses.json."""
-    try:
-        with open("processed_courses.json", "r", encoding="utf-8") as file:
-            return json.load(file)  # Return structured metadata
-    except FileNotFoundError:
-        print("Error: processed_courses.json not found! Run data_preprocessing.py first.")
-        return []
+    """Return the shared structured course metadata loaded from the processed courses file."""
+    return get_catalog().courses
+
+def format_course_details(course, query):
+    """Answer a question about one course: its price, lessons or description."""
+    if "price" in query.lower() or "cost" in query.lower():
+        return f"Course: {course['title']}\nPrice per session: {course['price_per_session']}\nTotal price: ${course['total_price']}"
+    elif "session" in query.lower() or "lesson" in query.lower():
+        return f"Course: {course['title']}\nNumber of lessons: {course['number_of_lessons']}"
+    else:
+        return f"Course: {course['title']}\nDescription: {course['description']}"
+
+def format_structured_results(courses, structured, category=None):
+    """List courses answering a price or lesson question."""
+    scope = f" in '{category}'" if category else ""
+    if not courses:
+        return f"No courses{scope} match those price or lesson limits."
+
+    if structured.extreme:
+        heading = f"Best match{scope}:" if len(courses) == 1 else f"{len(courses)} courses{scope} tie:"
+    else:
+        heading = f"Found {len(courses)} course(s){scope}:"
+    response = f"\n{heading}\n"
+    for course in courses:
+        response += (
+            f"- {course['title']} ({course['course_category']}): {course['price_per_session']}, "
+            f"{course['number_of_lessons']} lessons, total ${course['total_price']}\n"
+        )
+    return response
 
 def retrieve_courses(query):
     """
     Retrieve courses dynamically with category-based filtering and course description lookup.
     """
-    # Step 1: Load courses from JSON
-    courses = load_course_metadata()
+    start = time.perf_counter()
+    branch = "cached"
+
+    def answer():
+        nonlocal branch
+        branch, response = answer_query(query)
+        return response
+
+    # Answers depend only on the normalised query and the catalog they came from
+    response = cached_answer("answer\n" + normalize_key(query), answer)
+    BRANCH_SECONDS.observe(time.perf_counter() - start, branch=branch)
+    return response
+
+def answer_query(query):
+    """Answer a query; returns (branch, response), where branch names the step that answered."""
+    # Step 1: Use the shared catalog loaded from JSON
+    catalog = get_catalog()
+    courses = catalog.courses
 
     # Step 2: Handle "What different courses do you have?" → Return only categories
     if any(keyword in query.lower() for keyword in ["different courses", "types of courses"]):
         categories = get_all_categories()
         if categories:
-            return "We offer courses in the following categories:\n- " + "\n- ".join(categories)
-        return "No course categories found."
+            return "category_listing", "We offer courses in the following categories:\n- " + "\n- ".join(categories)
+        return "category_listing", "No course categories found."
 
     # Step 3: Handle "What courses are available?" → Return all courses grouped by category
     if any(keyword in query.lower() for keyword in ["available courses", "list all courses", "what courses do you have"]):
         categories = get_all_categories()
         if not categories:
-            return "No course categories found."
+            return "full_listing", "No course categories found."
         
-        response = "Here are the available courses grouped by category:\n"
+        # Group titles in one pass over the catalog instead of one pass per category
+        titles_by_category = {}
+        for course in courses:
+            titles_by_category.setdefault(course["course_category"].lower(), []).append(course["title"])
+
+        parts = ["Here are the available courses grouped by category:\n"]
         for category in categories:
-            category_courses = [course["title"] for course in courses if course["course_category"].lower() == category.lower()]
+            category_courses = titles_by_category.get(category.lower())
             if category_courses:
-                response += f"\n**{category} Courses:**\n" + "\n".join(f"- {title}" for title in category_courses)
-
-        response += "\n\nWould you like to know more about any specific course?"
-        return response
-
-    # Step 4: Check for an **exact** course title match first
-    exact_match = next((course for course in courses if course["title"].lower() == query.lower()), None)
-
-    # Step 5: If exact match found, return its details immediately
-    if exact_match:
-        if "price" in query.lower() or "cost" in query.lower():
-            return f"Course: {exact_match['title']}\nPrice per session: {exact_match['price_per_session']}\nTotal price: ${exact_match['total_price']}"
-        elif "session" in query.lower() or "lesson" in query.lower():
-            return f"Course: {exact_match['title']}\nNumber of lessons: {exact_match['number_of_lessons']}"
-        else:
-            return f"Course: {exact_match['title']}\nDescription: {exact_match['description']}"
-
-    # Step 6: If no exact match, try **partial matching**, prioritizing longer course names
-    matched_courses = sorted(
-        [course for course in courses if course["title"].lower() in query.lower()],
-        key=lambda x: len(x["title"]),  # Sort by length to prefer full names
-        reverse=True
-    )
-
-    if matched_courses:
-        best_match = matched_courses[0]  # Pick the longest title match
-        if "price" in query.lower() or "cost" in query.lower():
-            return f"Course: {best_match['title']}\nPrice per session: {best_match['price_per_session']}\nTotal price: ${best_match['total_price']}"
-        elif "session" in query.lower() or "lesson" in query.lower():
-            return f"Course: {best_match['title']}\nNumber of lessons: {best_match['number_of_lessons']}"
-        else:
-            return f"Course: {best_match['title']}\nDescription: {best_match['description']}"
+                parts.append(f"\n**{category} Courses:**\n" + "\n".join(f"- {title}" for title in category_courses))
+
+        parts.append("\n\nWould you like to know more about any specific course?")
+        return "full_listing", "".join(parts)
+
+    # Step 4: Look the title up: exact match, then titles inside the query, then typos
+    with STAGE_SECONDS.time(stage="title_lookup"):
+        title_index = catalog.title_index
+        branch, matched_course = "exact_title", title_index.exact_match(query)
+        if matched_course is None:
+            matches = title_index.contained_matches(query)
+            branch, matched_course = "partial_title", matches[0] if matches else None
+        if matched_course is None:
+            branch, matched_course = "fuzzy_title", title_index.fuzzy_match(query)
+
+    # Step 5: If a course title matched, return its details immediately
+    if matched_course:
+        return branch, format_course_details(matched_course, query)
+
+    # Step 6: Price and lesson questions ("cheapest AI course", "under $30, at most 8 lessons")
+    # are answered from the numeric columns; only a question that also names a topic is searched
+    structured = parse_structured_query(query)
+    if structured:
+        detected_category = detect_category(query)
+        candidate_rows = None
+        if catalog.vector_store and set(structured.topic.split()) - query_matcher.triggers:
+            # "python games for kids under $30": only courses about the rest of the question qualify
+            fused, _, _ = hybrid_search_rows(
+                catalog, structured.topic, detected_category, HYBRID_CANDIDATES, CATEGORY_SIMILARITY_THRESHOLD
+            )
+            candidate_rows = [row for row, _ in fused]
+        with STAGE_SECONDS.time(stage="metadata_filter"):
+            rows = catalog.structured_index.run(structured, category=detected_category, candidate_rows=candidate_rows)
+        with STAGE_SECONDS.time(stage="response_format"):
+            response = format_structured_results([courses[row] for row in rows], structured, detected_category)
+        return "structured_filter", response
 
     # Step 7: If no specific course is detected, check category-based search
     detected_category = detect_category(query)
     if not detected_category:
-        return "No specific category detected. Try asking about Python, Java, AI, Web Development, etc."
+        return "no_category", "No specific category detected. Try asking about Python, Java, AI, Web Development, etc."
+
+    # Step 8: Retrieve category-based courses, or reuse the answer to a near-duplicate question
+    branch = "semantic_cache"
+
+    def search():
+        nonlocal branch
+        branch = "category_search"
+        return category_search_answer(query, detected_category)
+
+    response = semantic_answer(query, detected_category, ("category_search",), search)
+    return branch, response
 
-    # Step 8: Retrieve category-based courses
-    results = search_courses(query, category=detected_category, k=5, threshold=0.6)
+def category_search_answer(query, category):
+    """List the courses in `category` that best match the query."""
+    # Keyword (BM25) and semantic results, fused; strong keyword hits skip the embedding model
+    results = hybrid_search(query, category=category, k=5, threshold=CATEGORY_SIMILARITY_THRESHOLD)
 
     if isinstance(results, str) or not results:
-        return f"No courses found in '{detected_category}'. Try searching in other categories."
+        return f"No courses found in '{category}'. Try searching in other categories."
     
     # Format results as a list of courses
-    response = f"\nFound {len(results)} course(s) in '{detected_category}':\n"
-    for course in results:
-        response += f"- {course['title']} ({course['course_category']})\n"
+    with STAGE_SECONDS.time(stage="response_format"):
+        response = f"\nFound {len(results)} course(s) in '{category}':\n"
+        for course in results:
+            response += f"- {course['title']} ({course['course_category']})\n"
     
     return response
 
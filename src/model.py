@@ -1,32 +1,39 @@
 import re
-from vector_utils import load_vector_store, query_embedding  # Import vector retrieval functions
+from vector_utils import cached_answer, get_catalog, hybrid_search, normalize_key, semantic_answer  # Import vector retrieval functions
+from instrumentation import STAGE_SECONDS
 
-# Load FAISS vector store
-vector_store = load_vector_store()
-
-def search_courses(query, k=5):
-    """Retrieve top-k similar courses from FAISS vector store."""
+def search_courses(query, k=5, threshold=0.4):
+    """Retrieve the top-k courses by keyword and semantic match (cosine similarity above the threshold)."""
     
-    query_vec = query_embedding(query)  # Generate embedding
-
+    vector_store = get_catalog().vector_store  # Shared FAISS vector store
     if not vector_store:
         return "Error: Vector store not found."
 
-    # Perform similarity search
-    results = vector_store.similarity_search_by_vector(query_vec, k=k)
+    key = f"model\n{k}\n{threshold}\n{normalize_key(query)}"
+    # Verbatim repeats come from the answer cache, reworded ones from the semantic cache when it is enabled
+    scope = ("model", k, threshold)
+    return cached_answer(key, lambda: semantic_answer(query, None, scope, lambda: answer_query(query, k, threshold)))
 
-    if not results:
-        return "No relevant courses found."
+def answer_query(query, k, threshold):
+    # BM25 and FAISS results fused; strong keyword hits skip the embedding model
+    results = hybrid_search(query, k=k, threshold=threshold)
+    if isinstance(results, str):
+        return results
 
     # Format retrieved courses
+    with STAGE_SECONDS.time(stage="response_format"):
+        return format_results(results)
+
+def format_results(results):
     response = []
-    for res in results:
-        metadata = res.metadata
+    for metadata in results:
         title = metadata.get("title", "Unknown Course")
         price_per_session = metadata.get("price_per_session", "Not Available")
         total_price = metadata.get("total_price", "Not Available")
         lessons = metadata.get("number_of_lessons", "Not Available")
         description = metadata.get("description", "Not Available")
+        similarity = metadata["similarity"]
+        match = "Keyword match" if similarity is None else f"Similarity: {similarity:.2f}"  # None: found by BM25 only
 
         course_details = (
             f"Course: {title}\n"
@@ -34,6 +41,7 @@ def search_courses(query, k=5):
             f"Total Price: {total_price}\n"
             f"Number of Lessons: {lessons}\n"
             f"Description: {description}\n"
+            f"{match}\n"
         )
         response.append(course_details)
 
@@ -0,0 +1,99 @@
+import argparse
+import os
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+ONNX_MODEL_DIR = os.path.join("models", "all-MiniLM-L6-v2-onnx")
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+MODEL_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+MAX_LENGTH = 256  # all-MiniLM-L6-v2 truncates here too
+BATCH_SIZE = 32
+
+def mean_pool(hidden_states, attention_mask):
+    """Average token vectors over real tokens and L2-normalise, like sentence-transformers does."""
+    mask = attention_mask[..., None].astype(np.float32)
+    pooled = (hidden_states * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+    return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence embeddings from an exported (optionally int8) ONNX model, run by onnxruntime on CPU.
+
+    Everything is read from `model_dir`, so no network access is needed; see
+    export_onnx_model for how the directory is made.
+    """
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, intra_op_threads=None, batch_size=BATCH_SIZE):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE)
+        if not os.path.exists(model_path):
+            model_path = os.path.join(model_dir, MODEL_FILE)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(MAX_LENGTH)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+    def _embed(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+        }
+        inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+        hidden_states = self.session.run(None, inputs)[0]
+        return mean_pool(hidden_states, inputs["attention_mask"])
+
+    def embed_documents(self, texts):
+        vectors = [self._embed(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return np.concatenate(vectors).tolist() if vectors else []
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+def export_onnx_model(model_name, output_dir=ONNX_MODEL_DIR, quantize=True):
+    """Export a sentence-transformers model to ONNX (needs torch, transformers and network once)."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(output_dir)  # Writes tokenizer.json for the tokenizers library
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    torch.onnx.export(
+        model, tuple(sample[name] for name in names), model_path,
+        input_names=names, output_names=["last_hidden_state"],
+        dynamic_axes={name: {0: "batch", 1: "tokens"} for name in names + ["last_hidden_state"]},
+        opset_version=17,
+    )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        # Dynamic quantisation: int8 weights, activations quantised on the fly
+        quantize_dynamic(model_path, os.path.join(output_dir, QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+    print(f"Exported {model_name} to {output_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX for the onnx backend.")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--output", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx_model(args.model, args.output, quantize=not args.no_quantize)
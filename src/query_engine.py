@@ -0,0 +1,178 @@
+import operator
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from catalog_store import ColumnarCatalog, parse_price
+from lexical_index import tokenize
+
+SORT_COLUMNS = ["price_per_session", "total_price", "number_of_lessons"]
+MAX_RESULTS = 10  # Courses listed for a filter-only question
+
+# A parsed question: filters are (column, op, value) with op one of "<", "<=", ">", ">=";
+# sort is (column, descending). `extreme` marks "cheapest"-style questions, answered
+# with the courses tied for first. `topic` is what the question asks about besides
+# the limits and sort ("python games for kids" in "python games for kids under $30").
+StructuredQuery = namedtuple("StructuredQuery", ["filters", "sort", "limit", "extreme", "topic"])
+
+OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+LESSONS = r"(?:lessons?|sessions?|classes)"
+# Inclusive phrases are matched first, so "no more than" isn't read as "more than"
+AT_MOST = r"(?:at most|no more than|not more than|up to|max(?:imum)?(?: of)?)"
+AT_LEAST = r"(?:at least|no less than|not less than|no fewer than|min(?:imum)?(?: of)?)"
+BELOW = r"(?:under|below|less than|fewer than)"
+ABOVE = r"(?:over|above|more than)"
+PRICE = r"(?:\$\s*(\d+)|(\d+)\s*(?:dollars|usd|\$))"
+
+LESSON_LIMIT_PATTERNS = [
+    (re.compile(rf"{AT_MOST}\s*(\d+)\s*{LESSONS}"), "<="),
+    (re.compile(rf"{AT_LEAST}\s*(\d+)\s*{LESSONS}"), ">="),
+    (re.compile(rf"{BELOW}\s*(\d+)\s*{LESSONS}"), "<"),
+    (re.compile(rf"{ABOVE}\s*(\d+)\s*{LESSONS}"), ">"),
+    (re.compile(rf"(\d+)\s*{LESSONS}\s*or\s*(?:less|fewer)"), "<="),
+    (re.compile(rf"(\d+)\s*{LESSONS}\s*or\s*more"), ">="),
+]
+PRICE_LIMIT_PATTERNS = [
+    (re.compile(rf"{AT_MOST}\s*{PRICE}"), "<="),
+    (re.compile(rf"{AT_LEAST}\s*{PRICE}"), ">="),
+    (re.compile(rf"(?:{BELOW}|cheaper than)\s*{PRICE}"), "<"),
+    (re.compile(rf"(?:{ABOVE}|pricier than)\s*{PRICE}"), ">"),
+]
+SORT_PATTERN = re.compile(r"(?:sort(?:ed)?|order(?:ed)?|rank(?:ed)?) by (total price|total cost|price|cost|lessons|number of lessons)")
+EXTREMES = [
+    (re.compile(r"\b(?:cheapest|lowest[- ]price[d]?|lowest[- ]cost|least expensive|most affordable)\b"), "price", False),
+    (re.compile(r"\b(?:most expensive|highest[- ]price[d]?|priciest)\b"), "price", True),
+    (re.compile(r"\b(?:fewest lessons|shortest)\b"), "number_of_lessons", False),
+    (re.compile(r"\b(?:most lessons|longest)\b"), "number_of_lessons", True),
+]
+COUNT_PATTERN = re.compile(r"\b(?:top|first)?\s*(\d+)\s+(?:cheapest|most expensive|shortest|longest|courses)\b")
+# Words that ask for a listing or a price rather than name a topic
+GENERIC_WORDS = frozenset(
+    "course courses class classes lesson lessons session sessions price prices priced cost costs total "
+    "per dollars cheap affordable expensive long short list find get give top first all available offer".split()
+)
+
+def parse_structured_query(query):
+    """Parse price and lesson constraints from a question; None if it has none."""
+    text = query.lower()
+    price_column = "total_price" if "total" in text else "price_per_session"
+    filters = []
+
+    # Lesson limits first, so "under 10 lessons" isn't read as a price
+    for pattern, op in LESSON_LIMIT_PATTERNS:
+        for found in pattern.finditer(text):
+            filters.append(("number_of_lessons", op, int(found.group(1))))
+        text = pattern.sub(" ", text)
+    for pattern, op in PRICE_LIMIT_PATTERNS:
+        for found in pattern.finditer(text):
+            filters.append((price_column, op, int(found.group(1) or found.group(2))))
+        text = pattern.sub(" ", text)
+
+    sort, extreme = None, False
+    found = SORT_PATTERN.search(text)
+    if found:
+        key = found.group(1)
+        column = "number_of_lessons" if "lesson" in key else ("total_price" if "total" in key else price_column)
+        sort = (column, False)
+    else:
+        for pattern, kind, descending in EXTREMES:
+            if pattern.search(text):
+                sort = (price_column if kind == "price" else kind, descending)
+                extreme = True
+                break
+
+    if not filters and sort is None:
+        return None
+
+    count = COUNT_PATTERN.search(text)
+    limit = int(count.group(1)) if count else None
+    if limit is not None:
+        extreme = False  # "3 cheapest" asks for exactly three
+
+    for pattern in [SORT_PATTERN, COUNT_PATTERN] + [pattern for pattern, _, _ in EXTREMES]:
+        text = pattern.sub(" ", text)
+    topic = " ".join(word for word in tokenize(text) if word not in GENERIC_WORDS and not word.isdigit())
+    return StructuredQuery(filters, sort, limit, extreme, topic)
+
+class StructuredIndex:
+    """Numeric course columns with precomputed per-category sort orders.
+
+    Filters run as vectorised comparisons over whole columns; sorting reads a
+    precomputed order instead of sorting at query time.
+    """
+
+    def __init__(self, courses):
+        if isinstance(courses, ColumnarCatalog):
+            self.columns = {name: np.asarray(courses.columns[name]) for name in SORT_COLUMNS}
+            self.categories = list(courses.categories)
+            self.category_codes = np.asarray(courses.category_codes)
+        else:
+            self.columns = {
+                "price_per_session": np.array([parse_price(c["price_per_session"]) for c in courses], dtype=np.int32),
+                "total_price": np.array([c["total_price"] for c in courses], dtype=np.int64),
+                "number_of_lessons": np.array([c["number_of_lessons"] for c in courses], dtype=np.int32),
+            }
+            self.categories = sorted({c["course_category"] for c in courses})
+            codes = {category: code for code, category in enumerate(self.categories)}
+            self.category_codes = np.array([codes[c["course_category"]] for c in courses], dtype=np.int16)
+
+        self.category_lookup = {category.lower(): code for code, category in enumerate(self.categories)}
+
+        # Sort orders for every column, ascending and descending, overall (None) and
+        # per category code. Ties on a price break by total price either way, so the
+        # better deal comes first.
+        self.orders = {}
+        self.tiebreaks = {}
+        for column in SORT_COLUMNS:
+            tiebreak = self.columns["total_price" if column != "total_price" else "price_per_session"]
+            self.tiebreaks[column] = tiebreak
+            values = self.columns[column].astype(np.int64)
+            for descending, order in [(False, np.lexsort((tiebreak, values))), (True, np.lexsort((tiebreak, -values)))]:
+                self.orders[(None, column, descending)] = order
+                order_codes = self.category_codes[order]
+                for code in range(len(self.categories)):
+                    self.orders[(code, column, descending)] = order[order_codes == code]
+
+    def run(self, structured, category=None, candidate_rows=None):
+        """Return matching catalog rows in answer order.
+
+        `candidate_rows` optionally restricts the answer to rows already found by
+        FAISS, keeping their relevance order unless the query asks for a sort.
+        """
+        code = None
+        if category is not None:
+            code = self.category_lookup.get(category.lower())
+            if code is None:
+                return []
+
+        size = len(self.category_codes)
+        mask = np.ones(size, dtype=bool)
+        for column, op, value in structured.filters:
+            values = self.columns[column]
+            mask &= OPERATORS[op](values, value)
+
+        if candidate_rows is not None:
+            candidates = np.asarray(candidate_rows, dtype=np.int64)
+            allowed = np.zeros(size, dtype=bool)
+            allowed[candidates] = True
+            mask &= allowed
+
+        if structured.sort is None:
+            if candidate_rows is not None:
+                order = candidates
+            else:
+                order = self.orders[(code, "price_per_session", False)]
+        else:
+            column, descending = structured.sort
+            order = self.orders[(code, column, descending)]
+        if code is not None:
+            mask &= self.category_codes == code
+
+        rows = order[mask[order]]
+        if structured.extreme and structured.sort is not None and len(rows):
+            # Every course tied for the cheapest (or priciest, ...) answers the question
+            column, tiebreak = self.columns[structured.sort[0]], self.tiebreaks[structured.sort[0]]
+            rows = rows[(column[rows] == column[rows[0]]) & (tiebreak[rows] == tiebreak[rows[0]])]
+        return rows[: structured.limit or MAX_RESULTS].tolist()
@@ -0,0 +1,141 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+NEIGHBOURS = 8  # Cached queries checked per lookup, for scope and expiry
+
+class SemanticCache:
+    """Answers of recent queries, reused for near-duplicate queries.
+
+    Query embeddings sit in a small exact inner-product index. A lookup within
+    `max_distance` (cosine distance) of a cached query with the same scope
+    (category, k, threshold, ...) returns that query's result. Like
+    AnswerCache, the cache is tied to one catalog version and is dropped when
+    the version changes. Entries expire after `ttl` seconds and the least
+    recently used are evicted beyond `max_size`.
+
+    The default `max_distance` of 0.05 (cosine similarity 0.95) only reuses
+    near-identical wordings. Questions that differ in one word ("python" /
+    "java courses for kids") can still be closer than 0.15, so measure a wider
+    distance for the model at hand with benchmarks/semantic_cache_threshold.py
+    before using it.
+    """
+
+    def __init__(self, max_size=1000, ttl=600.0, max_distance=0.05):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._index = None  # Created once the embedding size is known
+        self._entries = OrderedDict()  # entry ID -> (expires_at, scope, result)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def get(self, vector, version, scope):
+        """Return the result cached for a query close to `vector` in `scope`, or None."""
+        with self._lock:
+            self._check_version(version)
+            if self._index is None or not self._entries:
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            scores, entry_ids = self._index.search(self._normalize(vector), min(NEIGHBOURS, len(self._entries)))
+            expired = []
+            result = None
+            for score, entry_id in zip(scores[0], entry_ids[0]):
+                # Neighbours come back closest first
+                if entry_id == -1 or 1.0 - score > self.max_distance:
+                    break
+                expires_at, entry_scope, entry_result = self._entries[entry_id]
+                if expires_at <= now:
+                    expired.append(entry_id)
+                elif entry_scope == scope:
+                    self._entries.move_to_end(entry_id)
+                    result = entry_result
+                    break
+            self._remove(expired)
+
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, vector, version, scope, result):
+        """Cache the result of the query embedded as `vector`, built from the catalog at `version`."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            vector = self._normalize(vector)
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = (time.monotonic() + self.ttl, scope, result)
+
+            # Least recently used first
+            evicted = list(itertools.islice(self._entries, max(0, len(self._entries) - self.max_size)))
+            self.evictions += len(evicted)
+            self._remove(evicted)
+
+    def stats(self):
+        """Return hit/miss counters and the current size for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "max_distance": self.max_distance,
+            }
+
+    def clear(self):
+        """Drop all cached results."""
+        with self._lock:
+            self._reset()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.array(vector, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _remove(self, entry_ids):
+        if not entry_ids:
+            return
+        for entry_id in entry_ids:
+            del self._entries[entry_id]
+        self._index.remove_ids(np.array(entry_ids, dtype=np.int64))
+
+    def _reset(self):
+        if self._index is not None:
+            self._index.reset()
+        self._entries.clear()
+
+    def _check_version(self, version):
+        if version == self.version:
+            return
+        if self._entries:
+            self.invalidations += 1
+        self._reset()
+        self.version = version
@@ -0,0 +1,321 @@
+"""Sharded serving: the catalog's vectors split across local worker processes.
+
+create_vector_store writes one FAISS index per shard when FAISS_SHARDS=N.
+A ShardCoordinator runs one worker process per shard. Each query batch goes
+to every shard that can hold a match, and the per-shard top-k lists are
+merged into a global top-k. Each worker returns its shard's own inner
+products, so with flat shards the merged result is exactly what a single
+flat index would return.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import weakref
+
+import faiss
+import numpy as np
+
+from ann_index import category_sub_index, format_index_spec, new_index, restricted_search_params, set_search_params
+from instrumentation import get_logger
+
+META_FILE = "shards.json"
+SHARD_STRATEGIES = ("hash", "category")
+WORKER_START_TIMEOUT = 120  # Seconds to wait for a worker to load its shard
+
+log = get_logger("sharding")
+
+def assign_shards(ids, categories, shard_count, by="hash"):
+    """Shard number of each row: by a stable hash of its course ID, or by category.
+
+    Category sharding keeps each category on one shard (so a category search
+    touches one worker) and places the largest categories first on the
+    least-loaded shard to keep shard sizes close.
+    """
+    if by == "hash":
+        return np.array(
+            [int.from_bytes(hashlib.blake2b(str(course_id).encode("utf-8"), digest_size=8).digest(), "little")
+             % shard_count for course_id in ids],
+            dtype=np.int32,
+        )
+    if by != "category":
+        raise ValueError(f"Unknown shard strategy '{by}'; expected one of {', '.join(SHARD_STRATEGIES)}")
+
+    sizes = {}
+    for category in categories:
+        sizes[category.lower()] = sizes.get(category.lower(), 0) + 1
+    loads = [0] * shard_count
+    shard_of = {}
+    for category, size in sorted(sizes.items(), key=lambda item: (-item[1], item[0])):
+        shard = loads.index(min(loads))
+        shard_of[category] = shard
+        loads[shard] += size
+    return np.array([shard_of[category.lower()] for category in categories], dtype=np.int32)
+
+def write_shards(path, vectors, ids, categories, shard_count, by="hash", index_spec="flat"):
+    """Split normalised vectors (one per catalog row) into `shard_count` FAISS indexes at `path`.
+
+    Each shard keeps the catalog row and category code of its vectors. The
+    directory is swapped in like the columnar catalog: never partial, but
+    briefly absent between the two renames.
+    """
+    assignment = assign_shards(ids, categories, shard_count, by)
+    category_names = sorted({category.lower() for category in categories})
+    category_codes = {category: code for code, category in enumerate(category_names)}
+    codes = np.array([category_codes[category.lower()] for category in categories], dtype=np.int16)
+
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    shards_by_category = {category: [] for category in category_names}
+    for shard in range(shard_count):
+        rows = np.flatnonzero(assignment == shard)
+        if len(rows):
+            shard_vectors = np.ascontiguousarray(vectors[rows])
+            index = new_index(index_spec, shard_vectors)
+            index.add(shard_vectors)
+        else:
+            index = faiss.IndexFlatIP(vectors.shape[1])  # More shards than categories
+        faiss.write_index(index, os.path.join(tmp_path, f"shard-{shard}.faiss"))
+        np.save(os.path.join(tmp_path, f"shard-{shard}.rows.npy"), rows.astype(np.int64))
+        np.save(os.path.join(tmp_path, f"shard-{shard}.categories.npy"), codes[rows])
+        for code in np.unique(codes[rows]):
+            shards_by_category[category_names[code]].append(shard)
+
+    with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as file:
+        json.dump({
+            "count": shard_count,
+            "by": by,
+            "index_spec": format_index_spec(index_spec),
+            "size": len(ids),
+            "categories": category_names,
+            "shards_by_category": shards_by_category,
+        }, file)
+
+    # Swap directories; workers still mapping the old shards keep a consistent view
+    old_path = path + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def load_shard_meta(path):
+    """Return the shard layout saved at `path`, or None if there isn't one."""
+    try:
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def serve_shard(path, shard, index_spec, connection):
+    """Worker process: hold one shard and answer (queries, k, category code) requests."""
+    faiss.omp_set_num_threads(1)  # Parallelism comes from the shard processes
+    index = faiss.read_index(
+        os.path.join(path, f"shard-{shard}.faiss"), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+    )
+    set_search_params(index, index_spec)
+    rows = np.load(os.path.join(path, f"shard-{shard}.rows.npy"))
+    codes = np.load(os.path.join(path, f"shard-{shard}.categories.npy"))
+    category_indexes = {}  # Category code -> (exact sub-index or None, its rows)
+    connection.send("ready")
+
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return  # Coordinator went away
+        if request is None:
+            return
+        queries, k, code = request
+        try:
+            search_index, row_map, params = index, rows, None
+            if code is not None:
+                if code not in category_indexes:
+                    local = np.flatnonzero(codes == code)
+                    category_indexes[code] = (category_sub_index(index, local), local)
+                sub_index, local = category_indexes[code]
+                if sub_index is None:
+                    params = restricted_search_params(index, local)
+                else:
+                    search_index, row_map = sub_index, rows[local]
+            if search_index.ntotal == 0:
+                empty = np.zeros((len(queries), 0))
+                connection.send((empty.astype(np.float32), empty.astype(np.int64)))
+                continue
+            scores, local_rows = search_index.search(queries, min(k, search_index.ntotal), params=params)
+            connection.send((scores, np.where(local_rows >= 0, row_map[np.maximum(local_rows, 0)], -1)))
+        except Exception as e:  # Report to the coordinator instead of dying silently
+            connection.send(e)
+
+def _stop_workers(connections, processes, owner_pid):
+    if os.getpid() != owner_pid:
+        return  # A forked copy of the coordinator; the workers belong to the parent
+    for connection in connections:
+        try:
+            connection.send(None)
+            connection.close()
+        except OSError:
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+class ShardCoordinator:
+    """Scatter query batches to one worker process per shard and gather a merged top-k.
+
+    Workers start on the first search, in the process that searches, so a
+    coordinator created before a pre-forking server forks is still safe to use
+    in each worker. Each worker answers one request at a time under its own
+    lock, so concurrent searches pipeline through the shards. A worker that
+    died is restarted by the next search that reaches it.
+    """
+
+    def __init__(self, path):
+        meta = load_shard_meta(path)
+        if meta is None:
+            raise FileNotFoundError(f"No shards found at '{path}'")
+        self.path = path
+        self.count = meta["count"]
+        self.size = meta["size"]
+        self.index_spec = meta["index_spec"]
+        self.category_codes = {category: code for code, category in enumerate(meta["categories"])}
+        self.shards_by_category = meta["shards_by_category"]
+
+        self._pid = None
+        self._connections = []
+        self._processes = []
+        self._locks = [threading.Lock() for _ in range(self.count)]
+        self._start_lock = threading.Lock()
+        self._finalizer = None
+
+    def _spawn(self, shard):
+        context = multiprocessing.get_context("spawn")  # No fork: the parent may run model threads
+        parent_end, child_end = context.Pipe()
+        process = context.Process(target=serve_shard, args=(self.path, shard, self.index_spec, child_end), daemon=True)
+        process.start()
+        child_end.close()
+        return parent_end, process
+
+    def _wait_ready(self, shard):
+        connection = self._connections[shard]
+        try:
+            if connection.poll(WORKER_START_TIMEOUT) and connection.recv() == "ready":
+                return
+        except (EOFError, OSError):
+            pass
+        raise RuntimeError(f"Shard worker {shard} failed to start")
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._locks = [threading.Lock() for _ in range(self.count)]  # Fresh after a fork
+            connections, processes = [], []
+            for shard in range(self.count):
+                connection, process = self._spawn(shard)
+                connections.append(connection)
+                processes.append(process)
+            # Restarts replace list items in place, so the finalizer always stops the current workers
+            self._connections, self._processes = connections, processes
+            self._finalizer = weakref.finalize(self, _stop_workers, self._connections, self._processes, os.getpid())
+            try:
+                for shard in range(self.count):
+                    self._wait_ready(shard)
+            except RuntimeError:
+                self.close()
+                raise
+            self._pid = os.getpid()
+        log.info(f"Started {self.count} shard workers.", extra={"fields": {"shards": self.count, "path": self.path}})
+
+    def _restart(self, shard):
+        """Replace a dead shard worker; the caller holds the shard's lock."""
+        log.warning(f"Shard worker {shard} died; restarting it.", extra={"fields": {"shard": shard}})
+        self._connections[shard].close()
+        process = self._processes[shard]
+        process.join(timeout=1)
+        if process.is_alive():
+            process.terminate()
+        self._connections[shard], self._processes[shard] = self._spawn(shard)
+        self._wait_ready(shard)
+
+    def _send(self, shard, request):
+        try:
+            self._connections[shard].send(request)
+        except (BrokenPipeError, ConnectionResetError, EOFError):
+            self._restart(shard)
+            self._connections[shard].send(request)
+
+    def _receive(self, shard, request):
+        try:
+            return self._connections[shard].recv()
+        except (ConnectionResetError, EOFError):
+            # The worker died mid-request: restart it and ask again, once
+            self._restart(shard)
+            self._connections[shard].send(request)
+            return self._connections[shard].recv()
+
+    def search(self, queries, k, category=None):
+        """Search normalised query vectors; returns (scores, catalog rows) like index.search.
+
+        Missing results are padded with row -1.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        code = None
+        shards = range(self.count)
+        if category:
+            code = self.category_codes.get(category.lower())
+            if code is None:
+                return np.zeros((len(queries), 0), dtype=np.float32), np.zeros((len(queries), 0), dtype=np.int64)
+            shards = self.shards_by_category[category.lower()]
+
+        if self._pid != os.getpid():
+            self._start()
+        request = (queries, k, code)
+        replies = []
+        sent = []  # Shards holding this search's request and lock, awaiting a reply
+        try:
+            # Locks are taken in shard order, so concurrent searches can't deadlock,
+            # and each is released as soon as its shard has replied
+            for shard in sorted(shards):
+                self._locks[shard].acquire()
+                try:
+                    self._send(shard, request)
+                except BaseException:
+                    self._locks[shard].release()
+                    raise
+                sent.append(shard)
+            while sent:
+                shard = sent.pop(0)
+                try:
+                    replies.append(self._receive(shard, request))
+                finally:
+                    self._locks[shard].release()
+        finally:
+            for shard in sent:
+                # This search failed part way: read the reply so the next search doesn't get it
+                try:
+                    self._connections[shard].recv()
+                except (ConnectionResetError, EOFError):
+                    pass
+                self._locks[shard].release()
+
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise RuntimeError(f"Shard search failed: {reply}") from reply
+
+        scores = np.concatenate([reply[0] for reply in replies], axis=1)
+        rows = np.concatenate([reply[1] for reply in replies], axis=1)
+        scores[rows < 0] = -np.inf
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+    def close(self):
+        """Stop the worker processes; they are also stopped when the coordinator is collected."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._pid = None
@@ -0,0 +1,149 @@
+from collections import deque
+
+NGRAM_SIZE = 3
+MIN_CANDIDATE_SCORE = 0.5  # Share of a title's n-grams the query must contain to be checked
+MAX_CANDIDATES = 5  # Titles verified by edit distance per query
+MIN_FUZZY_LENGTH = 6  # Titles shorter than this are only matched exactly
+CHARS_PER_TYPO = 6  # One edit allowed per this many title characters
+
+def normalize_title(text):
+    """Lowercase and collapse whitespace so spacing differences don't matter."""
+    return " ".join(text.lower().split())
+
+def compact_title(text):
+    """Lowercase with all whitespace removed, so "Java Script" matches "JavaScript"."""
+    return "".join(text.lower().split())
+
+def title_ngrams(text):
+    """Character n-grams of the compacted text."""
+    compact = compact_title(text)
+    return {compact[i:i + NGRAM_SIZE] for i in range(len(compact) - NGRAM_SIZE + 1)}
+
+def substring_edit_distance(pattern, text):
+    """Fewest edits turning `pattern` into some substring of `text` (Sellers' algorithm)."""
+    column = list(range(len(pattern) + 1))
+    best = column[-1]
+    for char in text:
+        new_column = [0]  # A match may start anywhere in the text
+        for i, pattern_char in enumerate(pattern, 1):
+            cost = 0 if pattern_char == char else 1
+            new_column.append(min(column[i] + 1, new_column[i - 1] + 1, column[i - 1] + cost))
+        column = new_column
+        best = min(best, column[-1])
+    return best
+
+class TitleIndex:
+    """Course title lookup that answers title questions without the embedding model.
+
+    - a hash map for exact title matches,
+    - an Aho-Corasick automaton for titles contained anywhere in the query,
+    - a character n-gram index for titles with typos or different spacing; its
+      candidates are confirmed by edit distance against the closest part of the query.
+    """
+
+    def __init__(self, courses):
+        self.courses = courses  # Any sequence of course dicts, e.g. a ColumnarCatalog
+        self.exact = {}
+        self.compact = []
+        self.ngram_counts = []
+        self.postings = {}
+
+        for course_id in range(len(courses)):
+            title = normalize_title(courses[course_id]["title"])
+            self.exact.setdefault(title, course_id)  # First course wins, as before
+
+            self.compact.append(compact_title(title))
+            ngrams = title_ngrams(title)
+            self.ngram_counts.append(len(ngrams))
+            for ngram in ngrams:
+                self.postings.setdefault(ngram, []).append(course_id)
+
+        self._build_automaton()
+
+    def _build_automaton(self):
+        # Trie of normalised titles; node 0 is the root
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        for title, course_id in self.exact.items():
+            node = 0
+            for char in title:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                node = next_node
+            self.outputs[node].append(course_id)
+
+        # Breadth-first failure links; each node inherits the outputs of its fallback
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def exact_match(self, query):
+        """Return the course whose title equals the query, or None."""
+        course_id = self.exact.get(normalize_title(query))
+        return None if course_id is None else self.courses[course_id]
+
+    def contained_matches(self, query):
+        """Return courses whose titles appear in the query, longest title first."""
+        found = set()
+        node = 0
+        for char in normalize_title(query):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            found.update(self.outputs[node])
+
+        matches = [self.courses[course_id] for course_id in found]
+        return sorted(matches, key=lambda course: len(course["title"]), reverse=True)
+
+    def fuzzy_match(self, query):
+        """Return the course whose title best survives typos in the query, or None."""
+        shared = {}
+        for ngram in title_ngrams(query):
+            for course_id in self.postings.get(ngram, ()):
+                shared[course_id] = shared.get(course_id, 0) + 1
+
+        candidates = [
+            (count / self.ngram_counts[course_id], course_id)
+            for course_id, count in shared.items()
+            if len(self.compact[course_id]) >= MIN_FUZZY_LENGTH
+            and count / self.ngram_counts[course_id] >= MIN_CANDIDATE_SCORE
+        ]
+        candidates = sorted(candidates, reverse=True)[:MAX_CANDIDATES]
+
+        compact_query = compact_title(query)
+        best_id, best_key = None, None
+        for _, course_id in candidates:
+            title = self.compact[course_id]
+            distance = substring_edit_distance(title, compact_query)
+            if distance > len(title) // CHARS_PER_TYPO:
+                continue
+            key = (distance, -len(title))  # Fewest edits, then longest title
+            if best_key is None or key < best_key:
+                best_id, best_key = course_id, key
+
+        return None if best_id is None else self.courses[best_id]
+
+    def lookup(self, query):
+        """Exact, then contained, then fuzzy title match; None if nothing matches."""
+        course = self.exact_match(query)
+        if course is not None:
+            return course
+
+        matches = self.contained_matches(query)
+        if matches:
+            return matches[0]
+
+        return self.fuzzy_match(query)
@@ -1,99 +1,966 @@
 from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from collections import namedtuple
+from answer_cache import AnswerCache
+from ann_index import (
+    DEFAULT_INDEX_SPEC, category_sub_index, format_index_spec, is_exact, new_index, restricted_search_params,
+    set_search_params, stores_full_vectors,
+)
+from bulk_embed import DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, embed_texts
+from catalog_store import ColumnarCatalog, load_catalog, write_catalog
+from data_preprocessing import COURSES_STREAM_PATH, read_courses_ndjson
+from embedding_cache import EmbeddingCache, normalize_key
+from instrumentation import (
+    ANSWER_CACHE_TOTAL, EMBEDDING_CACHE_TOTAL, RETRIEVAL_PATH_TOTAL, SEMANTIC_CACHE_TOTAL, STAGE_SECONDS, get_logger
+)
+from lexical_index import build_lexical_index, load_lexical_index, write_lexical_index
+from semantic_cache import SemanticCache
+from sharding import ShardCoordinator, load_shard_meta, write_shards
+from onnx_embeddings import ONNX_MODEL_DIR, OnnxEmbeddings
+from query_engine import StructuredIndex
+from title_index import TitleIndex
+import argparse
+import faiss
+import itertools
+import shutil
+import hashlib
+import numpy as np
 import os
 import json
+import threading
+import time
 
-def load_embeddings():
-    """Load the sentence-transformers model once."""
-    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+INDEX_PATH = "faiss_index"
+CURRENT_FILE = "CURRENT"  # Names the published version under VERSIONS_DIR; replaced atomically
+VERSIONS_DIR = "versions"  # One directory per build, never modified once published
+INDEX_FILE = "index.faiss"
+IDS_FILE = "ids.json"  # Docstore ID of each vector row; replaces LangChain's pickled docstore
+LEGACY_DOCSTORE_FILE = "index.pkl"
+COURSES_PATH = COURSES_STREAM_PATH  # Newline-delimited JSON written by data_preprocessing.py
+LEGACY_COURSES_PATH = "processed_courses.json"  # Single JSON array from older ingests
+VERSION_FILE = "VERSION"  # Version stamp of indexes saved directly in INDEX_PATH, before CURRENT existed
+MANIFEST_FILE = "manifest.json"  # Course IDs and content hashes of the saved index
+# Inside a version directory:
+CATALOG_DIR = "catalog"  # Columnar course metadata, in vector order
+LEXICAL_DIR = "bm25"  # BM25 postings over course_text, in vector order
+SHARDS_DIR = "shards"  # Per-shard FAISS indexes, see sharding.py
+CATEGORY_INDEX_DIR = "categories"  # Exact per-category sub-indexes, memory-mapped to serve
+CATEGORY_INDEX_FILE = "categories.json"
+LEGACY_ENTRIES = [  # What older builds wrote directly in INDEX_PATH
+    INDEX_FILE, IDS_FILE, LEGACY_DOCSTORE_FILE, VERSION_FILE, MANIFEST_FILE,
+    CATALOG_DIR, LEXICAL_DIR, SHARDS_DIR, CATEGORY_INDEX_DIR,
+]
+STAGING_PATH = INDEX_PATH + ".staging"  # Vectors and checkpoint of an unfinished full build, see bulk_embed.py
+RELOAD_CHECK_INTERVAL = 2.0  # Seconds between checks for a rebuilt index
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "huggingface")  # Or "onnx", see onnx_embeddings.py
+EMBEDDING_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", ONNX_MODEL_DIR)  # Local ONNX export of EMBEDDING_MODEL
+EMBEDDING_THREADS = int(os.environ.get("EMBEDDING_THREADS", "0")) or None  # onnxruntime intra-op threads
+EMBEDDING_WORKERS = int(os.environ.get("EMBEDDING_WORKERS", "0"))  # Processes for full builds; 0 = this one
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", str(DEFAULT_BATCH_SIZE)))
+EMBEDDING_CACHE_SIZE = 10000  # Query embeddings kept in memory
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH")  # Optional on-disk cache directory
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "5000"))  # Finished answers kept; 0 disables
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", "600"))  # Seconds an answer stays fresh
+# Off until SEMANTIC_CACHE_DISTANCE has been measured for the model with benchmarks/semantic_cache_threshold.py
+SEMANTIC_CACHE_SIZE = int(os.environ.get("SEMANTIC_CACHE_SIZE", "0"))  # Recent answers kept; 0 disables
+SEMANTIC_CACHE_TTL = float(os.environ.get("SEMANTIC_CACHE_TTL", "600"))
+SEMANTIC_CACHE_DISTANCE = float(os.environ.get("SEMANTIC_CACHE_DISTANCE", "0.05"))  # Max cosine distance to reuse
+INDEX_SPEC = os.environ.get("FAISS_INDEX_SPEC", DEFAULT_INDEX_SPEC)  # See ann_index.py, e.g. "hnsw:m=32"
+MMAP_INDEX = os.environ.get("FAISS_MMAP", "1") != "0"  # Serve the index memory-mapped and read-only
+SHARD_COUNT = int(os.environ.get("FAISS_SHARDS", "0"))  # Build and search N shards in worker processes; 0 = one index
+SHARD_BY = os.environ.get("FAISS_SHARD_BY", "hash")  # Or "category"
+WARM_UP_QUERY = "python courses for kids"
+LEXICAL_FAST_PATH = os.environ.get("LEXICAL_FAST_PATH", "1") != "0"  # Serve confident BM25 hits without embedding
+HYBRID_CANDIDATES = 50  # Results taken from each retriever before fusion
+RRF_K = 60  # Reciprocal-rank fusion constant; damps the weight of the very top ranks
 
-# Centralized embeddings instance
-embeddings = load_embeddings()
+log = get_logger("vector_utils")
 
-import json
+def embedding_model_id(backend=EMBEDDING_BACKEND):
+    """Name the model and backend; vectors from different backends are never mixed."""
+    return EMBEDDING_MODEL if backend == "huggingface" else f"{EMBEDDING_MODEL} ({backend})"
+
+def load_embeddings(backend=EMBEDDING_BACKEND):
+    """Load the sentence-transformers model once, with PyTorch or as a local ONNX export."""
+    if backend == "onnx":
+        return OnnxEmbeddings(EMBEDDING_MODEL_DIR, intra_op_threads=EMBEDDING_THREADS)
+    if backend != "huggingface":
+        raise ValueError(f"Unknown embedding backend '{backend}', expected 'huggingface' or 'onnx'")
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+def get_embeddings():
+    """Return this process's embedding model, loading it on first use."""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                _embeddings = load_embeddings()
+    return _embeddings
+
+class SharedEmbeddings(Embeddings):
+    """Hands LangChain the process-wide model without loading it until a text is embedded."""
+
+    def embed_documents(self, texts):
+        return get_embeddings().embed_documents(texts)
+
+    def embed_query(self, text):
+        return get_embeddings().embed_query(text)
+
+# Centralized embeddings instance; the model itself loads on first use
+embeddings = SharedEmbeddings()
+
+# Shared query embedding cache, invalidated when the model or backend changes
+embedding_cache = EmbeddingCache(embedding_model_id(), max_size=EMBEDDING_CACHE_SIZE, path=EMBEDDING_CACHE_PATH)
+
+# Finished answers shared by retrieve_courses, model.search_courses and the web routes
+answer_cache = AnswerCache(max_size=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL)
+
+# Answers reused for near-duplicate queries ("cheap python classes" / "low cost python course")
+semantic_cache = SemanticCache(
+    max_size=SEMANTIC_CACHE_SIZE, ttl=SEMANTIC_CACHE_TTL, max_distance=SEMANTIC_CACHE_DISTANCE
+)
+
+def cached_answer(key, compute):
+    """Return the cached answer for `key` under the current catalog, or compute and cache it.
+
+    Keys are tied to the catalog version, so publishing a new index invalidates them.
+    """
+    version = get_catalog().version
+    answer = answer_cache.get(key, version)
+    if answer is not None:
+        ANSWER_CACHE_TOTAL.inc(result="hit")
+        return answer
+
+    ANSWER_CACHE_TOTAL.inc(result="miss")
+    answer = compute()
+    answer_cache.put(key, version, answer)
+    return answer
+
+def semantic_answer(query, category, scope, compute):
+    """Return the answer of a query embedded close to `query` in `scope`, or compute and cache it.
+
+    The lookup runs before any search, so a hit skips the keyword and vector
+    searches, fusion and formatting. It costs an embedding, which a confident
+    keyword match would otherwise skip, so it only runs when the semantic
+    cache is enabled (SEMANTIC_CACHE_SIZE > 0).
+    """
+    if semantic_cache.max_size <= 0:
+        return compute()
+    version = get_catalog().version
+    query_vec = query_embedding(query, category)
+    scope = ((category or "").lower(),) + tuple(scope)
+    answer = semantic_cache.get(query_vec, version, scope)
+    if answer is not None:
+        SEMANTIC_CACHE_TOTAL.inc(result="hit")
+        return answer
+
+    SEMANTIC_CACHE_TOTAL.inc(result="miss")
+    answer = compute()
+    semantic_cache.put(query_vec, version, scope, answer)
+    return answer
+
+def courses_path():
+    """Return the course file to load, preferring the newline-delimited JSON one."""
+    if os.path.exists(COURSES_PATH) or not os.path.exists(LEGACY_COURSES_PATH):
+        return COURSES_PATH
+    return LEGACY_COURSES_PATH
 
 def load_course_metadata():
-    """Load structured course metadata from processed_courses.json."""
+    """Load structured course metadata from processed_courses.jsonl (or .json)."""
     try:
-        with open("processed_courses.json", "r", encoding="utf-8") as file:
-            return json.load(file)  # Return structured metadata
+        return list(iter_course_metadata())
     except FileNotFoundError:
-        print("Error: processed_courses.json not found! Run data_preprocessing.py first.")
+        log.error(f"{COURSES_PATH} not found! Run data_preprocessing.py first.")
         return []
 
+def iter_course_metadata():
+    """Stream courses from processed_courses.jsonl; the older .json file can only be read whole."""
+    path = courses_path()
+    if path == COURSES_PATH:
+        yield from read_courses_ndjson(path)
+    else:
+        with open(path, "r", encoding="utf-8") as file:
+            yield from json.load(file)
+
 def query_embedding(query, category=None):
-    """Generate embedding with category awareness."""
-    category_text = f"Category: {category}\n" if category else ""
-    return embeddings.embed_query(category_text + query)
-
-def create_vector_store(courses):
-    """Create FAISS vector store with category-based metadata."""
-    texts = [
-        f"Category: {course['course_category']}\nTitle: {course['title']}\nDescription: {course['description']}"
-        for course in courses
-    ]
-    metadata = [
-        {
-            "title": course["title"],
-            "description": course["description"],
-            "price_per_session": course["price_per_session"],
-            "number_of_lessons": course["number_of_lessons"],
-            "total_price": course["total_price"],
-            "course_category": course["course_category"]
-        }
-        for course in courses
-    ]
+    """Generate embedding with category awareness, reusing cached embeddings."""
+    key = normalize_key(query, category)  # MiniLM is uncased, so case doesn't change the vector
+    vector = embedding_cache.get(key)
+    if vector is None:
+        EMBEDDING_CACHE_TOTAL.inc(result="miss")
+        category_text = f"Category: {category}\n" if category else ""
+        with STAGE_SECONDS.time(stage="embedding"):
+            vector = embeddings.embed_query(category_text + query)
+        embedding_cache.put(key, vector)
+        return vector
+    EMBEDDING_CACHE_TOTAL.inc(result="hit")
+    return vector.tolist()
+
+def course_text(course):
+    """Build the text that gets embedded for a course."""
+    return f"Category: {course['course_category']}\nTitle: {course['title']}\nDescription: {course['description']}"
+
+def course_metadata(course):
+    """Select the course fields stored alongside its vector."""
+    return {
+        "title": course["title"],
+        "description": course["description"],
+        "price_per_session": course["price_per_session"],
+        "number_of_lessons": course["number_of_lessons"],
+        "total_price": course["total_price"],
+        "course_category": course["course_category"]
+    }
+
+def course_ids(courses):
+    """Give each course a stable ID from its title; repeated titles get a numeric suffix."""
+    return [course_id for course_id, _, _ in course_records(courses)]
+
+def course_records(courses):
+    """Yield (ID, embedded text, stored metadata) for each course of any iterable, in one pass."""
+    seen = {}
+    for course in courses:
+        base = content_hash(" ".join(course["title"].lower().split()))[:16]
+        seen[base] = seen.get(base, 0) + 1
+        yield base if seen[base] == 1 else f"{base}-{seen[base]}", course_text(course), course_metadata(course)
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def current_index_dir():
+    """Directory of the published index: the version CURRENT names, or INDEX_PATH for older layouts."""
+    try:
+        with open(os.path.join(INDEX_PATH, CURRENT_FILE), "r", encoding="utf-8") as file:
+            return os.path.join(INDEX_PATH, VERSIONS_DIR, file.read().strip())
+    except FileNotFoundError:
+        return INDEX_PATH
+
+def load_manifest(path=None):
+    """Load the manifest of course IDs and content hashes saved with the index."""
+    try:
+        with open(os.path.join(path or current_index_dir(), MANIFEST_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_manifest(path, entries, index_spec=DEFAULT_INDEX_SPEC):
+    with open(os.path.join(path, MANIFEST_FILE), "w", encoding="utf-8") as file:
+        json.dump(
+            {"embedding_model": embedding_model_id(), "index_spec": format_index_spec(index_spec), "courses": entries}, file
+        )
+
+def build_vector_store(
+    records, index_spec=DEFAULT_INDEX_SPEC, fingerprint=None, workers=EMBEDDING_WORKERS,
+    batch_size=EMBEDDING_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """Embed (ID, text, metadata) records and store them in a new FAISS index of the given spec.
+
+    `records` can be any iterable; it is read once, a chunk at a time.
+    Embedding runs in chunks through bulk_embed, across `workers` processes if
+    set, and is checkpointed under STAGING_PATH, so an interrupted build picks
+    up after the chunks whose texts are unchanged. The docstore still keeps
+    every course's text and metadata. Returns the store and the normalised
+    vectors, which a compressed index can't give back exactly.
+    """
+    ids = []
+    documents = {}
+
+    def texts():
+        for course_id, text, metadata in records:
+            ids.append(course_id)
+            documents[course_id] = Document(page_content=text, metadata=metadata)
+            yield text
+
+    vectors = embed_texts(
+        texts(), fingerprint, embedding_model_id(), STAGING_PATH, embed=embeddings.embed_documents,
+        load_model=load_embeddings, backend=EMBEDDING_BACKEND, workers=workers,
+        batch_size=batch_size, chunk_size=chunk_size,
+    )
+    faiss.normalize_L2(vectors)
+    # Normalised vectors in an inner-product index, so scores are cosine similarities
+    index = new_index(index_spec, vectors)
+    index.add(vectors)
+    vector_store = FAISS(
+        embeddings, index, InMemoryDocstore(documents), dict(enumerate(ids)),
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+    return vector_store, vectors
+
+def create_vector_store(
+    courses, incremental=True, index_spec=INDEX_SPEC, shard_count=SHARD_COUNT, shard_by=SHARD_BY,
+    workers=EMBEDDING_WORKERS, batch_size=EMBEDDING_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """Create or update the FAISS vector store with category-based metadata.
+
+    `courses` can be any iterable, such as data_preprocessing.read_courses_ndjson;
+    it is read once. A full build holds one chunk of course texts at a time
+    besides the docstore. An incremental build keeps only the new and changed
+    courses, except on an index that can't remove vectors (HNSW, IVF), where it
+    keeps all of them in case removals force a full rebuild.
+
+    `index_spec` picks the FAISS index type and its tuning (see ann_index.py).
+    With `shard_count`, the vectors are also split into that many shard indexes
+    by course ID hash or by category (`shard_by`), searched by worker processes.
+    With `incremental`, only new or changed course texts are embedded: deleted
+    courses are removed and metadata-only changes (price, lessons) are applied
+    without touching their vectors. Changing the spec forces a full build.
+    A full build embeds in checkpointed chunks of `chunk_size` texts, in batches
+    of `batch_size`, across `workers` processes, and resumes if interrupted.
+    Every build is written to a new version directory and published in one
+    step, so readers see either the old index or the new one, never a mix.
+    """
+    entries = {}
+
+    def tracked(records):
+        # Content hashes of every course, for the manifest, filled in as the records are read
+        for course_id, text, metadata in records:
+            entries[course_id] = {
+                "text_hash": content_hash(text),
+                "metadata_hash": content_hash(json.dumps(metadata, sort_keys=True)),
+            }
+            yield course_id, text, metadata
+
+    records = tracked(course_records(courses))
+
+    current_dir = current_index_dir()
+    manifest = load_manifest(current_dir)
+    vector_store = None
+    if (
+        incremental and manifest and manifest.get("embedding_model") == embedding_model_id()
+        and manifest.get("index_spec", DEFAULT_INDEX_SPEC) == format_index_spec(index_spec)
+    ):
+        vector_store = load_vector_store(path=current_dir)
+    if vector_store is not None and shard_count and not stores_full_vectors(vector_store.index):
+        # Shards are built from the embedded vectors, which a PQ index only keeps compressed
+        log.info("Sharding a compressed index needs its original vectors; rebuilding it.")
+        vector_store = None
+
+    if vector_store is not None:
+        previous = manifest["courses"]
+        kept = None if is_exact(vector_store.index) else []  # Every record, in case this becomes a rebuild
+        ids, updates = [], {}
+        for course_id, text, metadata in records:
+            ids.append(course_id)
+            if kept is not None:
+                kept.append((course_id, text, metadata))
+            if previous.get(course_id) != entries[course_id]:
+                updates[course_id] = (text, metadata)  # New, or its text or metadata changed
+
+        removed = [course_id for course_id in previous if course_id not in entries]
+        changed = [
+            course_id for course_id in ids
+            if course_id in previous and previous[course_id]["text_hash"] != entries[course_id]["text_hash"]
+        ]
+        added = [course_id for course_id in ids if course_id not in previous]
+        metadata_only = [
+            course_id for course_id in ids
+            if course_id in previous and course_id not in changed
+            and previous[course_id]["metadata_hash"] != entries[course_id]["metadata_hash"]
+        ]
+        if (removed or changed) and not is_exact(vector_store.index):
+            # HNSW can't remove vectors, and IVF keeps row ids the docstore mapping can't follow
+            log.info("Index type can't remove vectors in place; rebuilding it.")
+            vector_store = None
+            records = iter(kept)
+
+    full_build = vector_store is None
+    vectors = None
+    if full_build:
+        vector_store, vectors = build_vector_store(
+            records, index_spec, workers=workers, batch_size=batch_size, chunk_size=chunk_size,
+        )
+        log.info(
+            f"Full build: embedded {len(entries)} courses into a {format_index_spec(index_spec)} index.",
+            extra={"fields": {"embedded": len(entries), "index_spec": format_index_spec(index_spec)}},
+        )
+    else:
+        if removed or changed:
+            vector_store.delete(removed + changed)
+        to_embed = changed + added
+        if to_embed:
+            new_texts = [updates[course_id][0] for course_id in to_embed]
+            new_vectors = np.array(embeddings.embed_documents(new_texts), dtype=np.float32)
+            faiss.normalize_L2(new_vectors)
+            vector_store.add_embeddings(
+                zip(new_texts, new_vectors.tolist()),
+                metadatas=[updates[course_id][1] for course_id in to_embed], ids=to_embed
+            )
+        for course_id in metadata_only:
+            text, metadata = updates[course_id]
+            vector_store.docstore._dict[course_id] = Document(page_content=text, metadata=metadata)
+
+        log.info(
+            f"Incremental build: {len(added)} added, {len(changed)} re-embedded, "
+            f"{len(metadata_only)} metadata-only updates, {len(removed)} removed.",
+            extra={"fields": {
+                "added": len(added), "re_embedded": len(changed),
+                "metadata_only": len(metadata_only), "removed": len(removed),
+            }},
+        )
 
-    vector_store = FAISS.from_texts(texts, embeddings, metadatas=metadata)
-    vector_store.save_local("faiss_index")
-    print("Vector store created and saved successfully!")
+    version_dir = os.path.join(INDEX_PATH, VERSIONS_DIR, str(time.time_ns()))
+    save_vector_store(vector_store, version_dir)
+    rows = index_rows(vector_store)
+    write_catalog(rows, os.path.join(version_dir, CATALOG_DIR))
+    write_category_indexes(
+        build_category_indexes(vector_store, row_categories(rows)), os.path.join(version_dir, CATEGORY_INDEX_DIR)
+    )
+    lexical_index = build_lexical_index(course_text(course) for course in rows)
+    write_lexical_index(lexical_index, os.path.join(version_dir, LEXICAL_DIR))
+    if shard_count:
+        if vectors is None:
+            # Incremental update of an index that keeps full vectors; they were normalised when added
+            vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+        shard_ids = [vector_store.index_to_docstore_id[row] for row in range(vector_store.index.ntotal)]
+        write_shards(
+            os.path.join(version_dir, SHARDS_DIR), vectors, shard_ids, [course["course_category"] for course in rows],
+            shard_count, shard_by, index_spec,
+        )
+    save_manifest(version_dir, entries, index_spec)
+    publish_index_version(version_dir, current_dir)
+    if full_build:
+        shutil.rmtree(STAGING_PATH, ignore_errors=True)  # The index is saved; no build left to resume
+    log.info("Vector store created and saved successfully!")
 
-def load_vector_store():
-    """Load FAISS vector store with metadata."""
-    if not os.path.exists("faiss_index"):
-        print("Error: Vector store not found! Run vector_utils.py first.")
+def publish_index_version(version_dir, previous_dir=None):
+    """Point CURRENT at a fully written version directory, so running processes reload it.
+
+    The pointer is replaced atomically: a reader loads either the old version
+    or the new one. The previous version is kept for readers still loading
+    it; older ones, and files of the layout before versions, are removed.
+    """
+    pointer_path = os.path.join(INDEX_PATH, CURRENT_FILE)
+    with open(pointer_path + ".tmp", "w", encoding="utf-8") as file:
+        file.write(os.path.basename(version_dir))
+    os.replace(pointer_path + ".tmp", pointer_path)
+
+    versions_path = os.path.join(INDEX_PATH, VERSIONS_DIR)
+    keep = {os.path.basename(version_dir), os.path.basename(previous_dir or "")}
+    for name in os.listdir(versions_path):
+        if name not in keep:
+            shutil.rmtree(os.path.join(versions_path, name), ignore_errors=True)
+    if previous_dir != INDEX_PATH:
+        for name in LEGACY_ENTRIES:
+            path = os.path.join(INDEX_PATH, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+
+def save_vector_store(vector_store, path):
+    """Save the FAISS index and its docstore IDs in `path`, without pickling the docstore.
+
+    Documents are rebuilt from the columnar catalog on load.
+    """
+    os.makedirs(path, exist_ok=True)
+    faiss.write_index(vector_store.index, os.path.join(path, INDEX_FILE))
+    ids = [vector_store.index_to_docstore_id[row] for row in range(vector_store.index.ntotal)]
+    with open(os.path.join(path, IDS_FILE), "w", encoding="utf-8") as file:
+        json.dump(ids, file)
+
+class CatalogDocstore(Docstore):
+    """Read-only docstore that builds each Document from the columnar catalog on demand."""
+
+    def __init__(self, courses, ids):
+        self.courses = courses
+        self.rows = {doc_id: row for row, doc_id in enumerate(ids)}
+
+    def search(self, search):
+        row = self.rows.get(search)
+        if row is None:
+            return f"ID {search} not found."
+        course = self.courses[row]
+        return Document(page_content=course_text(course), metadata=course)
+
+def read_vector_store(path, mmap=False, embedding_function=None):
+    """Load an index saved by save_vector_store in `path`.
+
+    With `mmap`, the vectors are memory-mapped read-only: worker processes on one
+    host share them through the OS page cache instead of each reading a copy.
+    Otherwise the index is read into memory with a writable docstore, for updates.
+    """
+    flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    index = faiss.read_index(os.path.join(path, INDEX_FILE), flags)
+    with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as file:
+        ids = json.load(file)
+    courses = load_catalog(os.path.join(path, CATALOG_DIR))
+    if courses is None or not index.ntotal == len(ids) == len(courses):
+        raise ValueError("index, IDs and catalog are out of sync; rebuild the index")
+
+    if mmap:
+        docstore = CatalogDocstore(courses, ids)
+    else:
+        docstore = InMemoryDocstore({
+            doc_id: Document(page_content=course_text(course), metadata=course)
+            for doc_id, course in zip(ids, courses)
+        })
+    return FAISS(
+        embedding_function or embeddings, index, docstore, dict(enumerate(ids)),
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+
+def load_vector_store(embedding_function=None, mmap=False, path=None):
+    """Load FAISS vector store with metadata; see read_vector_store for `mmap`.
+
+    The store embeds text with the shared model unless `embedding_function` is
+    given. `path` defaults to the published version.
+    """
+    path = path or current_index_dir()
+    if not os.path.exists(os.path.join(path, INDEX_FILE)):
+        log.error("Vector store not found! Run vector_utils.py first.")
         return None
     
     try:
-        return FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
+        if os.path.exists(os.path.join(path, IDS_FILE)):
+            vector_store = read_vector_store(path, mmap, embedding_function)
+        else:
+            # Saved by an older version: the docstore only exists as a pickle
+            log.warning("Loading a pickled docstore. Run vector_utils.py --full to rebuild the index without it.")
+            vector_store = FAISS.load_local(
+                path, embedding_function or embeddings, allow_dangerous_deserialization=True,
+                distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+            )
     except Exception as e:
-        print(f"Error loading FAISS vector store: {e}")
+        log.exception(f"Error loading FAISS vector store: {e}")
+        return None
+
+    manifest = load_manifest(path)
+    set_search_params(vector_store.index, (manifest or {}).get("index_spec", DEFAULT_INDEX_SPEC))
+
+    if vector_store.index.metric_type != faiss.METRIC_INNER_PRODUCT:
+        # Index built before cosine scoring: convert it in memory so scores stay honest
+        log.warning("FAISS index uses L2 distance. Run vector_utils.py to rebuild it.")
+        vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+        faiss.normalize_L2(vectors)
+        vector_store.index = faiss.IndexFlatIP(vectors.shape[1])
+        vector_store.index.add(vectors)
+    return vector_store
+
+# Shared, process-wide snapshot of the vector store and course catalog.
+# A snapshot is never mutated; a rebuilt index is swapped in as a new object,
+# so requests already holding the old one keep working until they finish.
+Catalog = namedtuple(
+    "Catalog",
+    [
+        "vector_store", "courses", "categories", "category_indexes", "title_index", "structured_index",
+        "lexical_index", "shards", "version",
+    ],
+)
+
+# Exact sub-index over one category's vectors, with the main-index row of each vector.
+# `index` is None when the main index is searched with a row filter instead.
+CategoryIndex = namedtuple("CategoryIndex", ["index", "rows"])
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_last_check = 0.0
+
+def _file_stamp(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+def catalog_version():
+    """Return a version stamp for the index and catalog files on disk; it starts with the index directory."""
+    path = current_index_dir()
+    version_path = os.path.join(path, VERSION_FILE)
+    if path != INDEX_PATH:
+        index_stamp = ()  # A published version directory never changes
+    elif os.path.exists(version_path):
+        index_stamp = (_file_stamp(version_path),)
+    else:
+        # Indexes built before version stamps existed: fall back to file mtimes
+        index_stamp = (
+            _file_stamp(os.path.join(path, INDEX_FILE)),
+            _file_stamp(os.path.join(path, LEGACY_DOCSTORE_FILE)),
+        )
+    return (path,) + index_stamp + (_file_stamp(courses_path()),)
+
+def index_rows(vector_store):
+    """Course metadata in FAISS vector order, read from the docstore."""
+    return [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[row]).metadata
+        for row in range(vector_store.index.ntotal)
+    ]
+
+def row_categories(courses):
+    """Category of each catalog row, without building full course dicts when possible."""
+    if isinstance(courses, ColumnarCatalog):
+        return [courses.categories[code] for code in courses.category_codes]
+    return [course.get("course_category", "") for course in courses]
+
+def build_category_indexes(vector_store, categories):
+    """Split the FAISS index into one exact sub-index per course category.
+
+    See ann_index.category_sub_index: large categories of a PQ index get no
+    sub-index and are searched inside the main index instead.
+    """
+    index = vector_store.index
+    rows_by_category = {}
+    for row, category in enumerate(categories):
+        rows_by_category.setdefault(category.lower(), []).append(row)
+
+    vectors = None
+    if stores_full_vectors(index):
+        vectors = index.reconstruct_n(0, index.ntotal)
+        faiss.normalize_L2(vectors)
+
+    category_indexes = {}
+    for category, rows in rows_by_category.items():
+        rows = np.array(rows, dtype=np.int64)
+        category_indexes[category] = CategoryIndex(category_sub_index(index, rows, vectors), rows)
+    return category_indexes
+
+def write_category_indexes(category_indexes, path):
+    """Save the category sub-indexes and their rows at `path`, for serving memory-mapped.
+
+    Categories without a sub-index only have their rows saved. The directory
+    is swapped in like the columnar catalog: never partial, but briefly absent
+    between the two renames.
+    """
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    categories = sorted(category_indexes)
+    for number, category in enumerate(categories):
+        if category_indexes[category].index is not None:
+            faiss.write_index(category_indexes[category].index, os.path.join(tmp_path, f"{number}.faiss"))
+        np.save(os.path.join(tmp_path, f"{number}.rows.npy"), category_indexes[category].rows)
+    with open(os.path.join(tmp_path, CATEGORY_INDEX_FILE), "w", encoding="utf-8") as file:
+        size = sum(len(category_index.rows) for category_index in category_indexes.values())
+        exact = [category_indexes[category].index is not None for category in categories]
+        json.dump({"categories": categories, "exact": exact, "size": size}, file)
+
+    old_path = path + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def load_category_indexes(path, size):
+    """Memory-map the category sub-indexes saved for an index of `size` vectors; None if there are none."""
+    try:
+        with open(os.path.join(path, CATEGORY_INDEX_FILE), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if meta["size"] != size:
         return None
 
+    flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+    exact = meta.get("exact", [True] * len(meta["categories"]))
+    return {
+        category: CategoryIndex(
+            faiss.read_index(os.path.join(path, f"{number}.faiss"), flags) if has_index else None,
+            np.load(os.path.join(path, f"{number}.rows.npy"), mmap_mode="r"),
+        )
+        for number, (category, has_index) in enumerate(zip(meta["categories"], exact))
+    }
+
+def _load_catalog(version):
+    path = version[0]  # Everything is read from this one version, even if a newer one is published meanwhile
+    vector_store = load_vector_store(mmap=MMAP_INDEX, path=path)
+
+    category_indexes = {}
+    if vector_store:
+        # Catalog rows line up with FAISS vector positions
+        courses = load_catalog(os.path.join(path, CATALOG_DIR))
+        if courses is None or len(courses) != vector_store.index.ntotal:
+            courses = index_rows(vector_store)
+        course_categories = row_categories(courses)
+        category_indexes = None
+        if MMAP_INDEX:
+            # Map the sub-indexes saved with the index, so a category search only scans its category
+            category_indexes = load_category_indexes(os.path.join(path, CATEGORY_INDEX_DIR), vector_store.index.ntotal)
+            if category_indexes is None:
+                log.warning("No saved category indexes; copying them into memory. Run vector_utils.py to save them.")
+        if category_indexes is None:
+            category_indexes = build_category_indexes(vector_store, course_categories)
+    else:
+        courses = load_course_metadata()
+        course_categories = row_categories(courses)
+
+    categories = {category.title() for category in course_categories if category}
+    title_index = TitleIndex(courses)
+    structured_index = StructuredIndex(courses)
+
+    lexical_index = load_lexical_index(os.path.join(path, LEXICAL_DIR)) if vector_store else None
+    if lexical_index is None or len(lexical_index) != len(courses):
+        # No saved BM25 index for these rows (older index or no index at all): build one in memory
+        lexical_index = build_lexical_index(course_text(course) for course in courses)
+
+    shards = None
+    if vector_store and SHARD_COUNT:
+        meta = load_shard_meta(os.path.join(path, SHARDS_DIR))
+        if meta is not None and meta["size"] == vector_store.index.ntotal:
+            shards = ShardCoordinator(os.path.join(path, SHARDS_DIR))  # Workers start on the first search
+        else:
+            log.warning("FAISS_SHARDS is set but no shards match the index; searching the single index.")
+    return Catalog(
+        vector_store, courses, sorted(categories), category_indexes, title_index, structured_index,
+        lexical_index, shards, version,
+    )
+
+def get_catalog():
+    """Return the shared catalog, reloading it once if the files on disk changed."""
+    global _catalog, _last_check
+
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - _last_check < RELOAD_CHECK_INTERVAL:
+        return catalog
+
+    with _catalog_lock:
+        _last_check = time.monotonic()
+        version = catalog_version()
+        if _catalog is None or _catalog.version != version:
+            new_catalog = _load_catalog(version)
+            # Keep serving the previous index if the new one failed to load
+            if new_catalog.vector_store is not None or _catalog is None:
+                _catalog = new_catalog
+        return _catalog
+
+def search_vectors(catalog, query_vecs, category=None, k=10, threshold=0.0):
+    """Search a matrix of query vectors with one FAISS call.
+
+    Returns one best-first list per query of course metadata plus "score".
+    """
+    results = search_vector_rows(catalog, query_vecs, category, k, threshold)
+    with STAGE_SECONDS.time(stage="metadata_filter"):
+        return [[dict(catalog.courses[row], score=score) for row, score in matches] for matches in results]
+
+def search_vector_rows(catalog, query_vecs, category=None, k=10, threshold=0.0):
+    """Like search_vectors, but returns (catalog row, score) pairs."""
+    if catalog.shards is not None:
+        queries = np.array(query_vecs, dtype=np.float32)
+        faiss.normalize_L2(queries)
+        with STAGE_SECONDS.time(stage="faiss_search"):
+            scores, rows = catalog.shards.search(queries, k, category)
+        return _threshold_rows(scores, rows, None, threshold)
+
+    if category:
+        # Search the category's exact sub-index so small categories still get k results
+        category_index = catalog.category_indexes.get(category.lower())
+        if category_index is None:
+            return [[] for _ in query_vecs]
+        if category_index.index is None:
+            index, row_map = catalog.vector_store.index, None
+            params = restricted_search_params(index, category_index.rows)
+        else:
+            index, row_map, params = category_index.index, category_index.rows, None
+    else:
+        index, row_map, params = catalog.vector_store.index, None, None
+
+    if index.ntotal == 0:
+        return [[] for _ in query_vecs]
+
+    queries = np.array(query_vecs, dtype=np.float32)
+    faiss.normalize_L2(queries)
+    with STAGE_SECONDS.time(stage="faiss_search"):
+        scores, rows = index.search(queries, min(k, index.ntotal), params=params)
+    return _threshold_rows(scores, rows, row_map, threshold)
+
+def _threshold_rows(scores, rows, row_map, threshold):
+    results = []
+    for query_scores, query_rows in zip(scores, rows):
+        matches = []
+        for score, row in zip(query_scores, query_rows):
+            # Results come back best-first, so stop at the first one below the threshold
+            if row == -1 or score < threshold:
+                break
+            matches.append((int(row if row_map is None else row_map[row]), float(score)))
+        results.append(matches)
+    return results
+
 def search_courses(query, category=None, k=10, threshold=0.7):
-    """Retrieve courses with category filtering and similarity threshold."""
-    vector_store = load_vector_store()
-    if not vector_store:
+    """Retrieve courses with category filtering and a cosine similarity threshold.
+
+    Each result is the course metadata plus its similarity under "score".
+    """
+    catalog = get_catalog()
+    if not catalog.vector_store:
         return "Error: Vector store not found."
     
     query_vec = query_embedding(query, category)
-    results = vector_store.similarity_search_by_vector(query_vec, k=k)
-    
-    filtered_results = []
-    for res in results:
-        metadata = res.metadata
-        similarity = res.score if hasattr(res, 'score') else 1.0  # Default to 1 if no score
-        if category and metadata.get("course_category", "").lower() != category.lower():
-            continue  # Skip if category doesn't match
-        if similarity >= threshold:
-            filtered_results.append(metadata)
+    filtered_results = search_vectors(catalog, [query_vec], category, k, threshold)[0]
     
     return filtered_results if filtered_results else "No relevant courses found."
 
+def fuse_rankings(rankings, k):
+    """Reciprocal-rank fusion of best-first row lists; returns [(row, fused score)] best-first."""
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
 
-if __name__ == "__main__":
-    print("Loading preprocessed courses...")
-    try:
-        with open("processed_courses.json", "r", encoding="utf-8") as file:
-            courses = json.load(file)
-        
-        if not courses:
-            print("Error: No courses found!")
-            exit()
+def hybrid_search(query, category=None, k=10, threshold=0.7):
+    """Retrieve courses with BM25 and FAISS, fused by reciprocal rank.
+
+    A confident keyword match (see LexicalIndex.search) is answered from BM25
+    alone, without embedding the query. Each result is the course metadata
+    plus its fused "score", its cosine "similarity" (None if only BM25 found
+    it) and its "bm25" score (None if only FAISS found it). The threshold
+    applies to the dense results.
+    """
+    catalog = get_catalog()
+    if not catalog.vector_store:
+        return "Error: Vector store not found."
+
+    fused, similarity, bm25 = hybrid_search_rows(catalog, query, category, k, threshold)
+    with STAGE_SECONDS.time(stage="metadata_filter"):
+        results = [
+            dict(catalog.courses[row], score=score, similarity=similarity.get(row), bm25=bm25.get(row))
+            for row, score in fused
+        ]
+    return results if results else "No relevant courses found."
+
+def hybrid_search_rows(catalog, query, category=None, k=10, threshold=0.7):
+    """Like hybrid_search, but returns ([(catalog row, fused score)], similarity by row, bm25 by row)."""
+    rows = None
+    if category:
+        category_index = catalog.category_indexes.get(category.lower())
+        if category_index is None:
+            return [], {}, {}
+        rows = category_index.rows
+
+    with STAGE_SECONDS.time(stage="lexical_search"):
+        lexical, confident = catalog.lexical_index.search(query, max(k, HYBRID_CANDIDATES), rows)
+    bm25 = dict(lexical)
+
+    if confident and LEXICAL_FAST_PATH:
+        RETRIEVAL_PATH_TOTAL.inc(path="lexical")
+        fused, similarity = fuse_rankings([[row for row, _ in lexical]], k), {}
+    else:
+        RETRIEVAL_PATH_TOTAL.inc(path="hybrid")
+        query_vec = query_embedding(query, category)
+        dense = search_vector_rows(catalog, [query_vec], category, max(k, HYBRID_CANDIDATES), threshold)[0]
+        similarity = dict(dense)
+        fused = fuse_rankings([[row for row, _ in dense], [row for row, _ in lexical]], k)
+    return fused, similarity, bm25
+
+def batch_query_embeddings(queries, category=None):
+    """Embed many queries with a single model call, reusing cached embeddings."""
+    keys = [normalize_key(query, category) for query in queries]
+    vectors = [embedding_cache.get(key) for key in keys]
+
+    # Embed each distinct uncached query once
+    missing = {}
+    for query, key, vector in zip(queries, keys, vectors):
+        if vector is None and key not in missing:
+            missing[key] = query
+
+    EMBEDDING_CACHE_TOTAL.inc(len(queries) - len(missing), result="hit")
+    if missing:
+        EMBEDDING_CACHE_TOTAL.inc(len(missing), result="miss")
+        category_text = f"Category: {category}\n" if category else ""
+        with STAGE_SECONDS.time(stage="embedding"):
+            new_vectors = embeddings.embed_documents([category_text + query for query in missing.values()])
+        for key, vector in zip(missing, new_vectors):
+            embedding_cache.put(key, vector)
+            missing[key] = vector
+        vectors = [missing[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+
+    return np.array(vectors, dtype=np.float32)
 
-        print(f"Loaded {len(courses)} courses. Creating vector store...")
-        create_vector_store(courses)
-        print("Vector store successfully created!")
+def search_courses_batch(queries, category=None, k=10, threshold=0.7):
+    """Retrieve courses for many queries with one embedding call and one FAISS search.
 
+    Returns one list of scored course metadata per query, in the same order;
+    a query with no match above the threshold gets an empty list.
+    """
+    catalog = get_catalog()
+    if not catalog.vector_store:
+        return "Error: Vector store not found."
+    if not queries:
+        return []
+
+    # Answer repeated queries from the cache and search only the rest
+    keys = [f"search\n{k}\n{threshold}\n{normalize_key(query, category)}" for query in queries]
+    results = [answer_cache.get(key, catalog.version) for key in keys]
+    missing = {}
+    for query, key, result in zip(queries, keys, results):
+        if result is None and key not in missing:
+            missing[key] = query
+
+    ANSWER_CACHE_TOTAL.inc(len(queries) - len(missing), result="hit")
+    if missing:
+        ANSWER_CACHE_TOTAL.inc(len(missing), result="miss")
+        query_vecs = batch_query_embeddings(list(missing.values()), category)
+        for key, courses in zip(missing, search_vectors(catalog, query_vecs, category, k, threshold)):
+            answer_cache.put(key, catalog.version, courses)
+            missing[key] = courses
+        results = [missing[key] if result is None else result for key, result in zip(keys, results)]
+
+    return results
+
+_warmed_up = threading.Event()
+
+def warm_up():
+    """Run one query end to end, so the first user request doesn't pay for lazy setup."""
+    catalog = get_catalog()
+    vector = get_embeddings().embed_query(WARM_UP_QUERY)  # Bypasses the cache so the model really runs
+    if catalog.vector_store:
+        search_vectors(catalog, [vector], k=1)
+    _warmed_up.set()
+
+def initialize(warm=True):
+    """Load the embedding model and the catalog once per process, then optionally warm up.
+
+    A pre-forking server loads with warm=False in its master process and calls
+    warm_up() in each worker after the fork: the workers share the loaded model
+    and index copy-on-write, and inference thread pools started before a fork
+    can deadlock in the children.
+    """
+    get_embeddings()
+    get_catalog()
+    if warm:
+        warm_up()
+
+def readiness():
+    """Report what this process has loaded, without triggering any loading."""
+    catalog = _catalog
+    status = {
+        "model_loaded": _embeddings is not None,
+        "vector_store_loaded": catalog is not None and catalog.vector_store is not None,
+        "warmed_up": _warmed_up.is_set(),
+    }
+    status["ready"] = all(status.values())
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the FAISS course index.")
+    parser.add_argument("--index-spec", default=INDEX_SPEC, help="Index type and tuning, e.g. 'ivfpq:nlist=256,m=16'")
+    parser.add_argument("--full", action="store_true", help="Re-embed every course instead of updating the index")
+    parser.add_argument("--shards", type=int, default=SHARD_COUNT, help="Also split the index into N shards")
+    parser.add_argument("--shard-by", choices=["hash", "category"], default=SHARD_BY)
+    parser.add_argument("--workers", type=int, default=EMBEDDING_WORKERS, help="Embedding processes for a full build")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="Texts per model call")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Texts per checkpointed chunk")
+    args = parser.parse_args()
+
+    log.info("Streaming preprocessed courses into the vector store...")
+    try:
+        courses = iter_course_metadata()
+        first = next(courses, None)
     except FileNotFoundError:
-        print("Error: processed_courses.json not found! Run data_preprocessing.py first.")
+        first = None
+    if first is None:
+        log.error("No courses found! Run data_preprocessing.py first.")
+        exit()
+
+    create_vector_store(
+        itertools.chain([first], courses), incremental=not args.full, index_spec=args.index_spec, shard_count=args.shards, shard_by=args.shard_by,
+        workers=args.workers, batch_size=args.batch_size, chunk_size=args.chunk_size,
+    )
+    log.info("Vector store successfully created!")
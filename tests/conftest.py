@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+# Modules in src/ import each other by bare name, so put src/ on the path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+VOCAB = ["python", "java", "robotics", "kids", "games", "camp"]
+
+def course(title, category, description="", price=30, lessons=10):
+    return {
+        "title": title, "description": description, "price_per_session": f"${price} per session",
+        "number_of_lessons": lessons, "total_price": price * lessons, "course_category": category,
+    }
+
+class FakeEmbeddings(Embeddings):
+    """Word counts over VOCAB, so similar texts get similar vectors; records every text embedded."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def vector(self, text):
+        words = text.lower().replace(":", " ").split()
+        return [float(words.count(word)) for word in VOCAB] + [0.1]
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.vector(text)
+
+@pytest.fixture
+def courses():
+    return [
+        course("Python Playground", "Python", "python games for kids", price=25),
+        course("Python Pro", "Python", "python for teens", price=30),
+        course("Java Basics", "Java", "java for kids", price=30, lessons=8),
+        course("Java Games", "Java", "java games", price=35),
+        course("Robotics Camp", "Robotics", "robotics camp for kids", price=40, lessons=5),
+    ]
+
+@pytest.fixture
+def fake_model(tmp_path, monkeypatch):
+    """Run vector_utils in an empty directory with a fake model and fresh caches."""
+    import vector_utils
+    from answer_cache import AnswerCache
+    from embedding_cache import EmbeddingCache
+    from semantic_cache import SemanticCache
+
+    monkeypatch.chdir(tmp_path)
+    model = FakeEmbeddings()
+    monkeypatch.setattr(vector_utils, "embeddings", model)
+    monkeypatch.setattr(vector_utils, "embedding_cache", EmbeddingCache("fake"))
+    monkeypatch.setattr(vector_utils, "answer_cache", AnswerCache())
+    monkeypatch.setattr(vector_utils, "semantic_cache", SemanticCache(max_size=0))  # Off, as by default
+    monkeypatch.setattr(vector_utils, "_catalog", None)
+    monkeypatch.setattr(vector_utils, "_last_check", 0.0)
+    monkeypatch.setattr(vector_utils, "LEXICAL_FAST_PATH", False)
+    return model
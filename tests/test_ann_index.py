@@ -0,0 +1,45 @@
+import faiss
+import numpy as np
+import pytest
+
+from ann_index import (
+    format_index_spec, is_exact, new_index, parse_index_spec, restricted_search_params, stores_full_vectors
+)
+
+def random_vectors(count, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def test_parse_spec():
+    spec = parse_index_spec("IVFPQ:nlist=64,m=8")
+    assert spec == {"type": "ivfpq", "nlist": 64, "nprobe": 8, "m": 8, "nbits": 8}
+    assert format_index_spec("ivf:nprobe=4") == "ivf:nlist=100,nprobe=4"
+    assert format_index_spec("flat") == "flat"
+    with pytest.raises(ValueError):
+        parse_index_spec("ivf:m=8")
+    with pytest.raises(ValueError):
+        parse_index_spec("lsh")
+
+@pytest.mark.parametrize("spec", ["hnsw:m=8", "ivf:nlist=8,nprobe=8", "ivfpq:nlist=4,nprobe=4,m=8,nbits=4"])
+def test_approximate_indexes(spec):
+    vectors = random_vectors(500)
+    index = new_index(spec, vectors)
+    index.add(vectors)
+    assert not is_exact(index)
+    assert index.reconstruct_n(0, 3).shape == (3, 32)  # Category splits need row reconstruction
+    # Only PQ codes lose precision, so only then do shards need the original vectors
+    assert stores_full_vectors(index) == (not spec.startswith("ivfpq"))
+
+    _, rows = index.search(vectors[:1], 1)
+    assert rows[0][0] == 0
+
+    params = restricted_search_params(index, range(100, 150))
+    _, rows = index.search(vectors[120:121], 5, params=params)
+    assert rows[0][0] == 120
+    assert all(100 <= row < 150 for row in rows[0] if row != -1)
+
+def test_small_catalog_lowers_training_targets():
+    index = new_index("ivf:nlist=100", random_vectors(50))
+    assert faiss.extract_index_ivf(index).nlist == 1
+    assert is_exact(new_index("flat", random_vectors(5)))
@@ -0,0 +1,27 @@
+from answer_cache import AnswerCache
+
+def test_lru_and_ttl():
+    cache = AnswerCache(max_size=2)
+    cache.put("a", 1, "answer a")
+    cache.put("b", 1, "answer b")
+    assert cache.get("a", 1) == "answer a"  # "a" is now most recent
+    cache.put("c", 1, "answer c")
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "answer a"
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+    expired = AnswerCache(ttl=0)
+    expired.put("a", 1, "answer a")
+    assert expired.get("a", 1) is None
+    assert expired.stats()["size"] == 0
+
+def test_new_version_invalidates():
+    cache = AnswerCache()
+    cache.put("list all courses", (1,), "old listing")
+    assert cache.get("list all courses", (2,)) is None
+    assert cache.stats()["invalidations"] == 1
+
+    cache.put("list all courses", (2,), "new listing")
+    assert cache.get("list all courses", (2,)) == "new listing"
@@ -0,0 +1,90 @@
+import gc
+import importlib
+import importlib.util
+import os
+import threading
+
+import pytest
+
+import instrumentation
+import vector_utils
+
+def fake_search_batch(queries, category=None, k=5, threshold=0.4):
+    return [[{"title": f"{query} course", "course_category": category}] for query in queries]
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(vector_utils, "initialize", lambda warm=True: None)  # app.py loads the model at import
+    app = importlib.import_module("app")
+    monkeypatch.setattr(app, "search_courses_batch", fake_search_batch)
+    monkeypatch.setattr(app, "readiness", lambda: {"ready": True})
+    return app.app.test_client()
+
+def test_search_batch(client):
+    response = client.post("/api/search/batch", json={"queries": ["python", "java"], "category": "Python", "k": 2})
+    assert response.status_code == 200
+    assert [result["courses"][0]["title"] for result in response.get_json()["results"]] == [
+        "python course", "java course",
+    ]
+
+@pytest.mark.parametrize("payload", [
+    ["python"],
+    "python",
+    {"queries": ["python"], "category": ["Python"]},
+    {"queries": ["python"], "category": {"name": "Python"}},
+    {"queries": ["python"], "k": 0},
+    {"queries": []},
+])
+def test_search_batch_rejects_bad_payloads(client, payload):
+    response = client.post("/api/search/batch", json=payload)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+def test_chat_rejects_non_object_body(client):
+    assert client.post("/api/chat", json=["python"]).status_code == 400
+
+def test_requests_before_readiness_get_503(client, fake_model, courses, monkeypatch):
+    app = importlib.import_module("app")
+    monkeypatch.setattr(app, "readiness", vector_utils.readiness)
+    monkeypatch.setattr(vector_utils, "_embeddings", None)
+    monkeypatch.setattr(vector_utils, "_warmed_up", threading.Event())
+    monkeypatch.setattr(vector_utils, "load_embeddings", lambda backend=None: fake_model)
+    monkeypatch.setattr(app, "retrieve_courses", lambda query: f"answer to {query}")
+
+    response = client.get("/ready")
+    assert response.status_code == 503 and response.get_json()["ready"] is False
+    for response in [client.post("/api/chat", json={"query": "python"}), client.post("/api/search/batch", json={})]:
+        assert response.status_code == 503 and response.headers["Retry-After"]
+        assert "starting up" in response.get_json()["error"]
+    assert client.post("/", data={"query": "python"}).status_code == 503
+    assert client.get("/").status_code == 200  # The form itself needs no model
+    assert vector_utils._embeddings is None  # Nothing was loaded inside a request
+
+    vector_utils.create_vector_store(courses, incremental=False)
+    vector_utils.get_embeddings()
+    vector_utils.get_catalog()
+    vector_utils.warm_up()
+    assert client.get("/ready").status_code == 200
+    response = client.post("/api/chat", json={"query": "python"})
+    assert response.status_code == 200 and response.get_json()["answer"] == "answer to python"
+
+def test_gunicorn_hooks_freeze_the_heap_and_warm_up_each_worker(monkeypatch, tmp_path):
+    monkeypatch.setenv("PRELOAD_MODELS", "1")
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path / "metrics"))
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "gunicorn.conf.py")
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", path)
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    assert config.preload_app
+
+    config.when_ready(None)
+    try:
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+    warmed = []
+    monkeypatch.setattr(vector_utils, "warm_up", lambda: warmed.append("warm_up"))
+    monkeypatch.setattr(instrumentation, "reset_metrics", lambda: warmed.append("reset_metrics"))
+    config.post_fork(None, None)
+    assert warmed == ["reset_metrics", "warm_up"]
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import pytest
+
+import asgi
+from batching import MicroBatcher
+
+def fake_search_batch(queries, category=None, k=5, threshold=0.4):
+    return [[{"title": f"{query} course", "course_category": category}] for query in queries]
+
+def call(path, body, method="POST"):
+    """Send one request through the ASGI app; returns (status, JSON body)."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def main():
+        await asgi.app({"type": "http", "path": path, "method": method}, receive, send)
+        await asgi.batcher.stop()
+
+    asyncio.run(main())
+    return messages[0]["status"], json.loads(messages[1]["body"])
+
+@pytest.fixture(autouse=True)
+def fake_search(monkeypatch):
+    monkeypatch.setattr(asgi, "search_courses_batch", fake_search_batch)
+    monkeypatch.setattr(asgi, "batcher", MicroBatcher(fake_search_batch, max_wait_ms=1))
+
+def test_search_and_batch():
+    status, payload = call("/api/search", json.dumps({"query": "python", "category": "Python"}).encode())
+    assert status == 200
+    assert payload["courses"] == [{"title": "python course", "course_category": "Python"}]
+
+    status, payload = call("/api/search/batch", json.dumps({"queries": ["python", "java"], "k": 2}).encode())
+    assert status == 200
+    assert [result["query"] for result in payload["results"]] == ["python", "java"]
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/search", {"query": "x", "category": ["ai"]}),
+    ("/api/search", ["python"]),
+    ("/api/search", {"query": ""}),
+    ("/api/search", {"query": "x", "k": 0}),
+    ("/api/search/batch", {"queries": ["x"], "category": {"name": "ai"}}),
+    ("/api/search/batch", "python"),
+    ("/api/search/batch", {"queries": []}),
+])
+def test_bad_requests_get_400(path, body):
+    status, payload = call(path, json.dumps(body).encode())
+    assert status == 400 and "error" in payload
+
+def test_malformed_json_and_unknown_route():
+    assert call("/api/search", b"{not json")[0] == 400
+    assert call("/missing", b"", method="GET")[0] == 404
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from batching import MicroBatcher
+
+def test_concurrent_requests_share_a_call():
+    calls = []
+
+    def search_batch(queries, category, k, threshold):
+        calls.append((list(queries), category))
+        return [[f"{query} result"] for query in queries]
+
+    async def main():
+        batcher = MicroBatcher(search_batch, max_wait_ms=50)
+        results = await asyncio.gather(
+            batcher.submit("python"), batcher.submit("java"), batcher.submit("roblox", category="Game"),
+        )
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(main()) == [["python result"], ["java result"], ["roblox result"]]
+    assert sorted(calls, key=str) == [(["python", "java"], None), (["roblox"], "Game")]
+
+def test_bad_request_fails_alone():
+    def search_batch(queries, category, k, threshold):
+        if queries == ["broken"]:
+            raise ValueError("search failed")
+        return [[query] for query in queries]
+
+    async def main():
+        batcher = MicroBatcher(search_batch, max_wait_ms=10)
+        with pytest.raises(TypeError):
+            await batcher.submit("x", category=["ai"])  # Unhashable
+        with pytest.raises(ValueError):
+            await batcher.submit("broken")
+        # The batching loop is still running
+        result = await asyncio.wait_for(batcher.submit("python"), 1)
+        await batcher.stop()
+        return result
+
+    assert asyncio.run(main()) == ["python"]
@@ -0,0 +1,64 @@
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+import instrumentation
+import vector_utils
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import run_benchmarks
+from synthetic_catalog import load_seed_courses, synthetic_courses
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(vector_utils, "initialize", lambda warm=True: None)  # app.py loads the model at import
+    app = importlib.import_module("app")
+    monkeypatch.setattr(app, "readiness", lambda: {"ready": True})
+    return app.app.test_client()
+
+def branch_count(branch):
+    state = instrumentation.BRANCH_SECONDS.series.get((branch,))
+    return state[2] if state else 0
+
+def test_synthetic_catalog_scales_the_seed_courses():
+    seed = load_seed_courses()
+    courses = list(synthetic_courses(seed, 3 * len(seed) + 1))
+    assert len(courses) == 3 * len(seed) + 1
+    assert len({course["title"] for course in courses}) == len(courses)
+    assert all(
+        course["total_price"] == int(course["price_per_session"][1:].split()[0]) * course["number_of_lessons"]
+        for course in courses
+    )
+    assert {course["course_category"] for course in courses} == {course["course_category"] for course in seed}
+    assert list(synthetic_courses(seed, 10, seed=1)) == list(synthetic_courses(seed, 10, seed=1))
+
+def test_every_benchmark_query_is_answered_by_its_branch(client, fake_model):
+    courses = list(synthetic_courses(load_seed_courses(), 150))
+    vector_utils.create_vector_store(courses, incremental=False)
+
+    for branch, query in run_benchmarks.branch_queries(courses).items():
+        before = branch_count(branch)
+        response = client.post("/api/chat", json={"query": query})
+        assert response.status_code == 200
+        assert response.get_json()["answer"]
+        assert branch_count(branch) == before + 1, f"{query!r} was not answered by {branch}"
+
+def test_compare_flags_only_real_regressions(tmp_path):
+    def timing(p50_ms):
+        return {"p50_ms": p50_ms}
+
+    baseline = {"commit": "abc123", "stages": {"faiss_search": timing(1.0), "tiny": timing(0.01)}, "branches": {}}
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(baseline), encoding="utf-8")
+
+    results = {
+        "stages": {"faiss_search": timing(1.5), "tiny": timing(0.03), "new_stage": timing(5.0)},
+        "branches": {},
+    }
+    assert run_benchmarks.compare(results, str(baseline_path)) == ["faiss_search"]
+    results["stages"]["faiss_search"] = timing(1.1)
+    assert run_benchmarks.compare(results, str(baseline_path)) == []
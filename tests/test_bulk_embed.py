@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from bulk_embed import embed_texts
+
+TEXTS = [f"course {n}" for n in range(10)]
+
+def fake_embed(texts):
+    return [[float(text.split()[1]), 1.0] for text in texts]
+
+def test_resumes_from_last_checkpoint(tmp_path):
+    staging = str(tmp_path / "staging")
+    embedded = []
+
+    def crash_after_six(texts):
+        if len(embedded) >= 6:
+            raise RuntimeError("killed")
+        embedded.extend(texts)
+        return fake_embed(texts)
+
+    with pytest.raises(RuntimeError):
+        embed_texts(TEXTS, "v1", "model", staging, embed=crash_after_six, batch_size=2, chunk_size=2, checkpoint_every=2)
+
+    resumed = []
+
+    def record(texts):
+        resumed.extend(texts)
+        return fake_embed(texts)
+
+    vectors = embed_texts(TEXTS, "v1", "model", staging, embed=record, batch_size=2, chunk_size=2, checkpoint_every=2)
+    assert resumed == TEXTS[4:]  # Chunks 0-1 were checkpointed; chunk 2 was written after the checkpoint
+    np.testing.assert_array_equal(vectors, np.array(fake_embed(TEXTS), dtype=np.float32))
+
+def test_changed_texts_start_over(tmp_path):
+    staging = str(tmp_path / "staging")
+    embed_texts(TEXTS, "v1", "model", staging, embed=fake_embed, chunk_size=4)
+
+    calls = []
+
+    def record(texts):
+        calls.extend(texts)
+        return fake_embed(texts)
+
+    embed_texts(TEXTS, "v2", "model", staging, embed=record, chunk_size=4)
+    assert calls == TEXTS
+
+def test_streamed_texts_resume_after_the_unchanged_chunks(tmp_path):
+    staging = str(tmp_path / "staging")
+    embed_texts(iter(TEXTS), None, "model", staging, embed=fake_embed, chunk_size=2, checkpoint_every=1)
+
+    calls = []
+
+    def record(texts):
+        calls.extend(texts)
+        return fake_embed(texts)
+
+    changed = TEXTS[:5] + ["course 50"] + TEXTS[6:]
+    vectors = embed_texts((text for text in changed), None, "model", staging, embed=record, chunk_size=2)
+    assert calls == changed[4:]  # Chunks 0-1 are unchanged; chunk 2 holds the changed text
+    np.testing.assert_array_equal(vectors, np.array(fake_embed(changed), dtype=np.float32))
@@ -0,0 +1,31 @@
+from catalog_store import ColumnarCatalog, load_catalog, write_catalog
+
+COURSES = [
+    {"title": "AI Pro Camp", "description": "Career Growth Catalyst", "price_per_session": "$30 per session",
+     "number_of_lessons": 10, "total_price": 300, "course_category": "AI"},
+    {"title": "LEARN ROBOTICS", "description": "", "price_per_session": "$25 per session",
+     "number_of_lessons": 25, "total_price": 625, "course_category": "Robotics"},
+    {"title": "Café Python ☕", "description": "Unicode survives the blob", "price_per_session": "$35 per session",
+     "number_of_lessons": 4, "total_price": 140, "course_category": "AI"},
+]
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "catalog")
+    write_catalog(COURSES, path)
+    catalog = load_catalog(path)
+
+    assert isinstance(catalog, ColumnarCatalog)
+    assert len(catalog) == 3
+    assert list(catalog) == COURSES
+    assert catalog[-1]["title"] == "Café Python ☕"
+    assert catalog.columns["total_price"].tolist() == [300, 625, 140]
+    assert catalog.categories == ["AI", "Robotics"]
+
+def test_rewrite_replaces_catalog(tmp_path):
+    path = str(tmp_path / "catalog")
+    write_catalog(COURSES, path)
+    write_catalog(COURSES[:1], path)
+    assert list(load_catalog(path)) == COURSES[:1]
+
+def test_missing_catalog(tmp_path):
+    assert load_catalog(str(tmp_path / "nothing")) is None
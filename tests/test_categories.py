@@ -0,0 +1,22 @@
+from categories import course_matcher, query_matcher, DEFAULT_CATEGORY
+from data_preprocessing import categorize_course
+
+def test_keywords_match_whole_words_only():
+    assert categorize_course("LEARN JAVASCRIPT", "JavaScript powers the web") == "Web Development"
+    assert categorize_course("Maintain your garden", "A relaxing course") == DEFAULT_CATEGORY
+
+def test_table_order_breaks_ties():
+    assert course_matcher.match("Python and Java for beginners") == "Python"
+
+def test_title_keywords_outrank_description():
+    assert categorize_course("HTML, CSS, JavaScript", "Build websites from scratch") == "Web Development"
+
+def test_multi_word_keywords():
+    assert categorize_course("Intro course", "Learn machine learning basics") == "AI"
+    assert categorize_course("Intro course", "Learn machine basics") == DEFAULT_CATEGORY
+
+def test_query_matcher_uses_names_and_keywords():
+    allowed = {"ai", "cloud computing", "game development"}
+    assert query_matcher.match("list cloud computing courses", allowed=allowed) == "Cloud Computing"
+    assert query_matcher.match("any minecraft classes?", allowed=allowed) == "Game Development"
+    assert query_matcher.match("list python courses", allowed=allowed) is None
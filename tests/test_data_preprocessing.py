@@ -0,0 +1,31 @@
+import os
+
+from data_preprocessing import (
+    iter_courses, iter_courses_from_pages, preprocess_data,
+    read_courses_ndjson, write_courses_ndjson,
+)
+
+PAGE = (
+    "Courses header$30per sessionLEARN ROBOTICS\nBuild robots step by step 25 LessonsView Details"
+    "$35per sessionAI Pro Camp: Career Growth Catalyst 10 LessonsView Details footer"
+)
+
+def test_preprocess_data_extracts_courses():
+    courses = preprocess_data(PAGE)
+    assert [course["title"] for course in courses] == ["LEARN ROBOTICS", "AI Pro Camp"]
+    assert courses[1]["total_price"] == 350
+    assert courses[1]["price_per_session"] == "$35 per session"
+
+def test_chunked_stream_matches_whole_page():
+    for size in (1, 7, 64):
+        chunks = [PAGE[i:i + size] for i in range(0, len(PAGE), size)]
+        assert list(iter_courses(chunks)) == preprocess_data(PAGE)
+
+def test_pages_are_parsed_independently():
+    courses = list(iter_courses_from_pages([PAGE, iter(PAGE)]))
+    assert courses == preprocess_data(PAGE) * 2
+
+def test_ndjson_round_trip(tmp_path):
+    path = os.path.join(tmp_path, "courses.jsonl")
+    assert write_courses_ndjson(iter_courses([PAGE]), path) == 2
+    assert list(read_courses_ndjson(path)) == preprocess_data(PAGE)
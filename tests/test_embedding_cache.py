@@ -0,0 +1,99 @@
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache, normalize_key
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+def test_normalize_key_ignores_case_and_spacing():
+    assert normalize_key("List  AI courses ", "AI") == normalize_key("list ai courses", "ai")
+    assert normalize_key("list ai courses", "AI") != normalize_key("list ai courses")
+
+def test_lru_evicts_least_recently_used():
+    cache = EmbeddingCache(MODEL, max_size=2)
+    cache.put("a", [1.0, 0.0])
+    cache.put("b", [0.0, 1.0])
+    assert cache.get("a") is not None  # "a" is now most recent
+    cache.put("c", [1.0, 1.0])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+def test_disk_store_survives_restart(tmp_path):
+    cache = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=8)
+    cache.put("list ai courses", [0.5, 0.25, 0.125])
+    cache.flush()
+
+    reopened = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=8)
+    np.testing.assert_allclose(reopened.get("list ai courses"), [0.5, 0.25, 0.125])
+    assert reopened.stats()["disk_hits"] == 1
+
+def test_model_change_invalidates_disk_store(tmp_path, caplog, monkeypatch):
+    cache = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=8)
+    cache.put("list ai courses", [0.5, 0.25, 0.125])
+    cache.flush()
+
+    monkeypatch.setattr(logging.getLogger("courses"), "propagate", True)  # Let caplog see the JSON logger
+    with caplog.at_level(logging.WARNING, logger="courses.embedding_cache"):
+        other = EmbeddingCache("another-model", path=str(tmp_path), disk_capacity=8)
+    assert other.get("list ai courses") is None
+    assert "built for another model" in caplog.text
+
+def test_reused_row_is_not_served_for_evicted_key(tmp_path):
+    cache = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=2)
+    cache.put("a", [1.0, 0.0])
+    cache.put("b", [0.0, 1.0])
+    cache.flush()
+    cache.put("c", [1.0, 1.0])  # Reuses "a"'s row without flushing the index
+
+    reopened = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=2)
+    assert reopened.get("a") is None
+    np.testing.assert_allclose(reopened.get("b"), [0.0, 1.0])
+
+def test_get_returns_a_copy(tmp_path):
+    cache = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=8)
+    cache.put("a", [1.0, 0.0])
+    cache.get("a")[0] = 5.0
+    np.testing.assert_allclose(cache.get("a"), [1.0, 0.0])
+
+def test_caches_sharing_a_directory_do_not_overwrite_each_other(tmp_path):
+    first = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=8)
+    second = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=8)
+    for n in range(3):
+        first.put(f"first {n}", [1.0, float(n)])
+        second.put(f"second {n}", [2.0, float(n)])
+    second.flush()
+    first.flush()  # Flushed last, but keeps the second cache's keys
+
+    reopened = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=8)
+    for n in range(3):
+        np.testing.assert_allclose(reopened.get(f"first {n}"), [1.0, float(n)])
+        np.testing.assert_allclose(reopened.get(f"second {n}"), [2.0, float(n)])
+    assert reopened.stats()["disk_hits"] == 6
+
+def put_many(path, worker, count):
+    cache = EmbeddingCache(MODEL, path=path, disk_capacity=64, flush_every=7)
+    for n in range(count):
+        cache.put(f"{worker} {n}", [float(worker), float(n)])
+    cache.flush()
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_worker_processes_share_the_disk_store(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=put_many, args=(str(tmp_path), worker, 20)) for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    reopened = EmbeddingCache(MODEL, path=str(tmp_path), disk_capacity=64)
+    for worker in range(3):
+        for n in range(20):
+            np.testing.assert_allclose(reopened.get(f"{worker} {n}"), [float(worker), float(n)])
@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+import instrumentation
+from instrumentation import Counter, Histogram
+
+@pytest.fixture
+def registry():
+    """A registry of the test's own, so test metrics never reach the shared /metrics output."""
+    return []
+
+def test_counter_and_histogram_render(registry):
+    counter = Counter("test_total", "Test counter", ["result"], registry=registry)
+    counter.inc(result="hit")
+    counter.inc(2, result="hit")
+    counter.inc(result="miss")
+    assert counter.render()[2:] == ['test_total{result="hit"} 3', 'test_total{result="miss"} 1']
+
+    histogram = Histogram("test_seconds", "Test histogram", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    histogram.observe(0.05, stage="search")
+    histogram.observe(0.5, stage="search")
+    histogram.observe(5.0, stage="search")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="search",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="search",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="search",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="search"} 3' in lines
+
+    with histogram.time(stage="format"):
+        pass
+    assert 'test_seconds_count{stage="format"} 1' in histogram.render()
+    assert "# TYPE test_seconds histogram" in instrumentation.render_metrics(registry)
+    assert "test_seconds" not in instrumentation.render_metrics()
+
+def test_disabled_records_nothing(monkeypatch, registry):
+    monkeypatch.setattr(instrumentation, "METRICS_ENABLED", False)
+    histogram = Histogram("disabled_seconds", "Test histogram", registry=registry)
+    histogram.observe(1.0)
+    with histogram.time():
+        pass
+    assert histogram.series == {}
+
+def test_metrics_dir_sums_every_worker(monkeypatch, registry, tmp_path):
+    monkeypatch.setattr(instrumentation, "METRICS_DIR", str(tmp_path))
+    counter = Counter("worker_total", "Test counter", ["result"], registry=registry)
+    histogram = Histogram("worker_seconds", "Test histogram", buckets=(1.0,), registry=registry)
+    counter.inc(result="hit")
+    histogram.observe(0.5)
+
+    pid = os.fork()
+    if pid == 0:
+        # A second worker, forked after the first had already recorded something
+        instrumentation.reset_metrics(registry)
+        counter.inc(2, result="hit")
+        counter.inc(result="miss")
+        histogram.observe(2.0)
+        instrumentation.flush_metrics(force=True, registry=registry)
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    text = instrumentation.render_metrics(registry)
+    assert 'worker_total{result="hit"} 3' in text
+    assert 'worker_total{result="miss"} 1' in text
+    assert 'worker_seconds_bucket{le="1.0"} 1' in text
+    assert "worker_seconds_count 2" in text
+    assert sorted(os.listdir(tmp_path)) == sorted([f"{pid}.json", f"{os.getpid()}.json"])
+
+def test_flush_is_rate_limited_but_not_lost(monkeypatch, registry, tmp_path):
+    monkeypatch.setattr(instrumentation, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(instrumentation, "METRICS_FLUSH_INTERVAL", 0.2)
+    monkeypatch.setattr(instrumentation, "_last_flush", 0.0)
+    path = tmp_path / f"{os.getpid()}.json"
+    counter = Counter("flushed_total", "Test counter", registry=registry)
+    counter.inc()
+    instrumentation.flush_metrics(registry=registry)
+    counter.inc()
+    instrumentation.flush_metrics(registry=registry)  # Within the interval: deferred to its end
+    assert json.loads(path.read_text(encoding="utf-8"))["flushed_total"] == [[[], 1]]
+    instrumentation._flush_timer.join()
+    assert json.loads(path.read_text(encoding="utf-8"))["flushed_total"] == [[[], 2]]
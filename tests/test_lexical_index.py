@@ -0,0 +1,31 @@
+from lexical_index import build_lexical_index, load_lexical_index, tokenize, write_lexical_index
+
+TEXTS = [
+    "Category: Gaming\nTitle: Roblox Game Design\nDescription: Build your own Roblox worlds.",
+    "Category: Python\nTitle: Python for Kids\nDescription: Learn Python with games.",
+    "Category: Python\nTitle: Python Projects\nDescription: Python projects for teens.",
+    "Category: Cloud\nTitle: AWS Cloud Practitioner\nDescription: Intro to AWS services.",
+] + [f"Category: Python\nTitle: Python Course {n}\nDescription: More Python practice." for n in range(40)]
+
+def test_tokenize_keeps_language_names():
+    assert tokenize("What C++ and C# courses do you have?") == ["c++", "c#", "courses"]
+
+def test_rare_term_is_confident():
+    index = build_lexical_index(TEXTS)
+    hits, confident = index.search("roblox courses", k=3)
+    assert hits[0][0] == 0 and confident
+
+    hits, confident = index.search("python", k=3)
+    assert len(hits) == 3 and not confident  # Common term: leave it to the dense search
+
+    assert index.search("quantum physics") == ([], False)
+
+def test_category_rows_and_round_trip(tmp_path):
+    index = build_lexical_index(TEXTS)
+    hits, _ = index.search("python aws", k=10, rows=[0, 3])
+    assert [row for row, _ in hits] == [3]
+
+    write_lexical_index(index, str(tmp_path / "bm25"))
+    loaded = load_lexical_index(str(tmp_path / "bm25"))
+    assert len(loaded) == len(TEXTS)
+    assert loaded.search("aws cloud", k=2) == index.search("aws cloud", k=2)
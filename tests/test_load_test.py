@@ -0,0 +1,55 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+import vector_utils
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import load_test
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(vector_utils, "initialize", lambda warm=True: None)  # app.py loads the model at import
+    app = importlib.import_module("app")
+    monkeypatch.setattr(app, "readiness", lambda: {"ready": True})
+    return app.app.test_client()
+
+def test_chat_answers_every_kind_of_question_in_the_mix(client, fake_model, courses):
+    vector_utils.create_vector_store(courses, incremental=False)
+    questions = load_test.build_questions(load_test.DEFAULT_MIX, [course["title"] for course in courses], 80)
+    assert {kind for kind, _ in questions} == set(load_test.DEFAULT_MIX)
+
+    for kind, question in questions:
+        response = client.post("/api/chat", json={"query": question})
+        assert response.status_code == 200, (kind, question)
+        body = response.get_json()
+        assert body["query"] == question
+        assert isinstance(body["answer"], str) and body["answer"], (kind, question)
+
+@pytest.mark.parametrize("payload", [{}, {"query": ""}, {"query": "   "}, {"query": 42}])
+def test_chat_rejects_missing_queries(client, payload):
+    response = client.post("/api/chat", json=payload)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+def test_build_questions_is_reproducible_and_skips_titles_when_there_are_none():
+    titles = ["Python Playground", "Java Basics"]
+    assert load_test.build_questions(load_test.DEFAULT_MIX, titles, 50, seed=3) == \
+        load_test.build_questions(load_test.DEFAULT_MIX, titles, 50, seed=3)
+    assert "title_lookup" not in {kind for kind, _ in load_test.build_questions(load_test.DEFAULT_MIX, [], 50)}
+
+def test_report_level_summarizes_latency_and_errors():
+    samples = [("free_text", 0.01 * (number + 1), None) for number in range(99)]
+    samples.append(("title_lookup", 2.0, "HTTP 503"))
+    report = load_test.report_level(samples, elapsed=10.0)
+    assert report["requests"] == 100 and report["errors"] == 1
+    assert report["error_rate"] == pytest.approx(0.01)
+    assert report["throughput_rps"] == pytest.approx(9.9)
+    assert report["p50_ms"] == pytest.approx(505.0)
+    assert report["max_ms"] == pytest.approx(2000.0)
+    assert report["error_kinds"] == {"HTTP 503": 1}
+    assert report["by_kind"]["free_text"]["errors"] == 0
+    assert report["by_kind"]["title_lookup"]["error_rate"] == 1.0
@@ -0,0 +1,47 @@
+import metadata
+import vector_utils
+from metadata import answer_query
+from semantic_cache import SemanticCache
+
+def test_title_question_with_a_price_limit_is_a_title_lookup(fake_model, courses):
+    vector_utils.create_vector_store(courses, incremental=False)
+
+    branch, response = answer_query("is Python Pro under $40?")
+    assert branch == "partial_title"
+    assert response.startswith("Course: Python Pro")
+
+def test_limits_apply_to_courses_about_the_topic(fake_model, courses):
+    vector_utils.create_vector_store(courses, incremental=False)
+
+    branch, response = answer_query("courses under $40")
+    assert branch == "structured_filter" and "Python Pro" in response
+
+    branch, response = answer_query("games for kids under $40")
+    assert branch == "structured_filter"
+    assert "Python Playground" in response and "Java Games" in response
+    assert "Python Pro" not in response  # Under $40, but not about games or kids
+    assert "Robotics Camp" not in response  # About kids, but not under $40
+
+def test_near_duplicate_question_reuses_the_answer_without_searching(fake_model, courses, monkeypatch):
+    vector_utils.create_vector_store(courses, incremental=False)
+    monkeypatch.setattr(vector_utils, "semantic_cache", SemanticCache())
+    searches = []
+    monkeypatch.setattr(metadata, "hybrid_search", lambda *args, **kwargs: searches.append(args) or [courses[0]])
+
+    branch, first = answer_query("python kids")
+    assert branch == "category_search"
+    # "please" isn't in the fake model's vocabulary, so the embedding is the same
+    branch, second = answer_query("python kids please")
+    assert branch == "semantic_cache" and second == first
+    assert len(searches) == 1
+
+def test_near_miss_questions_do_not_share_an_answer(fake_model, courses, monkeypatch):
+    vector_utils.create_vector_store(courses, incremental=False)
+    monkeypatch.setattr(vector_utils, "semantic_cache", SemanticCache())
+
+    for question, other in [
+        ("python courses for kids", "java courses for kids"),
+        ("cheapest python course", "most expensive python course"),  # Same fake embedding; never cached
+    ]:
+        assert answer_query(question)[1] != answer_query(other)[1]
+    assert vector_utils.semantic_cache.stats()["hits"] == 0
@@ -0,0 +1,13 @@
+import numpy as np
+
+from onnx_embeddings import mean_pool
+
+def test_mean_pool_ignores_padding():
+    hidden_states = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]], dtype=np.float32)
+    attention_mask = np.array([[1, 1, 0]])
+    pooled = mean_pool(hidden_states, attention_mask)
+    assert np.allclose(pooled, [[1.0, 0.0]])  # Mean of the real tokens, then unit length
+
+def test_mean_pool_empty_mask():
+    pooled = mean_pool(np.ones((1, 2, 3), dtype=np.float32), np.zeros((1, 2)))
+    assert np.all(np.isfinite(pooled))
@@ -0,0 +1,64 @@
+from catalog_store import load_catalog, write_catalog
+from query_engine import StructuredIndex, parse_structured_query
+
+COURSES = [
+    {"title": "AI Pro Camp", "description": "", "price_per_session": "$30 per session",
+     "number_of_lessons": 10, "total_price": 300, "course_category": "AI"},
+    {"title": "LEARN ROBOTICS", "description": "", "price_per_session": "$25 per session",
+     "number_of_lessons": 25, "total_price": 625, "course_category": "Robotics"},
+    {"title": "ChatGPT Boot Camp", "description": "", "price_per_session": "$30 per session",
+     "number_of_lessons": 5, "total_price": 150, "course_category": "AI"},
+    {"title": "Python Playground", "description": "", "price_per_session": "$35 per session",
+     "number_of_lessons": 8, "total_price": 280, "course_category": "Python"},
+]
+
+def test_parse_constraints():
+    structured = parse_structured_query("AI courses under $32 with at most 10 lessons")
+    assert structured.filters == [("number_of_lessons", "<=", 10), ("price_per_session", "<", 32)]
+    assert structured.sort is None
+    assert structured.topic == "ai"
+
+    structured = parse_structured_query("python games for kids with no more than 8 lessons over $20")
+    assert structured.filters == [("number_of_lessons", "<=", 8), ("price_per_session", ">", 20)]
+    assert structured.topic == "python games kids"
+
+    structured = parse_structured_query("3 cheapest courses by total")
+    assert structured.sort == ("total_price", False)
+    assert structured.limit == 3 and not structured.extreme
+
+    assert parse_structured_query("what is the price of AI Pro Camp") is None
+    assert parse_structured_query("python courses for kids") is None
+
+def test_filters_and_category():
+    index = StructuredIndex(COURSES)
+    rows = index.run(parse_structured_query("courses under $32 with at least 6 lessons"))
+    assert rows == [1, 0]  # Cheapest first
+    assert index.run(parse_structured_query("courses under $32"), category="ai") == [2, 0]
+    assert index.run(parse_structured_query("courses under $32"), category="Java") == []
+
+def test_strict_and_inclusive_limits():
+    index = StructuredIndex(COURSES)
+    assert index.run(parse_structured_query("courses under $30")) == [1]
+    assert index.run(parse_structured_query("courses up to $30")) == [1, 2, 0]
+    assert index.run(parse_structured_query("courses with fewer than 10 lessons")) == [2, 3]
+    assert index.run(parse_structured_query("courses with at most 10 lessons")) == [2, 0, 3]
+
+def test_cheapest_breaks_ties_by_total(tmp_path):
+    path = str(tmp_path / "catalog")
+    write_catalog(COURSES, path)
+    index = StructuredIndex(load_catalog(path))
+
+    assert index.run(parse_structured_query("cheapest AI course"), category="AI") == [2]
+    assert index.run(parse_structured_query("most expensive course")) == [3]
+    assert index.run(parse_structured_query("courses sorted by lessons")) == [2, 3, 0, 1]
+
+def test_most_expensive_lists_the_better_deal_first_among_ties():
+    index = StructuredIndex(COURSES)
+    # Both AI courses cost $30 per session; ChatGPT Boot Camp is $150 in total, AI Pro Camp $300
+    assert index.run(parse_structured_query("2 most expensive AI courses"), category="AI") == [2, 0]
+    assert index.run(parse_structured_query("3 most expensive courses")) == [3, 2, 0]
+
+def test_candidate_rows():
+    index = StructuredIndex(COURSES)
+    structured = parse_structured_query("courses with at most 10 lessons")
+    assert index.run(structured, candidate_rows=[3, 1, 0]) == [3, 0]  # FAISS order kept
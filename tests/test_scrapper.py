@@ -0,0 +1,83 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import Scrapper
+from data_preprocessing import preprocess_data
+
+SAVED_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scraped_content.html")
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves scraped_content.html for every /page/<n>, with an ETag."""
+    requests_seen = []
+    failures_left = {}
+
+    def do_GET(self):
+        StubHandler.requests_seen.append(self.path)
+        if StubHandler.failures_left.get(self.path, 0) > 0:
+            StubHandler.failures_left[self.path] -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        etag = '"v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        with open(SAVED_PAGE, "rb") as file:
+            body = file.read()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    StubHandler.requests_seen = []
+    StubHandler.failures_left = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+def test_crawl_streams_courses_and_skips_unchanged_pages(stub_server, tmp_path):
+    state_path = str(tmp_path / "state.json")
+    cache_dir = str(tmp_path / "cache")
+    urls = Scrapper.paginate(stub_server + "/page/{page}", 3)
+    with open(SAVED_PAGE, encoding="utf-8") as file:
+        expected = preprocess_data(file.read())
+
+    first = list(Scrapper.crawl_courses(urls, concurrency=3, state_path=state_path, cache_dir=cache_dir))
+    assert len(first) == 3 * len(expected)
+
+    assert list(Scrapper.crawl(urls, concurrency=3, state_path=state_path)) == []  # Every page is a 304
+
+    again = list(Scrapper.crawl_courses(urls, concurrency=3, state_path=state_path, cache_dir=cache_dir))
+    assert sorted(c["title"] for c in again) == sorted(c["title"] for c in first)
+
+def test_fetch_page_retries_server_errors(stub_server):
+    StubHandler.failures_left = {"/page/1": 2}
+    session = Scrapper.create_session(1)
+    html, validators = Scrapper.fetch_page(session, stub_server + "/page/1", backoff=0)
+    assert "per session" in html
+    assert validators["etag"] == '"v1"'
+    assert StubHandler.requests_seen.count("/page/1") == 3
+
+def test_crawl_keeps_only_a_window_of_pages_in_flight(stub_server, tmp_path):
+    urls = Scrapper.paginate(stub_server + "/page/{page}", 20)
+    pages = Scrapper.crawl(urls, concurrency=2, state_path=str(tmp_path / "state.json"))
+    url, html = next(pages)
+    assert "per session" in html
+    assert len(StubHandler.requests_seen) <= 2 * 2 + 1
+    assert len(list(pages)) == 19
+    assert len(StubHandler.requests_seen) == 20
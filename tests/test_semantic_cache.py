@@ -0,0 +1,35 @@
+from semantic_cache import SemanticCache
+
+SCOPE = ("python", 5, 0.4)
+
+def test_near_duplicate_hits_within_scope():
+    cache = SemanticCache(max_distance=0.05)
+    cache.put([1.0, 0.0, 0.0], 1, SCOPE, ["row 3", "row 7"])
+
+    assert cache.get([0.99, 0.05, 0.0], 1, SCOPE) == ["row 3", "row 7"]
+    assert cache.get([0.7, 0.7, 0.0], 1, SCOPE) is None  # Too far
+    assert cache.get([1.0, 0.0, 0.0], 1, ("java", 5, 0.4)) is None  # Other category
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+def test_eviction_expiry_and_version():
+    cache = SemanticCache(max_size=2)
+    cache.put([1.0, 0.0], 1, SCOPE, "a")
+    cache.put([0.0, 1.0], 1, SCOPE, "b")
+    assert cache.get([1.0, 0.0], 1, SCOPE) == "a"  # "a" is now most recent
+    cache.put([-1.0, 0.0], 1, SCOPE, "c")
+    assert cache.get([0.0, 1.0], 1, SCOPE) is None
+    assert cache.stats()["evictions"] == 1
+
+    assert cache.get([1.0, 0.0], 2, SCOPE) is None  # New index version
+    assert cache.stats()["invalidations"] == 1 and cache.stats()["size"] == 0
+
+    expired = SemanticCache(ttl=0)
+    expired.put([1.0, 0.0], 1, SCOPE, "a")
+    assert expired.get([1.0, 0.0], 1, SCOPE) is None
+    assert expired.stats()["size"] == 0
+
+def test_default_distance_keeps_one_word_changes_apart():
+    cache = SemanticCache()
+    cache.put([1.0, 0.0], 1, SCOPE, "python courses for kids")
+    assert cache.get([0.9, 0.19 ** 0.5], 1, SCOPE) is None  # Cosine similarity 0.9
+    assert cache.get([0.99, 0.02 ** 0.5], 1, SCOPE) == "python courses for kids"  # Similarity 0.99
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+
+from sharding import ShardCoordinator, assign_shards, write_shards
+
+def test_category_shards_are_balanced():
+    categories = ["Python"] * 5 + ["AI"] * 3 + ["Java"] * 2 + ["python"]
+    shards = assign_shards(range(len(categories)), categories, 2, by="category")
+    assert len(set(shards[:5]) | {shards[10]}) == 1  # One category, one shard
+    assert sorted(np.bincount(shards)) == [5, 6]
+
+    hashed = assign_shards([f"course-{n}" for n in range(100)], ["AI"] * 100, 4)
+    assert set(hashed) == {0, 1, 2, 3}
+
+def test_merged_top_k_matches_single_index(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 16)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    queries = vectors[:5] + 0.1 * rng.standard_normal((5, 16)).astype(np.float32)
+    faiss.normalize_L2(queries)
+    categories = [["AI", "Python", "Java"][n % 3] for n in range(300)]
+    write_shards(str(tmp_path / "shards"), vectors, [f"course-{n}" for n in range(300)], categories, 3)
+
+    index = faiss.IndexFlatIP(16)
+    index.add(vectors)
+    expected_scores, expected_rows = index.search(queries, 10)
+
+    coordinator = ShardCoordinator(str(tmp_path / "shards"))
+    try:
+        scores, rows = coordinator.search(queries, 10)
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+        _, rows = coordinator.search(queries, 10, category="java")
+        assert all(categories[row] == "Java" for row in rows.ravel())
+    finally:
+        coordinator.close()
+
+def test_concurrent_searches_and_worker_restart(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    write_shards(str(tmp_path / "shards"), vectors, [f"course-{n}" for n in range(200)], ["AI"] * 200, 2)
+    index = faiss.IndexFlatIP(16)
+    index.add(vectors)
+    _, expected_rows = index.search(vectors[:20], 5)
+
+    coordinator = ShardCoordinator(str(tmp_path / "shards"))
+    try:
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda row: coordinator.search(vectors[row:row + 1], 5)[1][0], range(20)))
+        np.testing.assert_array_equal(np.array(results), expected_rows)
+
+        coordinator._processes[1].kill()
+        coordinator._processes[1].join()
+        _, rows = coordinator.search(vectors[:20], 5)  # Restarts worker 1
+        np.testing.assert_array_equal(rows, expected_rows)
+        assert coordinator._processes[1].is_alive()
+    finally:
+        coordinator.close()
+
+def test_small_category_on_approximate_shards(tmp_path):
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((4000, 16)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    categories = ["AI"] * 4000
+    small = rng.choice(4000, 20, replace=False)
+    for row in small:
+        categories[row] = "Java"
+    write_shards(
+        str(tmp_path / "shards"), vectors, [f"course-{n}" for n in range(4000)], categories, 2,
+        index_spec="ivf:nlist=50,nprobe=2",
+    )
+
+    coordinator = ShardCoordinator(str(tmp_path / "shards"))
+    try:
+        _, rows = coordinator.search(vectors[small[:3]], 5, category="java")
+        expected = small[np.argsort(-(vectors[small[:3]] @ vectors[small].T), axis=1)[:, :5]]
+        np.testing.assert_array_equal(rows, expected)
+    finally:
+        coordinator.close()
@@ -0,0 +1,32 @@
+from title_index import TitleIndex, substring_edit_distance
+
+COURSES = [
+    {"title": "AI Pro", "course_category": "AI"},
+    {"title": "AI Pro Camp", "course_category": "AI"},
+    {"title": "LEARN ROBOTICS", "course_category": "Robotics"},
+    {"title": "LEARN JAVASCRIPT", "course_category": "Web Development"},
+    {"title": "LEARN MOBILE DEVELOPMENT", "course_category": "Mobile Development"},
+]
+
+def test_exact_match_ignores_case_and_spacing():
+    index = TitleIndex(COURSES)
+    assert index.lookup("learn  robotics")["title"] == "LEARN ROBOTICS"
+
+def test_contained_match_prefers_longest_title():
+    index = TitleIndex(COURSES)
+    assert index.lookup("What is the price of AI Pro Camp?")["title"] == "AI Pro Camp"
+    assert [c["title"] for c in index.contained_matches("tell me about ai pro camp")] == ["AI Pro Camp", "AI Pro"]
+
+def test_fuzzy_match_tolerates_typos_and_spacing():
+    index = TitleIndex(COURSES)
+    assert index.lookup("how many lessons in learn robotix")["title"] == "LEARN ROBOTICS"
+    assert index.lookup("learn java scrpt")["title"] == "LEARN JAVASCRIPT"
+
+def test_fuzzy_match_does_not_swallow_category_questions():
+    index = TitleIndex(COURSES)
+    assert index.lookup("mobile development courses") is None
+    assert index.lookup("list ai courses") is None
+
+def test_substring_edit_distance():
+    assert substring_edit_distance("robotics", "learnroboticsnow") == 0
+    assert substring_edit_distance("robotics", "learnrobotix") == 2
@@ -0,0 +1,168 @@
+import os
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pytest
+
+import vector_utils
+from conftest import course as conftest_course
+from vector_utils import build_category_indexes, load_category_indexes, write_category_indexes
+
+def test_category_indexes_are_saved_and_mapped(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    index = faiss.IndexFlatIP(4)
+    index.add(vectors)
+    category_indexes = build_category_indexes(SimpleNamespace(index=index), ["AI", "Java", "ai", "Java"])
+
+    path = str(tmp_path / "categories")
+    write_category_indexes(category_indexes, path)
+    loaded = load_category_indexes(path, 4)
+    assert sorted(loaded) == ["ai", "java"]
+    assert list(loaded["ai"].rows) == [0, 2] and loaded["ai"].index.ntotal == 2
+    _, rows = loaded["ai"].index.search(vectors[2:3], 1)
+    assert loaded["ai"].rows[rows[0][0]] == 2
+
+    assert load_category_indexes(path, 5) is None  # Saved for another index
+
+@pytest.mark.parametrize("index_spec", ["flat", "hnsw:m=8"])
+def test_category_search_fills_k_from_that_category(fake_model, courses, index_spec):
+    vector_utils.create_vector_store(courses, incremental=False, index_spec=index_spec)
+    catalog = vector_utils.get_catalog()
+    query = [fake_model.vector("java games")]
+
+    rows = vector_utils.search_vector_rows(catalog, query, category="python", k=3)[0]
+    assert sorted(catalog.courses[row]["title"] for row, _ in rows) == ["Python Playground", "Python Pro"]
+    rows = vector_utils.search_vector_rows(catalog, query, category="Robotics", k=3)[0]
+    assert [catalog.courses[row]["title"] for row, _ in rows] == ["Robotics Camp"]  # Least similar overall
+    assert vector_utils.search_vector_rows(catalog, query, category="Art", k=3) == [[]]
+
+def test_scores_are_cosine_similarities_cut_at_the_threshold(fake_model, courses):
+    vector_utils.create_vector_store(courses, incremental=False)
+    catalog = vector_utils.get_catalog()
+    query = np.array(fake_model.vector("java"))
+
+    vectors = np.array([fake_model.vector(vector_utils.course_text(course)) for course in catalog.courses])
+    cosines = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    rows = vector_utils.search_vector_rows(catalog, [query], k=5)[0]
+    assert [row for row, _ in rows] == list(np.argsort(-cosines))
+    np.testing.assert_allclose([score for _, score in rows], np.sort(cosines)[::-1], rtol=1e-5)
+
+    threshold = 0.5
+    rows = vector_utils.search_vector_rows(catalog, [query], k=5, threshold=threshold)[0]
+    assert 0 < len(rows) < 5
+    assert [row for row, _ in rows] == [row for row in np.argsort(-cosines) if cosines[row] >= threshold]
+
+@pytest.mark.parametrize("index_spec", ["ivf:nlist=100,nprobe=8", "hnsw:m=8,ef_search=16", "ivfpq:m=8,nbits=4,nprobe=8"])
+def test_small_category_of_approximate_index_gets_exact_top_k(index_spec):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((5000, 32)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    categories = ["Java"] * len(vectors)
+    small = rng.choice(len(vectors), 30, replace=False)  # Far fewer rows than nprobe lists or ef_search nodes reach
+    for row in small:
+        categories[row] = "Robotics"
+    index = vector_utils.new_index(index_spec, vectors)
+    index.add(vectors)
+
+    catalog = SimpleNamespace(
+        shards=None, vector_store=SimpleNamespace(index=index),
+        category_indexes=build_category_indexes(SimpleNamespace(index=index), categories),
+    )
+    queries = rng.standard_normal((20, 32)).astype(np.float32)
+    faiss.normalize_L2(queries)
+    expected = np.argsort(-(queries @ vectors[small].T), axis=1)[:, :10]
+    for query, best in zip(queries, expected):
+        rows = [row for row, _ in vector_utils.search_vector_rows(catalog, [query], category="robotics", k=10, threshold=-1.0)[0]]
+        assert len(rows) == 10
+        if not index_spec.startswith("ivfpq"):  # PQ scores are approximate
+            assert rows == list(small[best])
+
+def test_each_build_is_published_as_a_new_version(fake_model, courses, monkeypatch):
+    vector_utils.create_vector_store(courses, incremental=False)
+    first = vector_utils.get_catalog()
+
+    vector_utils.create_vector_store(courses[:3])
+    monkeypatch.setattr(vector_utils, "_last_check", 0.0)
+    second = vector_utils.get_catalog()
+    assert second.version[0] != first.version[0] and len(second.courses) == 3
+    # The previous version stays on disk for readers still using it
+    assert vector_utils.search_vectors(first, [fake_model.vector("java")], k=1)[0]
+
+    vector_utils.create_vector_store(courses)
+    versions = os.listdir(os.path.join(vector_utils.INDEX_PATH, vector_utils.VERSIONS_DIR))
+    expected = [second.version[0], vector_utils.current_index_dir()]  # The first version is gone
+    assert sorted(versions) == sorted(os.path.basename(path) for path in expected)
+
+def test_get_catalog_reloads_published_versions_and_keeps_a_working_one(fake_model, courses, monkeypatch):
+    vector_utils.create_vector_store(courses, incremental=False)
+    first = vector_utils.get_catalog()
+
+    vector_utils.create_vector_store(courses + [conftest_course("Robotics Lab", "Robotics", "robotics for kids")])
+    assert vector_utils.get_catalog() is first  # Not checked again within RELOAD_CHECK_INTERVAL
+    monkeypatch.setattr(vector_utils, "_last_check", 0.0)
+    second = vector_utils.get_catalog()
+    assert second is not first and len(second.courses) == 6
+    assert second.version[0] == vector_utils.current_index_dir()
+
+    # A version that cannot be loaded is skipped; the working catalog keeps serving
+    broken_dir = os.path.join(vector_utils.INDEX_PATH, vector_utils.VERSIONS_DIR, "broken")
+    os.makedirs(broken_dir)
+    with open(os.path.join(broken_dir, vector_utils.INDEX_FILE), "wb") as file:
+        file.write(b"not a faiss index")
+    vector_utils.publish_index_version(broken_dir, vector_utils.current_index_dir())
+    monkeypatch.setattr(vector_utils, "_last_check", 0.0)
+    assert vector_utils.get_catalog() is second
+    assert vector_utils.search_vectors(second, [fake_model.vector("robotics")], k=1)[0][0]["title"] in {
+        "Robotics Camp", "Robotics Lab",
+    }
+
+def test_incremental_build_embeds_only_new_and_changed_courses(fake_model, courses):
+    vector_utils.create_vector_store(courses, incremental=False)
+    assert len(fake_model.embedded) == 5
+
+    updated = [dict(course) for course in courses]
+    updated[1]["description"] = "python robotics for teens"  # Changed text
+    updated[2]["price_per_session"], updated[2]["total_price"] = "$20 per session", 160  # Metadata only
+    del updated[3]  # Removed
+    updated.append(conftest_course("Robotics Lab", "Robotics", "robotics for kids"))  # Added
+
+    fake_model.embedded.clear()
+    vector_utils.create_vector_store(updated)
+    assert sorted(fake_model.embedded) == sorted(vector_utils.course_text(updated[n]) for n in [1, 4])
+
+    catalog = vector_utils.get_catalog()
+    by_title = {course["title"]: course for course in catalog.courses}
+    assert sorted(by_title) == sorted(course["title"] for course in updated)
+    assert by_title["Java Basics"]["total_price"] == 160
+    top = vector_utils.search_vectors(catalog, [fake_model.vector("python robotics")], k=1)[0][0]
+    assert top["title"] == "Python Pro"
+
+def test_new_model_or_index_spec_rebuilds_everything(fake_model, courses, monkeypatch):
+    vector_utils.create_vector_store(courses, incremental=False)
+
+    fake_model.embedded.clear()
+    vector_utils.create_vector_store(courses)
+    assert fake_model.embedded == []  # Nothing changed
+
+    monkeypatch.setattr(vector_utils, "embedding_model_id", lambda backend=None: "another model")
+    vector_utils.create_vector_store(courses)
+    assert len(fake_model.embedded) == 5
+
+    fake_model.embedded.clear()
+    vector_utils.create_vector_store(courses, index_spec="hnsw:m=8")
+    assert len(fake_model.embedded) == 5
+
+@pytest.mark.parametrize("index_spec", ["flat", "hnsw:m=8"])
+def test_builds_read_courses_from_a_stream_once(fake_model, courses, index_spec):
+    vector_utils.create_vector_store(iter(courses), incremental=False, index_spec=index_spec)
+    assert len(vector_utils.get_catalog().courses) == 5
+
+    fake_model.embedded.clear()
+    updated = [dict(course) for course in courses[1:]]  # Removing a course rebuilds an HNSW index
+    updated[0]["description"] = "python robotics for teens"
+    vector_utils.create_vector_store((course for course in updated), index_spec=index_spec)
+    assert len(fake_model.embedded) == (1 if index_spec == "flat" else 4)
+
+    titles = [course["title"] for course in vector_utils.index_rows(vector_utils.load_vector_store())]
+    assert sorted(titles) == sorted(course["title"] for course in updated)